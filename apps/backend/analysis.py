@@ -0,0 +1,264 @@
+"""
+Document Analysis for Caelo Backend.
+
+Parsing and extraction for uploaded documents. Everything here is a plain
+function of a file on disk with no database or application imports, so it
+runs in ``ProcessPoolExecutor`` workers (see ``analysis_worker``) and keeps
+CPU-heavy work off the processes serving requests.
+
+Bank statements are read as CSV exports: a header row naming a date, a
+description and either a signed amount or separate debit/credit columns.
+Each row becomes a transaction, and a summary of the statement goes to
+``Document.analysis_results``. Other documents get basic file facts.
+"""
+
+import csv
+import os
+import re
+import statistics
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+
+# Configuration
+ANALYSIS_MAX_TRANSACTIONS = int(os.getenv("ANALYSIS_MAX_TRANSACTIONS", "50000"))
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "3"))
+ANALYSIS_RETRY_BACKOFF_SECONDS = float(
+    os.getenv("ANALYSIS_RETRY_BACKOFF_SECONDS", "30")
+)
+ANALYSIS_LEASE_SECONDS = int(os.getenv("ANALYSIS_LEASE_SECONDS", "600"))
+# Transactions further than this from their application's baseline are flagged
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))
+
+# Accepted header names per column, compared lowercased with spaces/punctuation removed
+_COLUMNS = {
+    "date": ("date", "transactiondate", "postingdate", "posteddate", "valuedate"),
+    "description": ("description", "details", "memo", "narrative", "payee", "name"),
+    "amount": ("amount", "transactionamount", "value"),
+    "debit": ("debit", "withdrawal", "withdrawals", "moneyout", "paidout"),
+    "credit": ("credit", "deposit", "deposits", "moneyin", "paidin"),
+    "category": ("category", "type", "transactiontype"),
+    "reference": (
+        "reference",
+        "ref",
+        "referencenumber",
+        "checknumber",
+        "transactionid",
+    ),
+}
+
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%Y/%m/%d",
+)
+
+_TEXT_TYPES = ("text/", "application/csv", "application/json")
+
+# Transaction.amount is Numeric(10, 2)
+_CENT = Decimal("0.01")
+_MAX_AMOUNT = Decimal(10) ** 8
+
+
+class DocumentUnreadable(Exception):
+    """The document can't be analyzed; retrying won't help."""
+
+
+# Error recorded on jobs running when a pool process died; they are rerun
+# one at a time so the document that kills its process can be told apart
+ANALYSIS_CRASH_ERROR = "Analysis process crashed"
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    return ANALYSIS_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+
+
+def analyze_document(
+    path: str, document_type: str, mime_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Analyze one stored document.
+
+    Returns ``{"results": {...}, "transactions": [...]}``; transactions
+    are plain dicts with an ISO ``transaction_date``, ``type``
+    (inflow/outflow), ``category``, ``description``, a positive decimal
+    string ``amount`` and an optional ``reference_number``.
+    """
+    if not os.path.exists(path):
+        raise DocumentUnreadable("Stored file is missing")
+    if document_type == "bank_statement":
+        return parse_bank_statement(path)
+    return {"results": describe_file(path, mime_type), "transactions": []}
+
+
+def describe_file(path: str, mime_type: Optional[str] = None) -> Dict[str, Any]:
+    """Basic facts about a document that has no dedicated parser."""
+    facts: Dict[str, Any] = {"kind": "file", "bytes": os.path.getsize(path)}
+    if mime_type and mime_type.startswith(_TEXT_TYPES):
+        with open(path, "rb") as f:
+            facts["lines"] = sum(1 for _ in f)
+    return facts
+
+
+# ===== BANK STATEMENTS =====
+
+
+def _normalize(header: str) -> str:
+    return re.sub(r"[^a-z]", "", header.lower())
+
+
+def _column_map(headers: List[str]) -> Dict[str, int]:
+    normalized = [_normalize(header) for header in headers]
+    columns = {}
+    for column, names in _COLUMNS.items():
+        for index, header in enumerate(normalized):
+            if header in names:
+                columns[column] = index
+                break
+    return columns
+
+
+def parse_amount(text: str) -> Optional[Decimal]:
+    """Parse ``1,234.56``, ``-$12.00`` or ``(12.00)``; None when blank."""
+    text = text.strip().replace(",", "").replace("$", "")
+    if not text:
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {text!r}")
+    return -amount if negative else amount
+
+
+def parse_date(text: str) -> date:
+    text = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"not a date: {text!r}")
+
+
+def parse_bank_statement(path: str) -> Dict[str, Any]:
+    """Extract transactions from a CSV bank statement export.
+
+    Unparseable rows are skipped and counted rather than failing the whole
+    statement; a file without recognizable columns is DocumentUnreadable.
+    """
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            raise DocumentUnreadable("Bank statement is not a CSV export")
+        reader = csv.reader(f, dialect)
+        headers = next(reader, None) or []
+        columns = _column_map(headers)
+        if "date" not in columns or not (
+            "amount" in columns or "debit" in columns or "credit" in columns
+        ):
+            raise DocumentUnreadable("Bank statement has no date and amount columns")
+
+        def cell(row: List[str], column: str) -> str:
+            index = columns.get(column)
+            return row[index] if index is not None and index < len(row) else ""
+
+        transactions = []
+        skipped = 0
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            try:
+                transaction_date = parse_date(cell(row, "date"))
+                amount = parse_amount(cell(row, "amount"))
+                if amount is None:
+                    credit = parse_amount(cell(row, "credit")) or Decimal(0)
+                    debit = parse_amount(cell(row, "debit")) or Decimal(0)
+                    amount = credit - abs(debit)
+            except ValueError:
+                skipped += 1
+                continue
+            amount = amount.quantize(_CENT)
+            if not amount or abs(amount) >= _MAX_AMOUNT:
+                skipped += 1
+                continue
+            if len(transactions) >= ANALYSIS_MAX_TRANSACTIONS:
+                raise DocumentUnreadable(
+                    "Bank statement has more than "
+                    f"{ANALYSIS_MAX_TRANSACTIONS} transactions"
+                )
+            description = cell(row, "description").strip() or "Statement transaction"
+            transactions.append(
+                {
+                    "transaction_date": transaction_date.isoformat(),
+                    "type": "inflow" if amount > 0 else "outflow",
+                    "category": cell(row, "category").strip()[:255] or "Uncategorized",
+                    "description": description,
+                    "amount": str(abs(amount)),
+                    "reference_number": cell(row, "reference").strip()[:255] or None,
+                }
+            )
+
+    if not transactions:
+        raise DocumentUnreadable("Bank statement has no readable transactions")
+    return {
+        "results": summarize_transactions(transactions, skipped),
+        "transactions": transactions,
+    }
+
+
+def summarize_transactions(
+    transactions: List[Dict[str, Any]], skipped: int = 0
+) -> Dict[str, Any]:
+    """Statement-level figures stored as the document's analysis results."""
+    inflow = sum(
+        (Decimal(t["amount"]) for t in transactions if t["type"] == "inflow"),
+        Decimal(0),
+    )
+    outflow = sum(
+        (Decimal(t["amount"]) for t in transactions if t["type"] == "outflow"),
+        Decimal(0),
+    )
+    dates = [t["transaction_date"] for t in transactions]
+    return {
+        "kind": "bank_statement",
+        "transaction_count": len(transactions),
+        "skipped_rows": skipped,
+        "period_start": min(dates),
+        "period_end": max(dates),
+        "total_inflow": str(inflow),
+        "total_outflow": str(outflow),
+        "net_flow": str(inflow - outflow),
+        "largest_outflow": str(
+            max(
+                (Decimal(t["amount"]) for t in transactions if t["type"] == "outflow"),
+                default=Decimal(0),
+            )
+        ),
+    }
+
+
+def robust_z_scores(values: List[float], min_sample: int = 8) -> List[Optional[float]]:
+    """Modified z-score of each value against the median and median absolute
+    deviation of all of them (Iglewicz & Hoaglin), so a few huge amounts
+    can't drag the baseline the way they would a mean and standard deviation.
+
+    None for every value when there are fewer than ``min_sample`` or the
+    values barely vary, since there is no meaningful baseline then.
+    """
+    if len(values) < min_sample:
+        return [None] * len(values)
+    median = statistics.median(values)
+    mad = statistics.median([abs(value - median) for value in values])
+    if mad == 0:
+        return [None] * len(values)
+    return [0.6745 * (value - median) / mad for value in values]
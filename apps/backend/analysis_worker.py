@@ -0,0 +1,236 @@
+"""
+Document Analysis Worker for Caelo Backend.
+
+Runs queued ``DocumentAnalysisJob`` rows: claims due jobs from the
+database, parses each document in a ``ProcessPoolExecutor`` and records the
+outcome. The event loop only waits on the pool and on short database calls
+made in threads, so parsing never blocks request handling.
+
+Concurrency is bounded twice: ``ANALYSIS_PROCESSES`` pool processes, and
+at most ``ANALYSIS_MAX_CONCURRENT`` jobs claimed by a worker at a time, so
+jobs it can't start yet stay in the queue for other workers. Pool processes
+are recycled after ``ANALYSIS_TASKS_PER_PROCESS`` jobs.
+
+If a pool process dies, every job on the pool fails with it. Those jobs
+go back to the queue without losing an attempt and are then analyzed one
+at a time on a process of their own, so only a document that crashes its
+process again is charged for it.
+
+With ANALYSIS_WORKER_MODE=embedded (the default) each API process runs a
+worker; with ``external``, the API only queues jobs and analysis runs in
+separate processes started with ``python analysis_worker.py``.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from database import SessionLocal
+from analysis import ANALYSIS_CRASH_ERROR, DocumentUnreadable, analyze_document
+from crud_operations import (
+    claim_analysis_jobs,
+    complete_analysis_job,
+    fail_analysis_job,
+    release_analysis_job,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ANALYSIS_WORKER_MODE = os.getenv("ANALYSIS_WORKER_MODE", "embedded")
+ANALYSIS_PROCESSES = int(
+    os.getenv("ANALYSIS_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+ANALYSIS_MAX_CONCURRENT = int(
+    os.getenv("ANALYSIS_MAX_CONCURRENT", str(ANALYSIS_PROCESSES))
+)
+ANALYSIS_TASKS_PER_PROCESS = int(os.getenv("ANALYSIS_TASKS_PER_PROCESS", "100"))
+ANALYSIS_POLL_SECONDS = float(os.getenv("ANALYSIS_POLL_SECONDS", "2"))
+
+
+class AnalysisWorker:
+    """Claims analysis jobs and runs them on a process pool."""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        processes: int = ANALYSIS_PROCESSES,
+        max_concurrent: int = ANALYSIS_MAX_CONCURRENT,
+        poll_interval: float = ANALYSIS_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.processes = processes
+        self.max_concurrent = max_concurrent
+        self.poll_interval = poll_interval
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._isolation: Optional[asyncio.Lock] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked: the parent runs threads (event bus,
+        # database pool) that a fork would copy mid-operation
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=ANALYSIS_TASKS_PER_PROCESS,
+        )
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._isolation = asyncio.Lock()
+        self._pool = self._new_pool()
+        self._runner = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop claiming, let running jobs finish, and shut the pool down."""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._pool.shutdown(wait=True)
+        self._runner = None
+
+    def wake(self):
+        """Check for jobs now instead of at the next poll; safe from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            free = self.max_concurrent - len(self._running)
+            claimed: List[Dict[str, Any]] = []
+            if free > 0:
+                try:
+                    claimed = await asyncio.to_thread(
+                        self._with_session, claim_analysis_jobs, free
+                    )
+                except Exception:
+                    logger.exception("Claiming analysis jobs failed")
+                for job in claimed:
+                    task = asyncio.create_task(self._process(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._job_done)
+            if claimed and len(claimed) == free:
+                continue  # Possibly more due; claim again once a slot frees
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        self._wakeup.set()
+
+    async def _process(self, job: Dict[str, Any]):
+        try:
+            if job["isolate"]:
+                async with self._isolation:
+                    output = await self._analyze_alone(job)
+            else:
+                output = await self._analyze(job)
+        except DocumentUnreadable as e:
+            await self._record(fail_analysis_job, job, str(e), False)
+        except BrokenProcessPool:
+            if job["isolate"]:
+                # It ran alone, so this job's document killed the process
+                logger.error("Analysis process crashed on job %s", job["job_id"])
+                await self._record(fail_analysis_job, job, ANALYSIS_CRASH_ERROR, True)
+            else:
+                # Any job on the pool may have killed it; each is rerun alone
+                # and only the one that crashes again is charged an attempt
+                await self._record(release_analysis_job, job, ANALYSIS_CRASH_ERROR)
+        except Exception as e:
+            logger.exception("Analysis of document %s failed", job["document_id"])
+            await self._record(fail_analysis_job, job, f"{type(e).__name__}: {e}", True)
+        else:
+            await self._record(
+                complete_analysis_job, job, output["results"], output["transactions"]
+            )
+
+    async def _analyze(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        pool = self._pool
+        try:
+            return await self._loop.run_in_executor(
+                pool,
+                analyze_document,
+                job["path"],
+                job["document_type"],
+                job["mime_type"],
+            )
+        except BrokenProcessPool:
+            # A pool process died (e.g. out of memory). Every job on the pool
+            # sees this; the first replaces it and shuts the broken one down
+            if self._pool is pool:
+                logger.error("Analysis process pool broke; starting a new one")
+                self._pool = self._new_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def _analyze_alone(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a job on a process of its own, so a crash is attributable."""
+        pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            return await self._loop.run_in_executor(
+                pool,
+                analyze_document,
+                job["path"],
+                job["document_type"],
+                job["mime_type"],
+            )
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _record(self, operation: Callable, *args):
+        try:
+            if not await asyncio.to_thread(self._with_session, operation, *args):
+                logger.warning(
+                    "Analysis job %s was reclaimed; result dropped", args[0]["job_id"]
+                )
+        except Exception:
+            # The lease expires and the job is claimed again
+            logger.exception("Recording analysis job %s failed", args[0]["job_id"])
+
+    def _with_session(self, operation: Callable, *args):
+        db = self.session_factory()
+        try:
+            return operation(db, *args)
+        finally:
+            db.close()
+
+
+async def main():
+    """Run a standalone worker until SIGINT/SIGTERM."""
+    worker = AnalysisWorker()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await worker.start()
+    print(f"🔬 Analysis worker running with {worker.processes} processes")
+    await stop.wait()
+    await worker.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
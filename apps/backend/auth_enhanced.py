@@ -5,14 +5,18 @@ Provides JWT-based authentication with role-based access control,
 user registration, and comprehensive security features.
 """
 
+import math
 import os
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Union
+from functools import lru_cache
+from typing import Optional, List, Union, Tuple, Dict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import JWTError, jwt, jwk
 import bcrypt
 import uuid
 
@@ -26,28 +30,140 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-key-change-in-production")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Asymmetric signing (RS256/ES256): PEM contents or paths to PEM files
+JWT_PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY")
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE")
+
+# Stateless claims tokens (user id, role, organization, version counter)
+JWT_STATELESS_CLAIMS = os.getenv("JWT_STATELESS_CLAIMS", "false").lower() == "true"
+TOKEN_VERSION_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "60"))
+
+# Password hashing policy: a fixed BCRYPT_ROUNDS, or a cost calibrated at
+# startup so one hash takes about BCRYPT_TARGET_MS on this host
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "15"))
+# Stored hashes within this many rounds above the target are left alone
+BCRYPT_ROUNDS_TOLERANCE = int(os.getenv("BCRYPT_ROUNDS_TOLERANCE", "1"))
+DEFAULT_BCRYPT_ROUNDS = 12
+
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=DEFAULT_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=DEFAULT_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=DEFAULT_BCRYPT_ROUNDS + BCRYPT_ROUNDS_TOLERANCE,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
 # ===== PASSWORD UTILITIES =====
 
+def calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS, sample_rounds: int = 8) -> int:
+    """Pick the bcrypt cost whose hashing time is closest to ``target_ms``.
+
+    Each extra round doubles the work, so a cheap sample hash is timed and
+    extrapolated instead of hashing at every candidate cost.
+    """
+    salt = bcrypt.gensalt(rounds=sample_rounds)
+    sample_ms = min(
+        _time_hash(salt) for _ in range(3)
+    )
+    rounds = sample_rounds + round(math.log2(max(target_ms, 1.0) / max(sample_ms, 0.01)))
+    return max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, rounds))
+
+
+def _time_hash(salt: bytes) -> float:
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration-password", salt)
+    return (time.perf_counter() - start) * 1000
+
+
+def configure_password_hashing(rounds: Optional[int] = None) -> int:
+    """Apply the hashing policy to ``pwd_context`` and return the cost used.
+
+    Uses ``rounds`` if given, then BCRYPT_ROUNDS, then a startup calibration
+    against BCRYPT_TARGET_MS. Existing hashes at other costs keep verifying
+    and are upgraded on the next successful login.
+    """
+    if rounds is None:
+        rounds = int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else calibrate_bcrypt_rounds()
+
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds + BCRYPT_ROUNDS_TOLERANCE,
+    )
+    return rounds
+
+
+def get_bcrypt_rounds() -> int:
+    """Cost currently used for new hashes."""
+    return pwd_context.to_dict()["bcrypt__default_rounds"]
+
+
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash a password using bcrypt at the configured cost."""
+    return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return pwd_context.verify(plain_password, hashed_password)
     except Exception:
         return False
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if its cost is off-policy."""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return False, None
+
+
 # ===== JWT TOKEN UTILITIES =====
 
+def _read_key(value: Optional[str], path: Optional[str]) -> Optional[str]:
+    if value:
+        return value.replace("\\n", "\n")
+    if path:
+        with open(path) as key_file:
+            return key_file.read()
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_signing_key():
+    """Key used to sign tokens, parsed once per process."""
+    if ALGORITHM.startswith("HS"):
+        return SECRET_KEY
+    private_key = _read_key(JWT_PRIVATE_KEY, JWT_PRIVATE_KEY_FILE)
+    if private_key is None:
+        raise RuntimeError(f"JWT_PRIVATE_KEY or JWT_PRIVATE_KEY_FILE is required for {ALGORITHM}")
+    return jwk.construct(private_key, ALGORITHM)
+
+
+@lru_cache(maxsize=1)
+def get_verification_key():
+    """Key used to verify tokens, parsed once per process.
+
+    For asymmetric algorithms only the public key is needed, so services
+    that merely verify tokens never hold the private key.
+    """
+    if ALGORITHM.startswith("HS"):
+        return SECRET_KEY
+    public_key = _read_key(JWT_PUBLIC_KEY, JWT_PUBLIC_KEY_FILE)
+    if public_key is None:
+        raise RuntimeError(f"JWT_PUBLIC_KEY or JWT_PUBLIC_KEY_FILE is required for {ALGORITHM}")
+    return jwk.construct(public_key, ALGORITHM)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -63,14 +179,44 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         "type": "access"
     })
     
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_signing_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_claims_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Create an access token carrying everything needed to authorize requests.
+
+    Requests bearing these tokens are authorized without loading the user;
+    ``ver`` is checked against ``User.token_version`` so bumping the counter
+    revokes every token issued before.
+    """
+    return create_access_token(
+        data={
+            "sub": user.email,
+            "role": user.role.value,
+            "uid": str(user.id),
+            "name": user.name,
+            "org": user.organization,
+            "ver": user.token_version or 0,
+        },
+        expires_delta=expires_delta
+    )
+
+
+def issue_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Issue the configured token flavour for a user."""
+    if JWT_STATELESS_CLAIMS:
+        return create_claims_token(user, expires_delta)
+    return create_access_token(
+        data={"sub": user.email, "role": user.role.value},
+        expires_delta=expires_delta
+    )
+
+
 def decode_access_token(token: str) -> Optional[TokenData]:
     """Decode and validate a JWT access token."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_verification_key(), algorithms=[ALGORITHM])
         
         # Verify token type
         if payload.get("type") != "access":
@@ -84,7 +230,11 @@ def decode_access_token(token: str) -> Optional[TokenData]:
             
         token_data = TokenData(
             email=email,
-            role=UserRole(role) if role else None
+            role=UserRole(role) if role else None,
+            user_id=payload.get("uid"),
+            name=payload.get("name"),
+            organization=payload.get("org"),
+            token_version=payload.get("ver")
         )
         return token_data
         
@@ -92,6 +242,77 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         return None
 
 
+# ===== STATELESS PRINCIPALS =====
+
+@dataclass(frozen=True)
+class AuthPrincipal:
+    """Authenticated caller rebuilt from token claims, without a DB lookup.
+
+    Exposes the ``User`` attributes the authorization and CRUD layers rely
+    on, so either can be passed wherever a current user is expected.
+    """
+    id: uuid.UUID
+    email: str
+    role: UserRole
+    name: str
+    organization: Optional[str] = None
+    token_version: int = 0
+    is_active: bool = True
+
+
+# Current caller: a loaded User (legacy tokens) or an AuthPrincipal (claims tokens)
+Principal = Union[User, AuthPrincipal]
+
+
+class TokenVersionCache:
+    """Per-process cache of each user's token version and active flag.
+
+    Entries expire after ``ttl`` seconds, so a revocation made by another
+    worker takes effect within that window; revocations made in this
+    process are applied immediately via ``invalidate``.
+    """
+
+    def __init__(self, ttl: int = TOKEN_VERSION_CACHE_TTL_SECONDS, max_entries: int = 50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[uuid.UUID, Tuple[int, bool, float]] = {}
+
+    def get(self, db: Session, user_id: uuid.UUID) -> Optional[Tuple[int, bool]]:
+        """Return (token_version, is_active), querying only on a miss."""
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[2] > now:
+            return entry[0], entry[1]
+
+        row = db.query(User.token_version, User.is_active).filter(User.id == user_id).first()
+        if row is None:
+            self._entries.pop(user_id, None)
+            return None
+
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[user_id] = (row.token_version or 0, bool(row.is_active), now + self.ttl)
+        return row.token_version or 0, bool(row.is_active)
+
+    def invalidate(self, user_id: uuid.UUID):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_version_cache = TokenVersionCache()
+
+
+def revoke_user_tokens(db: Session, user: User):
+    """Invalidate every token issued to a user by bumping its version counter.
+
+    The caller is responsible for committing the session.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    token_version_cache.invalidate(user.id)
+
+
 # ===== USER AUTHENTICATION =====
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
@@ -103,10 +324,15 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     
     if not user.is_active:
         return None
-        
-    if not verify_password(password, user.password_hash):
+    
+    valid, new_hash = verify_and_update_password(password, user.password_hash)
+    if not valid:
         return None
     
+    # Transparently move hashes outside the cost policy to the current cost
+    if new_hash:
+        user.password_hash = new_hash
+    
     # Update last login
     user.last_login = datetime.now(timezone.utc)
     db.commit()
@@ -204,15 +430,62 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get the current caller, from claims alone when the token carries them.
+
+    Claims tokens cost no query once the user's token version is cached;
+    legacy email-only tokens fall back to loading the ``User``.
+    """
+    token_data = decode_access_token(token)
+    if token_data is None or token_data.user_id is None or token_data.token_version is None:
+        return await get_current_user(token, db)
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    current = token_version_cache.get(db, token_data.user_id)
+    if current is None or token_data.role is None:
+        raise credentials_exception
+
+    version, is_active = current
+    if token_data.token_version != version:
+        raise credentials_exception
+
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
+    return AuthPrincipal(
+        id=token_data.user_id,
+        email=token_data.email,
+        role=token_data.role,
+        name=token_data.name or token_data.email,
+        organization=token_data.organization,
+        token_version=version
+    )
+
+
 # ===== ROLE-BASED ACCESS CONTROL =====
 
 class RoleChecker:
-    """Role-based access control checker."""
+    """Role-based access control checker.
+
+    Authorizes from token claims when available, so role-gated routes need
+    no user lookup.
+    """
     
     def __init__(self, allowed_roles: List[UserRole]):
         self.allowed_roles = allowed_roles
     
-    def __call__(self, current_user: User = Depends(get_current_active_user)) -> User:
+    def __call__(self, current_user: Principal = Depends(get_current_principal)) -> Principal:
         if current_user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -236,7 +509,7 @@ class ResourceOwnerChecker:
     
     def can_access_application(
         self, 
-        user: User, 
+        user: Principal, 
         application_owner_id: uuid.UUID
     ) -> bool:
         """Check if user can access a loan application."""
@@ -259,7 +532,7 @@ resource_checker = ResourceOwnerChecker()
 # ===== PERMISSION UTILITIES =====
 
 def check_application_access(
-    user: User, 
+    user: Principal, 
     application_borrower_id: uuid.UUID,
     require_ownership: bool = False
 ) -> bool:
@@ -280,7 +553,7 @@ def check_application_access(
     return False
 
 
-def get_user_accessible_applications_filter(user: User):
+def get_user_accessible_applications_filter(user: Principal):
     """Get SQLAlchemy filter for applications accessible to user."""
     if user.role in [UserRole.admin, UserRole.analyst]:
         # Admin and analysts can see all applications
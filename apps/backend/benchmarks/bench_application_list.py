@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark query time and payload size of application list pages.
+
+Seeds a throwaway SQLite database, then compares the full ``view=full``
+path (ORM rows with joined users, LoanApplicationResponse) against the
+default column-projected summary path, per page of results.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp(prefix="caelo_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import logging  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from models_new import (  # noqa: E402
+    ApplicationPriority,
+    ApplicationStatus,
+    LoanApplication,
+    User,
+    UserRole,
+)
+from auth_enhanced import AuthPrincipal  # noqa: E402
+from crud_operations import (  # noqa: E402
+    get_loan_application_summaries,
+    get_loan_applications,
+)
+from schemas_new import (  # noqa: E402
+    LoanApplicationPage,
+    LoanApplicationSummaryPage,
+    PaginationParams,
+)
+from serialization import dump_json  # noqa: E402
+
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+APPLICATIONS = int(os.getenv("BENCH_APPLICATIONS", "5000"))
+PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", "100"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+
+
+def seed(db):
+    officers = [
+        User(
+            id=uuid.uuid4(),
+            email=f"officer{i}@example.org",
+            password_hash="x",
+            role=UserRole.loan_officer,
+            name=f"Officer {i}",
+        )
+        for i in range(10)
+    ]
+    borrowers = [
+        User(
+            id=uuid.uuid4(),
+            email=f"borrower{i}@example.org",
+            password_hash="x",
+            role=UserRole.borrower,
+            name=f"Borrower {i}",
+            organization=f"Business {i}",
+        )
+        for i in range(APPLICATIONS // 2)
+    ]
+    db.add_all(officers + borrowers)
+    start = datetime.now(timezone.utc)
+    statuses = list(ApplicationStatus)
+    priorities = list(ApplicationPriority)
+    db.add_all(
+        LoanApplication(
+            id=uuid.uuid4(),
+            business_name=f"Business {i}",
+            business_type="Retail",
+            loan_amount=Decimal(10000 + i),
+            loan_purpose="Working capital and inventory " * 8,
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            borrower_id=borrowers[i % len(borrowers)].id,
+            loan_officer_id=officers[i % 10].id,
+            underwriter_id=officers[(i + 1) % 10].id,
+            risk_score=float(i % 100),
+            analyst_notes="Reviewed cash flow statements. " * 10,
+            application_date=start - timedelta(minutes=i),
+        )
+        for i in range(APPLICATIONS)
+    )
+    db.commit()
+
+
+def measure(db, fetch, page_schema):
+    admin = AuthPrincipal(
+        id=uuid.uuid4(), email="admin@example.org", role=UserRole.admin, name="Admin"
+    )
+    pagination = PaginationParams(page=2, size=PAGE_SIZE)
+
+    query_time = serialize_time = 0.0
+    payload = b""
+    for _ in range(ROUNDS):
+        db.expunge_all()
+        start = time.perf_counter()
+        items, total = fetch(db, admin, None, pagination)
+        query_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        payload = dump_json(
+            page_schema,
+            {
+                "items": items,
+                "total": total,
+                "page": 2,
+                "size": PAGE_SIZE,
+                "pages": (total + PAGE_SIZE - 1) // PAGE_SIZE,
+            },
+        )
+        serialize_time += time.perf_counter() - start
+
+    return query_time / ROUNDS * 1000, serialize_time / ROUNDS * 1000, len(payload)
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db)
+
+    full = measure(db, get_loan_applications, LoanApplicationPage)
+    summary = measure(db, get_loan_application_summaries, LoanApplicationSummaryPage)
+    db.close()
+
+    print(f"applications: {APPLICATIONS}, page size: {PAGE_SIZE}, rounds: {ROUNDS}")
+    print(f"{'':10} {'query ms':>10} {'serialize ms':>13} {'payload KB':>11}")
+    for label, (query_ms, serialize_ms, size) in (("full", full), ("summary", summary)):
+        print(f"{label:10} {query_ms:10.2f} {serialize_ms:13.2f} {size / 1024:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark whitelisted application sorts with offset and keyset pagination.
+
+Seeds a throwaway SQLite database, then for every ``ApplicationSort``
+checks the query plan (an index-ordered scan has no temporary B-tree for
+the ORDER BY) and times the first page, a deep ``OFFSET`` page and the
+same deep page reached through a keyset cursor.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp(prefix="caelo_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import logging  # noqa: E402
+
+from sqlalchemy import event  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from models_new import (  # noqa: E402
+    ApplicationPriority,
+    LoanApplication,
+    User,
+    UserRole,
+)
+from auth_enhanced import AuthPrincipal  # noqa: E402
+from crud_operations import (  # noqa: E402
+    application_cursor,
+    get_loan_application_summaries,
+)
+from schemas_new import ApplicationSort, PaginationParams  # noqa: E402
+
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+APPLICATIONS = int(os.getenv("BENCH_APPLICATIONS", "200000"))
+PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", "50"))
+DEEP_PAGE = int(os.getenv("BENCH_DEEP_PAGE", "1000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "10"))
+
+_last_statement = {}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    _last_statement["sql"], _last_statement["params"] = statement, parameters
+
+
+def seed(db):
+    rng = random.Random(11)
+    borrower_id = uuid.uuid4()
+    db.add(
+        User(
+            id=borrower_id,
+            email="borrower@example.org",
+            password_hash="x",
+            role=UserRole.borrower,
+            name="Borrower",
+        )
+    )
+    db.flush()
+    start = datetime.now(timezone.utc)
+    priorities = list(ApplicationPriority)
+    db.execute(
+        LoanApplication.__table__.insert(),
+        [
+            {
+                "id": uuid.uuid4(),
+                "business_name": f"Business {i}",
+                "business_type": "Retail",
+                "loan_amount": Decimal(rng.randrange(5, 500) * 1000),
+                "loan_purpose": "Working capital",
+                "priority": rng.choice(priorities),
+                "borrower_id": borrower_id,
+                "risk_score": rng.choice([None, round(rng.uniform(0, 100), 1)]),
+                "application_date": start - timedelta(seconds=rng.randrange(10**8)),
+            }
+            for i in range(APPLICATIONS)
+        ],
+    )
+    db.commit()
+
+
+def plan(db):
+    """Query plan of the last statement (the page query)."""
+    rows = (
+        db.connection()
+        .exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + _last_statement["sql"], _last_statement["params"]
+        )
+        .all()
+    )
+    return " / ".join(row[-1] for row in rows)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000, result
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db)
+    admin = AuthPrincipal(
+        id=uuid.uuid4(), email="admin@example.org", role=UserRole.admin, name="Admin"
+    )
+
+    print(
+        f"applications: {APPLICATIONS}, page size: {PAGE_SIZE}, deep page: {DEEP_PAGE}"
+    )
+    print(f"{'sort':28} {'first ms':>9} {'offset ms':>10} {'keyset ms':>10}  plan")
+    for sort in ApplicationSort:
+
+        def fetch(pagination):
+            return get_loan_application_summaries(db, admin, None, pagination, sort)[0]
+
+        first_ms, _ = timed(lambda: fetch(PaginationParams(size=PAGE_SIZE)))
+        offset_ms, offset_rows = timed(
+            lambda: fetch(PaginationParams(page=DEEP_PAGE + 1, size=PAGE_SIZE))
+        )
+        previous = fetch(PaginationParams(page=DEEP_PAGE, size=PAGE_SIZE))
+        cursor = application_cursor(previous[-1], sort)
+        keyset_ms, keyset_rows = timed(
+            lambda: fetch(PaginationParams(size=PAGE_SIZE, cursor=cursor))
+        )
+        assert [row.id for row in keyset_rows] == [row.id for row in offset_rows]
+        keyset_plan = plan(db)
+        ordered = "index-ordered" if "TEMP B-TREE" not in keyset_plan else "SORTS"
+        print(
+            f"{sort.value:28} {first_ms:9.2f} {offset_ms:10.2f} {keyset_ms:10.2f}  "
+            f"{ordered}: {keyset_plan}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
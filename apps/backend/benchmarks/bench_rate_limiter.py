@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request overhead of the rate limiting middleware.
+
+Drives the ASGI app directly (no network, no TestClient) so the numbers
+reflect middleware cost only: a bare app, the app behind the middleware with
+an unmatched route, and the app behind the middleware with a matched rule.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limiter import (  # noqa: E402
+    InMemoryRateLimitBackend,
+    RateLimitMiddleware,
+    RateLimitRule,
+)
+
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "200000"))
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run(app, path: str, iterations: int, distinct_clients: int = 1000) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scopes = [
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "headers": [(b"authorization", f"Bearer token-{i}".encode())],
+            "client": (f"10.0.{i // 256}.{i % 256}", 1234),
+        }
+        for i in range(distinct_clients)
+    ]
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        await app(scopes[i % distinct_clients], receive, send)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+async def main():
+    rules = [
+        RateLimitRule(
+            "login", "10/minute", path="/auth/login", methods=("POST",), exact=True
+        ),
+        RateLimitRule(
+            "apps",
+            "1000000/minute",
+            path="/applications",
+            methods=("GET",),
+            key_by="user",
+        ),
+    ]
+    limited = RateLimitMiddleware(
+        bare_app, rules=rules, backend=InMemoryRateLimitBackend()
+    )
+
+    baseline = await run(bare_app, "/applications", ITERATIONS)
+    unmatched = await run(limited, "/health", ITERATIONS)
+    matched = await run(limited, "/applications", ITERATIONS)
+
+    print(f"iterations:            {ITERATIONS}")
+    print(f"bare app:              {baseline:8.0f} ns/request")
+    overhead = unmatched - baseline
+    print(f"middleware, unmatched: {unmatched:8.0f} ns/request (+{overhead:.0f})")
+    print(
+        f"middleware, matched:   {matched:8.0f} ns/request (+{matched - baseline:.0f})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search against a naive LIKE scan.
+
+Seeds a throwaway SQLite database with applications and team notes, installs
+the FTS5 search index, then times ranked ``search_records`` (top 20) for a
+few queries against a ``LIKE '%term%'`` scan returning every matching note.
+Note text is drawn from a Zipf-distributed vocabulary so common and rare
+terms both occur.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp(prefix="caelo_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import logging  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from models_new import LoanApplication, TeamNote, User, UserRole  # noqa: E402
+from auth_enhanced import AuthPrincipal  # noqa: E402
+from crud_operations import search_records  # noqa: E402
+from search import install_search_index  # noqa: E402
+
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+APPLICATIONS = int(os.getenv("BENCH_APPLICATIONS", "2000"))
+NOTES = int(os.getenv("BENCH_NOTES", "200000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+QUERIES = ("collateral", "guarantor overdraft", "bakery", "refinanc")
+
+DOMAIN_WORDS = (
+    "revenue margin collateral guarantor invoice payroll seasonal inventory "
+    "equipment lease cash flow debt service coverage refinance expansion "
+    "customer supplier contract receivable overdraft deposit review approved "
+    "pending documents missing follow up call borrower owner bakery logistics"
+).split()
+VOCABULARY = DOMAIN_WORDS + [f"term{i}" for i in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def seed(db):
+    rng = random.Random(7)
+    author_id = uuid.uuid4()
+    db.add(
+        User(
+            id=author_id,
+            email="analyst@example.org",
+            password_hash="x",
+            role=UserRole.analyst,
+            name="Analyst",
+        )
+    )
+    db.flush()
+    application_ids = [uuid.uuid4() for _ in range(APPLICATIONS)]
+    db.execute(
+        LoanApplication.__table__.insert(),
+        [
+            {
+                "id": application_id,
+                "business_name": f"Business {i}",
+                "business_type": "Retail",
+                "loan_amount": Decimal(10000 + i),
+                "loan_purpose": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=12)),
+                "borrower_id": author_id,
+            }
+            for i, application_id in enumerate(application_ids)
+        ],
+    )
+    db.execute(
+        TeamNote.__table__.insert(),
+        [
+            {
+                "id": uuid.uuid4(),
+                "application_id": rng.choice(application_ids),
+                "author_id": author_id,
+                "content": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=30)),
+                "is_private": False,
+            }
+            for _ in range(NOTES)
+        ],
+    )
+    db.commit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db)
+    install_search_index(engine)
+
+    analyst = AuthPrincipal(
+        id=uuid.uuid4(),
+        email="analyst@example.org",
+        role=UserRole.analyst,
+        name="Analyst",
+    )
+
+    print(f"applications: {APPLICATIONS}, notes: {NOTES}, rounds: {ROUNDS}")
+    print(f"{'query':22} {'matches':>8} {'like ms':>10} {'search ms':>10}")
+    for query in QUERIES:
+        terms = query.split()
+        like_query = db.query(TeamNote.id).filter(
+            *(TeamNote.content.like(f"%{term}%") for term in terms)
+        )
+        matches = like_query.count()
+        like = timed(lambda: like_query.all())
+        indexed = timed(lambda: search_records(db, query, analyst, limit=20))
+        print(f"{query:22} {matches:8} {like:10.2f} {indexed:10.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-item serialization cost for a page of loan applications.
+
+Compares the previous list_applications path (``from_orm`` per item, then
+FastAPI's ``jsonable_encoder`` and ``json.dumps``) with the single-pass
+``serialization.json_response`` path. Uses transient ORM objects, so no
+database is required.
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./caelo_bench.db")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from models_new import (  # noqa: E402
+    ApplicationPriority,
+    ApplicationStatus,
+    LoanApplication,
+    User,
+    UserRole,
+)
+from schemas_new import LoanApplicationPage, LoanApplicationResponse  # noqa: E402
+from serialization import json_response  # noqa: E402
+
+PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", "100"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "50"))
+
+
+def make_user(role: UserRole, n: int) -> User:
+    now = datetime.now(timezone.utc)
+    return User(
+        id=uuid.uuid4(),
+        email=f"{role.value}{n}@example.org",
+        password_hash="x",
+        role=role,
+        name=f"{role.value.title()} {n}",
+        organization="Community Capital Partners",
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def make_applications(count: int):
+    officer = make_user(UserRole.loan_officer, 0)
+    underwriter = make_user(UserRole.analyst, 0)
+    now = datetime.now(timezone.utc)
+    applications = []
+    for i in range(count):
+        borrower = make_user(UserRole.borrower, i)
+        application = LoanApplication(
+            id=uuid.uuid4(),
+            business_name=f"Business {i}",
+            business_type="Restaurant",
+            loan_amount=Decimal("50000.00") + i,
+            loan_purpose="Equipment purchase and working capital for expansion",
+            status=ApplicationStatus.under_review,
+            priority=ApplicationPriority.medium,
+            borrower_id=borrower.id,
+            loan_officer_id=officer.id,
+            underwriter_id=underwriter.id,
+            risk_score=42.5,
+            application_date=now,
+            created_at=now,
+            updated_at=now,
+        )
+        application.borrower = borrower
+        application.loan_officer = officer
+        application.underwriter = underwriter
+        applications.append(application)
+    return applications
+
+
+def legacy_path(applications) -> bytes:
+    page = {
+        "items": [LoanApplicationResponse.from_orm(app) for app in applications],
+        "total": len(applications),
+        "page": 1,
+        "size": len(applications),
+        "pages": 1,
+    }
+    return json.dumps(jsonable_encoder(page)).encode("utf-8")
+
+
+def fast_path(applications) -> bytes:
+    return json_response(
+        LoanApplicationPage,
+        {
+            "items": applications,
+            "total": len(applications),
+            "page": 1,
+            "size": len(applications),
+            "pages": 1,
+        },
+    ).body
+
+
+def measure(fn, applications) -> float:
+    fn(applications)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(applications)
+    return (time.perf_counter() - start) / (ROUNDS * len(applications)) * 1e6
+
+
+def main():
+    applications = make_applications(PAGE_SIZE)
+    assert (
+        json.loads(legacy_path(applications))["total"]
+        == json.loads(fast_path(applications))["total"]
+    )
+
+    legacy = measure(legacy_path, applications)
+    fast = measure(fast_path, applications)
+    print(f"page size: {PAGE_SIZE}, rounds: {ROUNDS}")
+    print(f"from_orm + jsonable_encoder: {legacy:8.1f} us/item")
+    speedup = legacy / fast
+    print(f"json_response:               {fast:8.1f} us/item ({speedup:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
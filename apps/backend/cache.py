@@ -0,0 +1,128 @@
+"""
+Response Caching for Caelo Backend.
+
+Caches serialized responses per access scope with a TTL. Invalidation bumps
+a per-namespace generation counter that is part of every key, so clearing
+a namespace is O(1) and entries written by a computation that raced with
+an invalidation are never served.
+
+Backends: an in-process LRU (default) and any Redis-compatible client
+(``get``/``set``/``incr``), selected with CACHE_BACKEND / CACHE_REDIS_URL.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Configuration
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv(
+    "CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")
+)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+
+# ===== BACKENDS =====
+
+
+class InMemoryCacheBackend:
+    """LRU map of key -> (value, expiry) held by this process."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+
+class RedisCacheBackend:
+    """Cache entries in Redis, shared by every worker."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self.client.set(key, value, ex=ttl)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+    def get_counter(self, key: str) -> int:
+        value = self.client.get(key)
+        return int(value) if value is not None else 0
+
+
+def get_cache_backend():
+    """Build the configured cache backend."""
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend.from_url(CACHE_REDIS_URL)
+    return InMemoryCacheBackend()
+
+
+# ===== RESPONSE CACHE =====
+
+
+class ResponseCache:
+    """Serialized responses for one namespace, keyed by access scope."""
+
+    def __init__(self, backend, namespace: str, ttl: int):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self._generation_key = f"caelo:cache:{namespace}:generation"
+
+    def _key(self, generation: int, scope: str) -> str:
+        return f"caelo:cache:{self.namespace}:{generation}:{scope}"
+
+    def get(self, scope: str) -> Optional[bytes]:
+        generation = self.backend.get_counter(self._generation_key)
+        return self.backend.get(self._key(generation, scope))
+
+    def get_or_set(self, scope: str, compute: Callable[[], bytes]) -> bytes:
+        """Return the cached value for ``scope``, computing and storing it on a miss."""
+        generation = self.backend.get_counter(self._generation_key)
+        key = self._key(generation, scope)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            # Stored under the generation read before computing: if an
+            # invalidation happened meanwhile, this entry is never read
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate(self, *args, **kwargs):
+        """Drop every entry in the namespace (accepts and ignores event arguments)."""
+        self.backend.incr(self._generation_key)
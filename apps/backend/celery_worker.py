@@ -0,0 +1,14 @@
+"""
+Celery Worker for Caelo Backend.
+
+Entry point for running background jobs on Celery (``JOBS_BACKEND=celery``)::
+
+    celery -A celery_worker worker --loglevel=info
+"""
+
+from jobs import CeleryJobBackend, set_job_backend
+import tasks  # noqa: F401 - registers the tasks
+
+backend = CeleryJobBackend()
+set_job_backend(backend)
+app = backend.app
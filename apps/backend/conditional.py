@@ -0,0 +1,46 @@
+"""
+Conditional GET helpers for Caelo Backend.
+
+Routes compute a strong ETag from a cheap version fingerprint (timestamps
+and row counts fetched in one query) before loading anything else, and
+answer ``If-None-Match`` hits with an empty 304.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+
+# Responses vary per caller, so shared caches must not store them, and
+# clients must revalidate on every use
+CACHE_CONTROL = "private, no-cache"
+
+# For content addressed by hash, which never changes under its URL
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from version fingerprint parts."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an ``If-None-Match`` header value against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_headers(etag: str, cache_control: str = CACHE_CONTROL) -> Dict[str, str]:
+    """Validator headers attached to full responses."""
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = CACHE_CONTROL) -> Response:
+    """Empty 304 response for a matching validator."""
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
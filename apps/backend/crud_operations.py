@@ -5,28 +5,49 @@ Comprehensive Create, Read, Update, Delete operations for all entities
 with proper error handling, validation, and security checks.
 """
 
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_, desc, asc
+from typing import List, Optional, Dict, Any, Tuple, Callable
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import (
+    func, and_, or_, desc, asc, select, cast, literal, null, tuple_, union_all, String,
+    case, insert, update, delete, exists
+)
 from fastapi import HTTPException, status
+import enum
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
 
 from models_new import (
     User, LoanApplication, BusinessMetrics, Transaction, TeamNote,
-    Message, Document, ApplicationStatusHistory, SystemSettings,
-    UserRole, ApplicationStatus, ApplicationPriority, TransactionType
+    Message, MessageReadState, MessageReceipt, Document, DocumentUpload, StoredBlob, DocumentAnalysisJob,
+    ApplicationStatusHistory, ApplicationMetrics, SystemSettings,
+    UserRole, ApplicationStatus, ApplicationPriority, TransactionType, DocumentType,
+    AnalysisJobStatus
 )
 from schemas_new import (
     LoanApplicationCreate, LoanApplicationUpdate, TransactionCreate,
     TeamNoteCreate, MessageCreate, PaginationParams, ApplicationFilters,
-    DashboardStats
+    DashboardStats, BatchSection, SearchKind, ApplicationSort, StatusTransition,
+    TransitionOutcome, DocumentUploadCreate
+)
+from auth_enhanced import check_application_access, revoke_user_tokens, Principal
+from search import search_clauses
+from keyset import SortKey, order_by_clauses, keyset_predicate, encode_cursor, decode_cursor
+from uploads import size_limit, blob_key, place_blob, remove_file, storage_path
+from analysis import (
+    ANALYSIS_CRASH_ERROR, ANALYSIS_MAX_ATTEMPTS, ANALYSIS_LEASE_SECONDS, ANOMALY_Z_THRESHOLD,
+    retry_delay, robust_z_scores
 )
-from auth_enhanced import check_application_access
 
 
 # ===== USER CRUD OPERATIONS =====
 
+# User fields embedded in stateless claims tokens
+TOKEN_CLAIM_FIELDS = {"email", "role", "name", "organization", "is_active", "password_hash"}
+
+
 def get_user(db: Session, user_id: uuid.UUID) -> Optional[User]:
     """Get a user by ID."""
     return db.query(User).filter(User.id == user_id).first()
@@ -61,10 +82,17 @@ def update_user(
     if not user:
         return None
     
+    claims_changed = False
     for field, value in update_data.items():
         if hasattr(user, field):
+            if field in TOKEN_CLAIM_FIELDS and getattr(user, field) != value:
+                claims_changed = True
             setattr(user, field, value)
     
+    # Tokens carrying the old role/organization must stop authorizing
+    if claims_changed:
+        revoke_user_tokens(db, user)
+    
     user.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(user)
@@ -78,6 +106,7 @@ def deactivate_user(db: Session, user_id: uuid.UUID) -> Optional[User]:
         return None
     
     user.is_active = False
+    revoke_user_tokens(db, user)
     user.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(user)
@@ -86,6 +115,52 @@ def deactivate_user(db: Session, user_id: uuid.UUID) -> Optional[User]:
 
 # ===== LOAN APPLICATION CRUD OPERATIONS =====
 
+# Callbacks run with the application id after an application is created,
+# updated or deleted (e.g. to invalidate cached dashboard stats)
+application_change_listeners: List[Callable[[uuid.UUID], None]] = []
+
+
+def notify_application_change(application_id: uuid.UUID):
+    """Run the registered application change listeners."""
+    for listener in application_change_listeners:
+        listener(application_id)
+
+
+# Called with (event_type, details) after writes users are notified about:
+# "application_created", "status_changed" or "assigned". ``details`` carries
+# what's needed to decide who may see the event without another query.
+application_event_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+
+def notify_application_event(
+    event_type: str,
+    application: Any,
+    actor_id: uuid.UUID,
+    status: Optional[ApplicationStatus] = None,
+    old_status: Optional[ApplicationStatus] = None
+):
+    """Run the registered application event listeners.
+
+    ``application`` is a LoanApplication or any row with the same columns;
+    ``status`` overrides its status when the row predates the change.
+    """
+    if not application_event_listeners:
+        return
+    details = {
+        "application_id": application.id,
+        "business_name": application.business_name,
+        "status": status or application.status,
+        "old_status": old_status,
+        "borrower_id": application.borrower_id,
+        "loan_officer_id": application.loan_officer_id,
+        "underwriter_id": application.underwriter_id,
+        "actor_id": actor_id,
+        "occurred_at": datetime.now(timezone.utc),
+    }
+    for listener in application_event_listeners:
+        listener(event_type, details)
+
+
 def create_loan_application(
     db: Session,
     application_data: LoanApplicationCreate,
@@ -105,8 +180,7 @@ def create_loan_application(
     )
     
     db.add(application)
-    db.commit()
-    db.refresh(application)
+    db.flush()  # History references the application row
     
     # Create status history entry
     create_status_history(
@@ -118,13 +192,18 @@ def create_loan_application(
         reason="Application submitted"
     )
     
+    db.commit()
+    db.refresh(application)
+    
+    notify_application_change(application.id)
+    notify_application_event("application_created", application, borrower_id)
     return application
 
 
 def get_loan_application(
     db: Session, 
     application_id: uuid.UUID,
-    current_user: User,
+    current_user: Principal,
     load_relationships: bool = True
 ) -> Optional[LoanApplication]:
     """Get a loan application by ID with access control."""
@@ -157,28 +236,8 @@ def get_loan_application(
     return application
 
 
-def get_loan_applications(
-    db: Session,
-    current_user: User,
-    filters: Optional[ApplicationFilters] = None,
-    pagination: Optional[PaginationParams] = None
-) -> Tuple[List[LoanApplication], int]:
-    """Get loan applications with filtering, pagination, and access control."""
-    query = db.query(LoanApplication).options(
-        joinedload(LoanApplication.borrower),
-        joinedload(LoanApplication.loan_officer),
-        joinedload(LoanApplication.underwriter)
-    )
-    
-    # Apply access control filters
-    access_filter = get_user_accessible_applications_filter(current_user)
-    if access_filter is not None:
-        query = query.filter(access_filter)
-    elif access_filter is False:
-        # No access - return empty result
-        return [], 0
-    
-    # Apply user filters
+def apply_application_filters(query, filters: Optional[ApplicationFilters]):
+    """Apply user-supplied ApplicationFilters to a LoanApplication query."""
     if filters:
         if filters.status:
             query = query.filter(LoanApplication.status == filters.status)
@@ -198,34 +257,228 @@ def get_loan_applications(
             query = query.filter(LoanApplication.loan_amount >= filters.min_amount)
         if filters.max_amount:
             query = query.filter(LoanApplication.loan_amount <= filters.max_amount)
+    return query
+
+
+# Urgency order of priorities; mirrors the LoanApplication.priority_rank column
+PRIORITY_RANKS = {
+    ApplicationPriority.low: 0,
+    ApplicationPriority.medium: 1,
+    ApplicationPriority.high: 2,
+    ApplicationPriority.urgent: 3,
+}
+
+
+def _sort_key(column, descending: bool, decode, nullable: bool = False) -> SortKey:
+    return SortKey(column, descending, lambda row: getattr(row, column.key), decode, nullable)
+
+
+_PRIORITY = SortKey(
+    LoanApplication.priority_rank, True,
+    lambda row: PRIORITY_RANKS.get(row.priority, 1), int
+)
+_AGE = _sort_key(LoanApplication.application_date, False, datetime.fromisoformat)
+
+# Whitelisted sorts; each matches one composite index on loan_applications and
+# ends in id, in the direction of the previous key, so cursors are stable
+APPLICATION_SORTS = {
+    ApplicationSort.newest: (
+        _sort_key(LoanApplication.application_date, True, datetime.fromisoformat),
+        _sort_key(LoanApplication.id, True, uuid.UUID),
+    ),
+    ApplicationSort.oldest: (_AGE, _sort_key(LoanApplication.id, False, uuid.UUID)),
+    ApplicationSort.priority_risk: (
+        _PRIORITY,
+        _sort_key(LoanApplication.risk_score, True, float, nullable=True),
+        _sort_key(LoanApplication.id, True, uuid.UUID),
+    ),
+    ApplicationSort.priority_amount: (
+        _PRIORITY,
+        _sort_key(LoanApplication.loan_amount, True, Decimal),
+        _sort_key(LoanApplication.id, True, uuid.UUID),
+    ),
+    ApplicationSort.priority_age: (_PRIORITY, _AGE, _sort_key(LoanApplication.id, False, uuid.UUID)),
+    ApplicationSort.risk: (
+        _sort_key(LoanApplication.risk_score, True, float, nullable=True),
+        _sort_key(LoanApplication.id, True, uuid.UUID),
+    ),
+    ApplicationSort.amount: (
+        _sort_key(LoanApplication.loan_amount, True, Decimal),
+        _sort_key(LoanApplication.id, True, uuid.UUID),
+    ),
+}
+
+
+def apply_application_sort(
+    query,
+    sort: ApplicationSort,
+    pagination: Optional[PaginationParams]
+):
+    """Order a LoanApplication query by ``sort`` and apply the page window.
+
+    With a cursor the page starts strictly after the cursor's row (keyset);
+    otherwise ``page`` is applied as an offset.
+    """
+    keys = APPLICATION_SORTS[sort]
+    query = query.order_by(*order_by_clauses(keys))
+    if not pagination:
+        return query
+    
+    if pagination.cursor:
+        try:
+            values = decode_cursor(pagination.cursor, sort.value, keys)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor for this sort order"
+            )
+        return query.filter(keyset_predicate(keys, values)).limit(pagination.size)
+    
+    return query.offset((pagination.page - 1) * pagination.size).limit(pagination.size)
+
+
+def application_cursor(row: Any, sort: ApplicationSort) -> str:
+    """Cursor for the page following ``row`` (an application or summary row)."""
+    return encode_cursor(sort.value, APPLICATION_SORTS[sort], row)
+
+
+def get_loan_applications(
+    db: Session,
+    current_user: Principal,
+    filters: Optional[ApplicationFilters] = None,
+    pagination: Optional[PaginationParams] = None,
+    sort: ApplicationSort = ApplicationSort.newest
+) -> Tuple[List[LoanApplication], int]:
+    """Get loan applications with filtering, pagination, and access control."""
+    query = db.query(LoanApplication).options(
+        joinedload(LoanApplication.borrower),
+        joinedload(LoanApplication.loan_officer),
+        joinedload(LoanApplication.underwriter)
+    )
+    
+    # Apply access control filters
+    access_filter = get_user_accessible_applications_filter(current_user)
+    if access_filter is False:
+        # No access - return empty result
+        return [], 0
+    elif access_filter is not None:
+        query = query.filter(access_filter)
+    
+    # Apply user filters
+    query = apply_application_filters(query, filters)
     
     # Get total count
     total = query.count()
     
-    # Apply pagination
-    if pagination:
-        query = query.offset((pagination.page - 1) * pagination.size).limit(pagination.size)
-    
-    # Order by application date (newest first)
-    query = query.order_by(desc(LoanApplication.application_date))
+    # Apply sort order and pagination
+    query = apply_application_sort(query, sort, pagination)
     
     applications = query.all()
     return applications, total
 
 
+# Columns selected for list views; keep in sync with LoanApplicationSummary
+SUMMARY_COLUMNS = (
+    LoanApplication.id,
+    LoanApplication.business_name,
+    LoanApplication.business_type,
+    LoanApplication.loan_amount,
+    LoanApplication.status,
+    LoanApplication.priority,
+    LoanApplication.risk_score,
+    LoanApplication.recommendation,
+    LoanApplication.borrower_id,
+    LoanApplication.loan_officer_id,
+    LoanApplication.underwriter_id,
+    LoanApplication.application_date,
+    LoanApplication.decision_date,
+    LoanApplication.updated_at,
+)
+
+
+def get_loan_application_summaries(
+    db: Session,
+    current_user: Principal,
+    filters: Optional[ApplicationFilters] = None,
+    pagination: Optional[PaginationParams] = None,
+    sort: ApplicationSort = ApplicationSort.newest
+) -> Tuple[List[Any], int]:
+    """Get list-view rows for loan applications.
+
+    Selects only the summary columns plus the borrower's name through a
+    join, never loading ORM entities or child collections. The count runs
+    on the filtered table alone, without the join.
+    """
+    base = db.query(LoanApplication)
+    
+    access_filter = get_user_accessible_applications_filter(current_user)
+    if access_filter is False:
+        return [], 0
+    elif access_filter is not None:
+        base = base.filter(access_filter)
+    
+    base = apply_application_filters(base, filters)
+    total = base.with_entities(func.count(LoanApplication.id)).scalar()
+    
+    query = base.with_entities(
+        *SUMMARY_COLUMNS,
+        User.name.label("borrower_name")
+    ).join(
+        User, User.id == LoanApplication.borrower_id
+    )
+    query = apply_application_sort(query, sort, pagination)
+    
+    return query.all(), total
+
+
+# Allowed status transitions, for single and bulk updates alike
+STATUS_TRANSITIONS = {
+    ApplicationStatus.pending: {
+        ApplicationStatus.under_review, ApplicationStatus.approved, ApplicationStatus.rejected
+    },
+    ApplicationStatus.under_review: {
+        ApplicationStatus.pending, ApplicationStatus.approved, ApplicationStatus.rejected
+    },
+    ApplicationStatus.approved: {ApplicationStatus.disbursed, ApplicationStatus.under_review},
+    ApplicationStatus.rejected: {ApplicationStatus.under_review},
+    ApplicationStatus.disbursed: set(),
+}
+
+# Statuses that record a decision date
+DECISION_STATUSES = (ApplicationStatus.approved, ApplicationStatus.rejected)
+
+
+def status_transition_error(
+    old_status: ApplicationStatus,
+    new_status: ApplicationStatus
+) -> Optional[str]:
+    """Why a status change isn't allowed, or None if it is (or is a no-op)."""
+    if new_status == old_status or new_status in STATUS_TRANSITIONS.get(old_status, ()):
+        return None
+    return f"Cannot move from {old_status.value} to {new_status.value}"
+
+
 def update_loan_application(
     db: Session,
     application_id: uuid.UUID,
     update_data: LoanApplicationUpdate,
-    current_user: User
+    current_user: Principal
 ) -> Optional[LoanApplication]:
     """Update a loan application."""
     application = get_loan_application(db, application_id, current_user, load_relationships=False)
     if not application:
         return None
     
-    # Track status changes for history
+    # Track status and assignment changes for history and events
     old_status = application.status
+    if update_data.status:
+        error = status_transition_error(old_status, update_data.status)
+        if error:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=error
+            )
+    old_assignees = (application.loan_officer_id, application.underwriter_id)
     
     # Apply updates
     update_dict = update_data.dict(exclude_unset=True)
@@ -241,9 +494,6 @@ def update_loan_application(
     ]:
         application.decision_date = datetime.now(timezone.utc)
     
-    db.commit()
-    db.refresh(application)
-    
     # Create status history if status changed
     if update_data.status and update_data.status != old_status:
         create_status_history(
@@ -255,13 +505,120 @@ def update_loan_application(
             reason=f"Status updated by {current_user.name}"
         )
     
+    # New assignees start following the application's messages
+    if (application.loan_officer_id, application.underwriter_id) != old_assignees:
+        ensure_read_states(db, application.id, [application.loan_officer_id, application.underwriter_id])
+    
+    db.commit()
+    db.refresh(application)
+    
+    notify_application_change(application.id)
+    if application.status != old_status:
+        notify_application_event(
+            "status_changed", application, current_user.id, old_status=old_status
+        )
+    if (application.loan_officer_id, application.underwriter_id) != old_assignees:
+        notify_application_event("assigned", application, current_user.id)
     return application
 
 
+def bulk_transition_application_status(
+    db: Session,
+    transitions: List[StatusTransition],
+    current_user: Principal,
+    reason: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply many status transitions in one transaction.
+
+    Current statuses are read (and locked where supported) with one query,
+    every transition is validated against STATUS_TRANSITIONS and the
+    caller's access, then all valid ones are applied with a single UPDATE
+    and their history rows inserted with one executemany. Invalid
+    transitions are reported per application and don't block the rest.
+    """
+    ids = [transition.application_id for transition in transitions]
+    rows = {
+        row.id: row
+        for row in db.query(
+            LoanApplication.id, LoanApplication.status, LoanApplication.business_name,
+            LoanApplication.borrower_id, LoanApplication.loan_officer_id,
+            LoanApplication.underwriter_id
+        ).filter(LoanApplication.id.in_(ids)).with_for_update()
+    }
+    
+    results, changes = [], []
+    for transition in transitions:
+        row = rows.get(transition.application_id)
+        result = {"application_id": transition.application_id, "new_status": transition.status}
+        if row is None:
+            result.update(outcome=TransitionOutcome.not_found, new_status=None)
+        elif not check_application_access(current_user, row.borrower_id):
+            result.update(outcome=TransitionOutcome.forbidden, new_status=None)
+        elif transition.status == row.status:
+            result.update(outcome=TransitionOutcome.unchanged, old_status=row.status)
+        else:
+            error = status_transition_error(row.status, transition.status)
+            if error:
+                result.update(
+                    outcome=TransitionOutcome.invalid_transition, old_status=row.status, detail=error
+                )
+            else:
+                result.update(outcome=TransitionOutcome.updated, old_status=row.status)
+                changes.append((transition, row.status))
+        results.append(result)
+    
+    if not changes:
+        db.rollback()  # Release row locks
+        return results
+    
+    now = datetime.now(timezone.utc)
+    changed_ids = [transition.application_id for transition, _ in changes]
+    decided_ids = [
+        transition.application_id for transition, _ in changes
+        if transition.status in DECISION_STATUSES
+    ]
+    values = {
+        "status": case(
+            {transition.application_id: transition.status for transition, _ in changes},
+            value=LoanApplication.id
+        ),
+        "updated_at": now,
+    }
+    if decided_ids:
+        values["decision_date"] = case(
+            (LoanApplication.id.in_(decided_ids), now),
+            else_=LoanApplication.decision_date
+        )
+    db.execute(
+        update(LoanApplication).where(LoanApplication.id.in_(changed_ids)).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(insert(ApplicationStatusHistory), [
+        {
+            "id": uuid.uuid4(),
+            "application_id": transition.application_id,
+            "user_id": current_user.id,
+            "old_status": old_status,
+            "new_status": transition.status,
+            "reason": transition.reason or reason or f"Status updated by {current_user.name}",
+        }
+        for transition, old_status in changes
+    ])
+    db.commit()
+    
+    for transition, old_status in changes:
+        notify_application_change(transition.application_id)
+        notify_application_event(
+            "status_changed", rows[transition.application_id], current_user.id,
+            status=transition.status, old_status=old_status
+        )
+    return results
+
+
 def delete_loan_application(
     db: Session,
     application_id: uuid.UUID,
-    current_user: User
+    current_user: Principal
 ) -> bool:
     """Delete a loan application (admin only)."""
     if current_user.role != UserRole.admin:
@@ -276,15 +633,193 @@ def delete_loan_application(
     
     db.delete(application)
     db.commit()
+    notify_application_change(application_id)
     return True
 
 
+def get_application_sections_batch(
+    db: Session,
+    application_ids: List[uuid.UUID],
+    sections: List[BatchSection],
+    current_user: Principal
+) -> Tuple[List[Dict[str, Any]], List[uuid.UUID], List[uuid.UUID]]:
+    """Load several applications' sections with one query per section.
+
+    Access is resolved once from a single summary query over all ids; each
+    requested child section is then loaded for every accessible id with one
+    ``IN`` query. Returns (items, not_found_ids, forbidden_ids), with items
+    in request order.
+    """
+    requested_ids = list(dict.fromkeys(application_ids))
+    
+    rows = db.query(
+        *SUMMARY_COLUMNS,
+        User.name.label("borrower_name")
+    ).join(
+        User, User.id == LoanApplication.borrower_id
+    ).filter(LoanApplication.id.in_(requested_ids)).all()
+    rows_by_id = {row.id: row for row in rows}
+    
+    allowed, not_found, forbidden = [], [], []
+    for application_id in requested_ids:
+        row = rows_by_id.get(application_id)
+        if row is None:
+            not_found.append(application_id)
+        elif check_application_access(current_user, row.borrower_id):
+            allowed.append(application_id)
+        else:
+            forbidden.append(application_id)
+    
+    items = {application_id: {"id": application_id} for application_id in allowed}
+    if not allowed:
+        return [], not_found, forbidden
+    
+    if BatchSection.summary in sections:
+        for application_id in allowed:
+            items[application_id]["summary"] = rows_by_id[application_id]
+    
+    if BatchSection.transactions in sections:
+        for item in items.values():
+            item["transactions"] = []
+        transactions = db.query(Transaction).filter(
+            Transaction.application_id.in_(allowed)
+        ).order_by(desc(Transaction.transaction_date)).all()
+        for transaction in transactions:
+            items[transaction.application_id]["transactions"].append(transaction)
+    
+    if BatchSection.notes in sections:
+        for item in items.values():
+            item["notes"] = []
+        query = db.query(TeamNote).options(
+            joinedload(TeamNote.author)
+        ).filter(TeamNote.application_id.in_(allowed))
+        # Borrowers can't see private notes
+        if current_user.role == UserRole.borrower:
+            query = query.filter(TeamNote.is_private == False)
+        for note in query.order_by(desc(TeamNote.created_at)).all():
+            items[note.application_id]["notes"].append(note)
+    
+    if BatchSection.messages in sections:
+        for item in items.values():
+            item["messages"] = []
+        messages = db.query(Message).options(
+            joinedload(Message.sender)
+        ).filter(
+            Message.application_id.in_(allowed)
+        ).order_by(asc(Message.created_at)).all()
+        for message in messages:
+            items[message.application_id]["messages"].append(message)
+    
+    return list(items.values()), not_found, forbidden
+
+
+def _child_versions(model, *timestamps) -> List[Any]:
+    """Row count and latest timestamps of an application's child rows."""
+    correlated = model.application_id == LoanApplication.id
+    columns = [
+        select(func.count(model.id)).where(correlated).correlate(LoanApplication).scalar_subquery()
+    ]
+    for timestamp in timestamps:
+        columns.append(
+            select(func.max(timestamp)).where(correlated).correlate(LoanApplication).scalar_subquery()
+        )
+    return columns
+
+
+def _application_version_columns(section: str) -> List[Any]:
+    transactions = _child_versions(
+        Transaction, func.coalesce(Transaction.updated_at, Transaction.created_at)
+    )
+    notes = _child_versions(
+        TeamNote, func.coalesce(TeamNote.updated_at, TeamNote.created_at)
+    )
+    messages = _child_versions(Message, Message.created_at, Message.read_at)
+    
+    if section == "transactions":
+        return transactions
+    if section == "notes":
+        return notes
+    if section == "messages":
+        return messages
+    
+    # Full detail view: the application, its people and every child collection
+    people = select(
+        func.max(func.coalesce(User.updated_at, User.created_at))
+    ).where(or_(
+        User.id == LoanApplication.borrower_id,
+        User.id == LoanApplication.loan_officer_id,
+        User.id == LoanApplication.underwriter_id
+    )).correlate(LoanApplication).scalar_subquery()
+    
+    return [
+        LoanApplication.created_at,
+        LoanApplication.updated_at,
+        people,
+        *_child_versions(
+            BusinessMetrics, func.coalesce(BusinessMetrics.updated_at, BusinessMetrics.created_at)
+        ),
+        *_child_versions(Document, func.coalesce(Document.updated_at, Document.uploaded_at)),
+        *transactions,
+        *notes,
+        *messages,
+    ]
+
+
+def get_application_version(
+    db: Session,
+    application_id: uuid.UUID,
+    current_user: Principal,
+    section: str = "detail"
+) -> Optional[Tuple[Any, ...]]:
+    """Get a version fingerprint for an application or one of its sub-resources.
+
+    One query returns the access-check columns plus row counts and latest
+    timestamps for ``section`` ("detail", "transactions", "notes" or
+    "messages"), so callers can validate ETags before loading anything.
+    Returns None if the application does not exist.
+    """
+    row = db.query(
+        LoanApplication.borrower_id,
+        *_application_version_columns(section)
+    ).filter(LoanApplication.id == application_id).first()
+    
+    if row is None:
+        return None
+    
+    if not check_application_access(current_user, row[0]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this application"
+        )
+    
+    return tuple(row[1:])
+
+
 # ===== TRANSACTION CRUD OPERATIONS =====
 
+# Called with (event, transaction, actor_id) after a transaction write;
+# event is "created". Listeners run on the request path, so keep them cheap.
+transaction_event_listeners: List[Callable[[str, Transaction, uuid.UUID], None]] = []
+
+
+def notify_transaction_event(event: str, transaction: Transaction, actor_id: uuid.UUID):
+    """Run the registered transaction event listeners."""
+    for listener in transaction_event_listeners:
+        listener(event, transaction, actor_id)
+
+
+def flag_transaction_anomaly(transaction: Transaction):
+    """Simple anomaly detection (can be enhanced)."""
+    if abs(float(transaction.amount)) > 10000:  # Large amounts
+        transaction.anomaly_score = 0.8
+        transaction.is_anomaly = True
+        transaction.anomaly_explanation = "Large transaction amount flagged for review"
+
+
 def create_transaction(
     db: Session,
     transaction_data: TransactionCreate,
-    current_user: User
+    current_user: Principal
 ) -> Transaction:
     """Create a new transaction."""
     # Verify access to application
@@ -307,22 +842,19 @@ def create_transaction(
         reference_number=transaction_data.reference_number
     )
     
-    # Simple anomaly detection (can be enhanced)
-    if abs(float(transaction.amount)) > 10000:  # Large amounts
-        transaction.anomaly_score = 0.8
-        transaction.is_anomaly = True
-        transaction.anomaly_explanation = "Large transaction amount flagged for review"
-    
+    flag_transaction_anomaly(transaction)
     db.add(transaction)
     db.commit()
     db.refresh(transaction)
+    
+    notify_transaction_event("created", transaction, current_user.id)
     return transaction
 
 
 def get_application_transactions(
     db: Session,
     application_id: uuid.UUID,
-    current_user: User
+    current_user: Principal
 ) -> List[Transaction]:
     """Get all transactions for an application."""
     # Verify access
@@ -338,6 +870,97 @@ def get_application_transactions(
     ).order_by(desc(Transaction.transaction_date)).all()
 
 
+def _anomaly_values(amount: Decimal, z_score: Optional[float], kind: TransactionType) -> Tuple:
+    """(anomaly_score, is_anomaly, anomaly_explanation) for one transaction."""
+    score, reasons = None, []
+    if abs(float(amount)) > 10000:
+        score = 0.8
+        reasons.append("Large transaction amount flagged for review")
+    if z_score is not None:
+        score = max(score or 0.0, round(min(abs(z_score) / (2 * ANOMALY_Z_THRESHOLD), 1.0), 3))
+        if abs(z_score) > ANOMALY_Z_THRESHOLD:
+            reasons.append(
+                f"Amount is unusual for this application's {kind.value} ({z_score:+.1f} robust z-score)"
+            )
+    return score, bool(reasons), "; ".join(reasons) or None
+
+
+def score_transaction_anomalies(db: Session, application_id: uuid.UUID) -> int:
+    """Rescore every transaction of an application against the baseline of
+    its other transactions of the same type; returns how many changed.
+
+    Runs as a background job: the baseline shifts with each new
+    transaction, so the whole application is rescored, which is too slow
+    for the request path on long statements.
+    """
+    rows = db.query(
+        Transaction.id, Transaction.type, Transaction.amount,
+        Transaction.anomaly_score, Transaction.is_anomaly, Transaction.anomaly_explanation
+    ).filter(Transaction.application_id == application_id).all()
+
+    by_type: Dict[TransactionType, List[Any]] = {}
+    for row in rows:
+        by_type.setdefault(row.type, []).append(row)
+
+    changes = []
+    for kind, group in by_type.items():
+        z_scores = robust_z_scores([float(row.amount) for row in group])
+        for row, z_score in zip(group, z_scores):
+            values = _anomaly_values(row.amount, z_score, kind)
+            if values != (row.anomaly_score, row.is_anomaly, row.anomaly_explanation):
+                score, flagged, explanation = values
+                changes.append({
+                    "id": row.id, "anomaly_score": score,
+                    "is_anomaly": flagged, "anomaly_explanation": explanation
+                })
+    if changes:
+        db.execute(update(Transaction), changes)
+        db.commit()
+    return len(changes)
+
+
+def recompute_cash_flow_metrics(db: Session, application_id: uuid.UUID) -> bool:
+    """Refresh an application's cash flow metrics from its transactions.
+
+    Returns False, leaving the metrics alone, when the application has no
+    transactions.
+    """
+    inflow, outflow, first, last = db.query(
+        func.sum(case((Transaction.type == TransactionType.inflow, Transaction.amount), else_=0)),
+        func.sum(case((Transaction.type == TransactionType.outflow, Transaction.amount), else_=0)),
+        func.min(Transaction.transaction_date),
+        func.max(Transaction.transaction_date)
+    ).filter(Transaction.application_id == application_id).one()
+    if first is None:
+        return False
+
+    inflow, outflow = Decimal(inflow or 0), Decimal(outflow or 0)
+    days = (last.date() - first.date()).days + 1
+    cent = Decimal("0.01")
+    values = {
+        "total_inflow": inflow.quantize(cent),
+        "total_outflow": outflow.quantize(cent),
+        "avg_daily_inflow": (inflow / days).quantize(cent),
+        "avg_daily_outflow": (outflow / days).quantize(cent),
+    }
+
+    def update_metrics():
+        return db.execute(
+            update(BusinessMetrics).where(BusinessMetrics.application_id == application_id).values(**values),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+    if not update_metrics():
+        try:
+            with db.begin_nested():
+                db.add(BusinessMetrics(id=uuid.uuid4(), application_id=application_id, **values))
+        except IntegrityError:
+            # Created concurrently; update that row instead
+            update_metrics()
+    db.commit()
+    return True
+
+
 # ===== TEAM NOTES CRUD OPERATIONS =====
 
 def create_team_note(
@@ -363,7 +986,7 @@ def create_team_note(
 def get_application_team_notes(
     db: Session,
     application_id: uuid.UUID,
-    current_user: User
+    current_user: Principal
 ) -> List[TeamNote]:
     """Get team notes for an application."""
     # Verify access
@@ -387,32 +1010,121 @@ def get_application_team_notes(
 
 # ===== MESSAGE CRUD OPERATIONS =====
 
+# Called after a message write with (event, message, actor_id); event is
+# "created" or "read". Listeners run on the request path, so keep them cheap.
+message_event_listeners: List[Callable[[str, Message, uuid.UUID], None]] = []
+
+
+def notify_message_event(event: str, message: Message, actor_id: uuid.UUID):
+    """Run the registered message event listeners."""
+    for listener in message_event_listeners:
+        listener(event, message, actor_id)
+
+
+def ensure_read_states(db: Session, application_id: uuid.UUID, user_ids: List[Optional[uuid.UUID]]):
+    """Create missing read states for ``user_ids`` on an application.
+
+    A new state starts with every message from others unread, counted with
+    one grouped query. Nothing is committed.
+    """
+    wanted = {user_id for user_id in user_ids if user_id is not None}
+    existing = {
+        user_id for (user_id,) in db.query(MessageReadState.user_id).filter(
+            MessageReadState.application_id == application_id,
+            MessageReadState.user_id.in_(wanted)
+        )
+    }
+    missing = wanted - existing
+    if not missing:
+        return
+    
+    sent = dict(
+        db.query(Message.sender_id, func.count(Message.id))
+        .filter(Message.application_id == application_id)
+        .group_by(Message.sender_id)
+        .all()
+    )
+    total = sum(sent.values())
+    # A concurrent first message or read may create the same rows; keep theirs
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    db.execute(dialect_insert(MessageReadState).on_conflict_do_nothing(
+        index_elements=[MessageReadState.application_id, MessageReadState.user_id]
+    ), [
+        {"application_id": application_id, "user_id": user_id, "unread_count": total - sent.get(user_id, 0)}
+        for user_id in missing
+    ])
+
+
 def create_message(
     db: Session,
     message_data: MessageCreate,
     sender_id: uuid.UUID
 ) -> Message:
-    """Create a new message."""
+    """Create a new message.
+
+    The borrower's and assigned staff's unread counters are bumped with one
+    UPDATE, which also moves the sender's read marker to their own message.
+    """
+    participants = db.query(
+        LoanApplication.borrower_id, LoanApplication.loan_officer_id, LoanApplication.underwriter_id
+    ).filter(LoanApplication.id == message_data.application_id).first()
+    if not participants:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan application not found"
+        )
+    ensure_read_states(db, message_data.application_id, [*participants, sender_id])
+    
     message = Message(
         id=uuid.uuid4(),
         application_id=message_data.application_id,
         sender_id=sender_id,
         content=message_data.content,
-        is_from_lender=message_data.is_from_lender
+        is_from_lender=message_data.is_from_lender,
+        created_at=datetime.now(timezone.utc)  # Known here so it can be the sender's marker
     )
-    
     db.add(message)
+    db.flush()
+    
+    is_sender = MessageReadState.user_id == sender_id
+    db.execute(
+        update(MessageReadState)
+        .where(MessageReadState.application_id == message.application_id)
+        .values(
+            unread_count=case((is_sender, 0), else_=MessageReadState.unread_count + 1),
+            last_read_message_id=case(
+                (is_sender, literal(message.id, MessageReadState.last_read_message_id.type)),
+                else_=MessageReadState.last_read_message_id
+            ),
+            last_read_at=case(
+                (is_sender, literal(message.created_at, MessageReadState.last_read_at.type)),
+                else_=MessageReadState.last_read_at
+            )
+        ),
+        execution_options={"synchronize_session": False}
+    )
     db.commit()
     db.refresh(message)
+    
+    notify_message_event("created", message, sender_id)
     return message
 
 
 def get_application_messages(
     db: Session,
     application_id: uuid.UUID,
-    current_user: User
+    current_user: Principal,
+    since: Optional[datetime] = None,
+    after_id: Optional[uuid.UUID] = None,
+    limit: Optional[int] = None
 ) -> List[Message]:
-    """Get messages for an application."""
+    """Get messages for an application in (created_at, id) order.
+
+    For incremental sync pass the last message seen: ``since`` (its
+    created_at) together with ``after_id`` is a pure keyset range on the
+    (application_id, created_at, id) index. ``after_id`` alone looks the
+    message up first; ``since`` alone returns messages created after it.
+    """
     # Verify access
     application = get_loan_application(db, application_id, current_user, load_relationships=False)
     if not application:
@@ -421,38 +1133,911 @@ def get_application_messages(
             detail="Loan application not found"
         )
     
-    return db.query(Message).options(
+    query = db.query(Message).options(
         joinedload(Message.sender)
     ).filter(
         Message.application_id == application_id
-    ).order_by(asc(Message.created_at)).all()
+    )
+    
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc)
+    if after_id is not None and since is None:
+        since = db.query(Message.created_at).filter(
+            Message.id == after_id, Message.application_id == application_id
+        ).scalar()
+        if since is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown after_id"
+            )
+    if after_id is not None:
+        query = query.filter(tuple_(Message.created_at, Message.id) > tuple_(
+            literal(since, Message.created_at.type), literal(after_id, Message.id.type)
+        ))
+    elif since is not None:
+        query = query.filter(Message.created_at > since)
+    
+    query = query.order_by(asc(Message.created_at), asc(Message.id))
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def require_application_access(current_user: Principal, borrower_id: uuid.UUID):
+    """Raise 403 unless ``current_user`` may access an application.
+
+    The single-record rule every per-application route uses, for lookups
+    that load a child row together with its application's borrower.
+    """
+    if not check_application_access(current_user, borrower_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this application"
+        )
+
+
+def get_accessible_message(
+    db: Session,
+    message_id: uuid.UUID,
+    current_user: Principal,
+    application_id: Optional[uuid.UUID] = None
+) -> Optional[Message]:
+    """Get a message, access-checked through its application in one query."""
+    query = db.query(Message, LoanApplication.borrower_id).join(
+        LoanApplication, Message.application_id == LoanApplication.id
+    ).filter(Message.id == message_id)
+    if application_id is not None:
+        query = query.filter(Message.application_id == application_id)
+    row = query.first()
+    if row is None:
+        return None
+    
+    message, borrower_id = row
+    require_application_access(current_user, borrower_id)
+    return message
+
+
+def _read_state_filter(application_id: uuid.UUID, user_id: uuid.UUID):
+    return and_(
+        MessageReadState.application_id == application_id,
+        MessageReadState.user_id == user_id
+    )
+
+
+def _read_up_to(db: Session, message: Message, current_user: Principal) -> int:
+    """Flag messages from others up to ``message`` read and move the caller's
+    marker there (never backwards), recounting their unread messages in the
+    same UPDATE. Returns how far the caller's unread count dropped; doesn't
+    commit.
+    """
+    ensure_read_states(db, message.application_id, [current_user.id])
+    
+    marker = tuple_(
+        literal(message.created_at, Message.created_at.type),
+        literal(message.id, Message.id.type)
+    )
+    position = tuple_(Message.created_at, Message.id)
+    from_others = and_(
+        Message.application_id == message.application_id,
+        Message.sender_id != current_user.id
+    )
+    state = _read_state_filter(message.application_id, current_user.id)
+    
+    db.execute(
+        update(Message)
+        .where(from_others, Message.is_read == False, position <= marker)
+        .values(is_read=True, read_at=datetime.now(timezone.utc)),
+        execution_options={"synchronize_session": False}
+    )
+    
+    # Locked so concurrent reads by the same user report their own drop
+    unread_before = db.query(MessageReadState.unread_count).filter(state).with_for_update().scalar()
+    receipted = exists().where(
+        MessageReceipt.message_id == Message.id,
+        MessageReceipt.user_id == current_user.id
+    )
+    unread_after = select(func.count(Message.id)).where(
+        from_others, position > marker, ~receipted
+    ).scalar_subquery()
+    moved = db.execute(
+        update(MessageReadState)
+        .where(
+            state,
+            or_(
+                MessageReadState.last_read_at.is_(None),
+                tuple_(MessageReadState.last_read_at, MessageReadState.last_read_message_id) < marker
+            )
+        )
+        .values(
+            unread_count=unread_after,
+            last_read_message_id=message.id,
+            last_read_at=message.created_at
+        ),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if not moved:
+        return 0
+    
+    # Receipts the marker now covers are redundant
+    db.execute(
+        delete(MessageReceipt).where(
+            MessageReceipt.user_id == current_user.id,
+            MessageReceipt.message_id.in_(
+                select(Message.id).where(
+                    Message.application_id == message.application_id, position <= marker
+                )
+            )
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    return unread_before - db.query(MessageReadState.unread_count).filter(state).scalar()
+
+
+def _read_one(db: Session, message: Message, current_user: Principal, read_at: datetime) -> bool:
+    """Take one message from someone else off the caller's unread count.
+
+    It counts only if it is past the caller's marker and they haven't read it
+    on its own before, so every recipient's count drops exactly once however
+    the message is read. Returns whether the count dropped; doesn't commit.
+    """
+    ensure_read_states(db, message.application_id, [current_user.id])
+    
+    marker = tuple_(
+        literal(message.created_at, Message.created_at.type),
+        literal(message.id, Message.id.type)
+    )
+    state = _read_state_filter(message.application_id, current_user.id)
+    ahead = db.query(MessageReadState.user_id).filter(
+        state,
+        or_(
+            MessageReadState.last_read_at.is_(None),
+            tuple_(MessageReadState.last_read_at, MessageReadState.last_read_message_id) < marker
+        )
+    ).with_for_update().first()
+    if ahead is None:
+        return False
+    
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    receipted = db.execute(dialect_insert(MessageReceipt).values(
+        message_id=message.id, user_id=current_user.id, read_at=read_at
+    ).on_conflict_do_nothing(
+        index_elements=[MessageReceipt.message_id, MessageReceipt.user_id]
+    )).rowcount
+    if not receipted:
+        return False
+    
+    db.execute(
+        update(MessageReadState)
+        .where(state, MessageReadState.unread_count > 0)
+        .values(unread_count=MessageReadState.unread_count - 1),
+        execution_options={"synchronize_session": False}
+    )
+    return True
 
 
 def mark_message_as_read(
     db: Session,
     message_id: uuid.UUID,
-    current_user: User
+    current_user: Principal
 ) -> Optional[Message]:
-    """Mark a message as read."""
-    message = db.query(Message).filter(Message.id == message_id).first()
+    """Mark a single message as read.
+
+    Only this message is flagged; the caller's unread count drops by one
+    the first time they read a message from someone else past their
+    marker. Use ``mark_messages_read_up_to`` to read everything up to a
+    message.
+    """
+    message = get_accessible_message(db, message_id, current_user)
     if not message:
         return None
     
-    # Verify access to application
-    application = get_loan_application(db, message.application_id, current_user, load_relationships=False)
+    now = datetime.now(timezone.utc)
+    if not message.is_read:
+        # The shared flag stays "read by anyone"; counts are per user
+        message.is_read = True
+        message.read_at = now
+    if message.sender_id != current_user.id:
+        _read_one(db, message, current_user, now)
+    db.commit()
+    
+    notify_message_event("read", message, current_user.id)
+    return message
+
+
+def mark_messages_read_up_to(
+    db: Session,
+    application_id: uuid.UUID,
+    message_id: uuid.UUID,
+    current_user: Principal
+) -> Optional[Dict[str, Any]]:
+    """Mark every message from others up to ``message_id`` as read.
+
+    Returns the caller's read state plus how many of their unread messages
+    this read, or None if the message isn't on an accessible application.
+    """
+    message = get_accessible_message(db, message_id, current_user, application_id)
+    if not message:
+        return None
+    
+    sender_id = message.sender_id
+    marked = _read_up_to(db, message, current_user)
+    db.commit()
+    
+    if marked and sender_id != current_user.id:
+        # One receipt for the newest message stands for all earlier ones
+        notify_message_event("read", message, current_user.id)
+    
+    state = db.query(MessageReadState).filter(
+        MessageReadState.application_id == application_id,
+        MessageReadState.user_id == current_user.id
+    ).one()
+    return {
+        "application_id": application_id,
+        "unread_count": state.unread_count,
+        "last_read_message_id": state.last_read_message_id,
+        "last_read_at": state.last_read_at,
+        "marked": marked,
+    }
+
+
+def get_inbox_summary(db: Session, current_user: Principal) -> Dict[str, Any]:
+    """Unread counts for every accessible application the user follows.
+
+    One query over the user's read states (indexed by user) joined to
+    their applications; most unread first.
+    """
+    access_filter = get_user_accessible_applications_filter(current_user)
+    if access_filter is False:
+        return {"total_unread": 0, "applications": []}
+    
+    query = db.query(
+        MessageReadState.application_id,
+        LoanApplication.business_name,
+        LoanApplication.status,
+        MessageReadState.unread_count,
+        MessageReadState.last_read_at
+    ).join(
+        LoanApplication, MessageReadState.application_id == LoanApplication.id
+    ).filter(MessageReadState.user_id == current_user.id)
+    if access_filter is not None:
+        query = query.filter(access_filter)
+    
+    rows = query.order_by(desc(MessageReadState.unread_count), MessageReadState.application_id).all()
+    return {
+        "total_unread": sum(row.unread_count for row in rows),
+        "applications": rows,
+    }
+
+
+# ===== DOCUMENT CRUD OPERATIONS =====
+
+def _add_blob_reference(db: Session, sha256: str, size: int) -> bool:
+    """Count one more document referencing a blob, creating its row if needed.
+
+    The row stays locked until commit. Returns True if the row was created,
+    or revived from zero references before its file was purged, in which
+    case the caller must put the file in place before committing.
+    """
+    updated = db.execute(
+        update(StoredBlob)
+        .where(StoredBlob.sha256 == sha256, StoredBlob.ref_count > 0)
+        .values(ref_count=StoredBlob.ref_count + 1),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if updated:
+        return False
+    revived = db.execute(
+        update(StoredBlob)
+        .where(StoredBlob.sha256 == sha256, StoredBlob.ref_count == 0)
+        .values(ref_count=1, size=size),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if revived:
+        return True
+    try:
+        with db.begin_nested():
+            db.add(StoredBlob(sha256=sha256, size=size, ref_count=1))
+    except IntegrityError:
+        # Stored concurrently; reference that row instead
+        db.execute(
+            update(StoredBlob)
+            .where(StoredBlob.sha256 == sha256)
+            .values(ref_count=StoredBlob.ref_count + 1),
+            execution_options={"synchronize_session": False}
+        )
+        return False
+    return True
+
+
+def purge_unreferenced_blob(db: Session, sha256: str) -> bool:
+    """Delete a blob's file and row once no document references it.
+
+    Runs after the commit that dropped the last reference, which leaves
+    the row at zero. The row is locked while the file is removed, so an
+    upload of the same content either revives it first (and the file is
+    kept) or waits and stores the file afresh. A row left at zero by a
+    failure here is revived the same way by the next upload.
+    """
+    blob = db.query(StoredBlob).filter(StoredBlob.sha256 == sha256).with_for_update().first()
+    if blob is None or blob.ref_count > 0:
+        db.rollback()
+        return False
+    remove_file(storage_path(blob_key(sha256)))
+    db.delete(blob)
+    db.commit()
+    return True
+
+
+def _attach_document(db: Session, upload: DocumentUpload, sha256: str) -> Document:
+    """Create the Document for a finished upload, reusing any analysis
+    already done on identical content."""
+    analyzed = db.query(Document.analysis_results).filter(
+        Document.sha256 == sha256,
+        Document.is_analyzed == True
+    ).first()
+    
+    document = Document(
+        id=uuid.uuid4(),
+        application_id=upload.application_id,
+        name=upload.name,
+        type=upload.type,
+        file_path=blob_key(sha256),
+        file_size=upload.size,
+        mime_type=upload.mime_type,
+        sha256=sha256,
+        is_analyzed=analyzed is not None,
+        analysis_results=analyzed.analysis_results if analyzed else None
+    )
+    db.add(document)
+    db.add(upload)  # Re-attach if the caller closed the session while streaming
+    db.flush()
+    
+    upload.document_id = document.id
+    upload.completed_at = datetime.now(timezone.utc)
+    enqueue_document_analysis(db, document, upload.uploader_id)
+    return document
+
+
+def create_document_upload(
+    db: Session,
+    application_id: uuid.UUID,
+    upload_data: DocumentUploadCreate,
+    current_user: Principal
+) -> DocumentUpload:
+    """Start a resumable upload, rejecting it up front if the declared size
+    is over the limit for its document type.
+
+    When a ``sha256`` is declared and the application's borrower already
+    has a document with that content, the upload is completed at once by
+    referencing the stored blob; no bytes need to be sent. Content stored
+    only by other borrowers is never matched, so a digest alone can't be
+    used to claim someone else's file.
+    """
+    application = get_loan_application(db, application_id, current_user, load_relationships=False)
     if not application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan application not found"
+        )
+    
+    max_size = size_limit(upload_data.type.value)
+    if upload_data.size > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{upload_data.type.value} uploads are limited to {max_size} bytes"
+        )
+    
+    upload = DocumentUpload(
+        id=uuid.uuid4(),
+        application_id=application_id,
+        uploader_id=current_user.id,
+        name=upload_data.name,
+        type=upload_data.type,
+        mime_type=upload_data.mime_type,
+        size=upload_data.size,
+        sha256=upload_data.sha256
+    )
+    db.add(upload)
+    
+    if upload_data.sha256:
+        known = db.query(StoredBlob.sha256).join(
+            Document, Document.sha256 == StoredBlob.sha256
+        ).join(
+            LoanApplication, Document.application_id == LoanApplication.id
+        ).filter(
+            StoredBlob.sha256 == upload_data.sha256,
+            StoredBlob.size == upload_data.size,
+            LoanApplication.borrower_id == application.borrower_id
+        ).first()
+        if known:
+            reference = db.begin_nested()
+            if _add_blob_reference(db, upload_data.sha256, upload_data.size):
+                # Its last document was deleted since the lookup and the
+                # file is gone, so the bytes have to be sent after all
+                reference.rollback()
+            else:
+                reference.commit()
+                _attach_document(db, upload, upload_data.sha256)
+    
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def get_document(
+    db: Session,
+    document_id: uuid.UUID,
+    current_user: Principal
+) -> Optional[Document]:
+    """Get a document, access-checked through its application in one query."""
+    row = db.query(Document, LoanApplication.borrower_id).join(
+        LoanApplication, Document.application_id == LoanApplication.id
+    ).filter(Document.id == document_id).first()
+    if row is None:
         return None
     
-    message.is_read = True
-    message.read_at = datetime.now(timezone.utc)
+    document, borrower_id = row
+    require_application_access(current_user, borrower_id)
+    return document
+
+
+def get_application_documents(
+    db: Session,
+    application_id: uuid.UUID,
+    current_user: Principal
+) -> List[Document]:
+    """Get an application's documents, newest first."""
+    application = get_loan_application(db, application_id, current_user, load_relationships=False)
+    if not application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan application not found"
+        )
+    return db.query(Document).filter(
+        Document.application_id == application_id
+    ).order_by(desc(Document.uploaded_at)).all()
+
+
+def get_document_upload(
+    db: Session,
+    upload_id: uuid.UUID,
+    current_user: Principal
+) -> Optional[DocumentUpload]:
+    """Get an upload, access-checked through its application in one query."""
+    row = db.query(DocumentUpload, LoanApplication.borrower_id).join(
+        LoanApplication, DocumentUpload.application_id == LoanApplication.id
+    ).filter(DocumentUpload.id == upload_id).first()
+    if row is None:
+        return None
+    
+    upload, borrower_id = row
+    require_application_access(current_user, borrower_id)
+    return upload
+
+
+def complete_document_upload(
+    db: Session,
+    upload: DocumentUpload,
+    sha256: str,
+    partial_file
+) -> Document:
+    """Store a finished upload's file by content and record it as a Document.
+
+    New content is moved into the blob store; content already stored just
+    gains a reference and the partial file is dropped. Either happens while
+    the blob row is locked, so it can't race a delete of the same blob.
+    """
+    if _add_blob_reference(db, sha256, upload.size):
+        place_blob(partial_file, blob_key(sha256))
+    else:
+        remove_file(partial_file)
+    document = _attach_document(db, upload, sha256)
     db.commit()
-    db.refresh(message)
-    return message
+    db.refresh(document)
+    return document
+
+
+def delete_document_upload(db: Session, upload: DocumentUpload):
+    """Forget an unfinished upload."""
+    db.delete(upload)
+    db.commit()
+
+
+def get_stale_document_uploads(
+    db: Session,
+    started_before: datetime,
+    limit: int
+) -> List[uuid.UUID]:
+    """Ids of up to ``limit`` uploads started before the cutoff and never
+    completed, oldest first."""
+    return [row.id for row in db.query(DocumentUpload.id).filter(
+        DocumentUpload.completed_at.is_(None),
+        DocumentUpload.created_at < started_before
+    ).order_by(DocumentUpload.created_at, DocumentUpload.id).limit(limit)]
+
+
+def expire_document_uploads(db: Session, upload_ids: List[uuid.UUID]) -> int:
+    """Delete the still unfinished uploads among ``upload_ids`` in one short
+    transaction; returns how many were deleted."""
+    if not upload_ids:
+        return 0
+    deleted = db.query(DocumentUpload).filter(
+        DocumentUpload.id.in_(upload_ids),
+        DocumentUpload.completed_at.is_(None)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def delete_document(
+    db: Session,
+    document_id: uuid.UUID,
+    current_user: Principal
+) -> bool:
+    """Delete a document (admins, or the application's borrower).
+
+    Its blob loses a reference; after the last one the file and blob row
+    are purged once the delete has committed.
+    """
+    row = db.query(Document, LoanApplication.borrower_id).join(
+        LoanApplication, Document.application_id == LoanApplication.id
+    ).filter(Document.id == document_id).first()
+    if not row:
+        return False
+    document, borrower_id = row
+    if current_user.role != UserRole.admin and current_user.id != borrower_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators or the borrower can delete documents"
+        )
+    
+    db.query(DocumentUpload).filter(DocumentUpload.document_id == document.id).delete(
+        synchronize_session=False
+    )
+    db.query(DocumentAnalysisJob).filter(DocumentAnalysisJob.document_id == document.id).delete(
+        synchronize_session=False
+    )
+    # Extracted transactions stay with the application
+    db.query(Transaction).filter(Transaction.document_id == document.id).update(
+        {Transaction.document_id: None}, synchronize_session=False
+    )
+    db.delete(document)
+    orphaned = None
+    if document.sha256:
+        blob = db.query(StoredBlob).filter(StoredBlob.sha256 == document.sha256).with_for_update().first()
+        if blob:
+            blob.ref_count -= 1
+            if blob.ref_count <= 0:
+                orphaned = blob.sha256
+    db.commit()
+    
+    # Only once the delete is committed; a failed commit leaves the file
+    if orphaned:
+        purge_unreferenced_blob(db, orphaned)
+    return True
+
+
+# ===== DOCUMENT ANALYSIS =====
+
+def enqueue_document_analysis(
+    db: Session,
+    document: Document,
+    requested_by: Optional[uuid.UUID] = None
+) -> DocumentAnalysisJob:
+    """Queue (or re-queue) a document for background analysis; the caller commits.
+
+    A document whose results were reused from identical content needs no
+    job, except bank statements, which are parsed again for the
+    application's transactions.
+    """
+    now = datetime.now(timezone.utc)
+    reused = document.is_analyzed and document.type != DocumentType.bank_statement
+    job = db.query(DocumentAnalysisJob).filter(
+        DocumentAnalysisJob.document_id == document.id
+    ).first()
+    if job is None:
+        job = DocumentAnalysisJob(id=uuid.uuid4(), document_id=document.id)
+        db.add(job)
+    job.requested_by = requested_by
+    job.status = AnalysisJobStatus.succeeded if reused else AnalysisJobStatus.queued
+    job.attempts = 0
+    job.max_attempts = ANALYSIS_MAX_ATTEMPTS
+    job.last_error = None
+    job.run_after = now
+    job.started_at = None
+    job.finished_at = now if reused else None
+    return job
+
+
+def get_document_analysis_job(
+    db: Session,
+    document_id: uuid.UUID,
+    current_user: Principal
+) -> Optional[DocumentAnalysisJob]:
+    """Get a document's analysis job, access-checked through its application."""
+    row = db.query(DocumentAnalysisJob, LoanApplication.borrower_id).join(
+        Document, DocumentAnalysisJob.document_id == Document.id
+    ).join(
+        LoanApplication, Document.application_id == LoanApplication.id
+    ).filter(DocumentAnalysisJob.document_id == document_id).first()
+    if row is None:
+        return None
+    
+    job, borrower_id = row
+    require_application_access(current_user, borrower_id)
+    return job
+
+
+def request_document_analysis(
+    db: Session,
+    document_id: uuid.UUID,
+    current_user: Principal
+) -> DocumentAnalysisJob:
+    """Analyze a document again from scratch."""
+    document = get_document(db, document_id, current_user)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    job = db.query(DocumentAnalysisJob).filter(
+        DocumentAnalysisJob.document_id == document_id
+    ).first()
+    if job is not None and job.status == AnalysisJobStatus.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Analysis already running"
+        )
+    document.is_analyzed = False
+    document.updated_at = datetime.now(timezone.utc)
+    job = enqueue_document_analysis(db, document, current_user.id)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_analysis_jobs(db: Session, limit: int) -> List[Dict[str, Any]]:
+    """Claim up to ``limit`` due jobs for this worker.
+
+    Each claim is a compare-and-set on the job's attempt count, so two
+    workers never both win the same job, and it leases the job for
+    ANALYSIS_LEASE_SECONDS. Returns what a worker needs to run each job;
+    ``isolate`` marks jobs that were running when a pool process crashed.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = db.query(
+        DocumentAnalysisJob.id, DocumentAnalysisJob.attempts, DocumentAnalysisJob.max_attempts
+    ).filter(
+        DocumentAnalysisJob.status.in_([AnalysisJobStatus.queued, AnalysisJobStatus.running]),
+        DocumentAnalysisJob.run_after <= now
+    ).order_by(DocumentAnalysisJob.run_after).limit(limit).with_for_update(skip_locked=True).all()
+    
+    claimed = []
+    for job_id, attempts, max_attempts in candidates:
+        if attempts >= max_attempts:
+            # Only a running job whose lease expired gets here: its worker
+            # died on the last attempt
+            values = {
+                "status": AnalysisJobStatus.failed,
+                "last_error": "Worker stopped during analysis",
+                "finished_at": now,
+            }
+        else:
+            values = {
+                "status": AnalysisJobStatus.running,
+                "attempts": attempts + 1,
+                "started_at": now,
+                "run_after": now + timedelta(seconds=ANALYSIS_LEASE_SECONDS),
+            }
+        won = db.execute(
+            update(DocumentAnalysisJob)
+            .where(DocumentAnalysisJob.id == job_id, DocumentAnalysisJob.attempts == attempts)
+            .values(**values),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        if won and attempts < max_attempts:
+            claimed.append(job_id)
+    
+    jobs = []
+    if claimed:
+        rows = db.query(
+            DocumentAnalysisJob.id, DocumentAnalysisJob.attempts, DocumentAnalysisJob.last_error,
+            Document.id, Document.file_path, Document.type, Document.mime_type
+        ).join(Document, DocumentAnalysisJob.document_id == Document.id).filter(
+            DocumentAnalysisJob.id.in_(claimed)
+        ).all()
+        jobs = [
+            {
+                "job_id": job_id,
+                "attempts": attempts,
+                "document_id": document_id,
+                "path": str(storage_path(file_path)),
+                "document_type": document_type.value,
+                "mime_type": mime_type,
+                "isolate": last_error == ANALYSIS_CRASH_ERROR,
+            }
+            for job_id, attempts, last_error, document_id, file_path, document_type, mime_type in rows
+        ]
+    db.commit()
+    return jobs
+
+
+def _finish_claim(db: Session, job_id: uuid.UUID, attempts: int, values: Dict[str, Any]) -> bool:
+    """Record a job's outcome if this worker still holds its claim."""
+    return bool(db.execute(
+        update(DocumentAnalysisJob)
+        .where(
+            DocumentAnalysisJob.id == job_id,
+            DocumentAnalysisJob.status == AnalysisJobStatus.running,
+            DocumentAnalysisJob.attempts == attempts
+        )
+        .values(**values),
+        execution_options={"synchronize_session": False}
+    ).rowcount)
+
+
+def complete_analysis_job(
+    db: Session,
+    job: Dict[str, Any],
+    results: Dict[str, Any],
+    transactions: List[Dict[str, Any]]
+) -> bool:
+    """Store a job's results and replace the transactions extracted from
+    its document, in one commit.
+
+    Returns False, storing nothing, if the claim was lost (the lease
+    expired and another worker took the job, or the document was deleted).
+    """
+    now = datetime.now(timezone.utc)
+    if not _finish_claim(db, job["job_id"], job["attempts"], {
+        "status": AnalysisJobStatus.succeeded, "last_error": None, "finished_at": now
+    }):
+        db.rollback()
+        return False
+    
+    document = db.get(Document, job["document_id"])
+    document.is_analyzed = True
+    document.analysis_results = results
+    document.updated_at = now
+    
+    db.query(Transaction).filter(Transaction.document_id == document.id).delete(
+        synchronize_session=False
+    )
+    for item in transactions:
+        transaction = Transaction(
+            id=uuid.uuid4(),
+            application_id=document.application_id,
+            document_id=document.id,
+            transaction_date=datetime.fromisoformat(item["transaction_date"]).replace(tzinfo=timezone.utc),
+            type=TransactionType(item["type"]),
+            category=item["category"],
+            description=item["description"],
+            amount=Decimal(item["amount"]),
+            reference_number=item.get("reference_number")
+        )
+        flag_transaction_anomaly(transaction)
+        db.add(transaction)
+    requested_by = db.query(DocumentAnalysisJob.requested_by).filter(
+        DocumentAnalysisJob.id == job["job_id"]
+    ).scalar()
+    db.commit()
+    
+    if transactions and transaction_event_listeners:
+        # One query reloads everything the commit expired
+        for transaction in db.query(Transaction).filter(Transaction.document_id == document.id):
+            notify_transaction_event("created", transaction, requested_by)
+    return True
+
+
+def fail_analysis_job(
+    db: Session,
+    job: Dict[str, Any],
+    error: str,
+    retry: bool = True
+) -> bool:
+    """Record a failed attempt: retried with backoff while attempts remain,
+    otherwise (or when ``retry`` is False) the job is failed for good."""
+    max_attempts = db.query(DocumentAnalysisJob.max_attempts).filter(
+        DocumentAnalysisJob.id == job["job_id"]
+    ).scalar()
+    now = datetime.now(timezone.utc)
+    if retry and max_attempts is not None and job["attempts"] < max_attempts:
+        values = {
+            "status": AnalysisJobStatus.queued,
+            "last_error": error,
+            "run_after": now + timedelta(seconds=retry_delay(job["attempts"])),
+        }
+    else:
+        values = {"status": AnalysisJobStatus.failed, "last_error": error, "finished_at": now}
+    recorded = _finish_claim(db, job["job_id"], job["attempts"], values)
+    db.commit()
+    return recorded
+
+
+def release_analysis_job(db: Session, job: Dict[str, Any], error: str) -> bool:
+    """Put a claimed job straight back in the queue without using up an
+    attempt, for failures that weren't its fault."""
+    recorded = _finish_claim(db, job["job_id"], job["attempts"], {
+        "status": AnalysisJobStatus.queued,
+        "attempts": job["attempts"] - 1,
+        "last_error": error,
+        "run_after": datetime.now(timezone.utc),
+    })
+    db.commit()
+    return recorded
+
+
+# ===== SEARCH =====
+
+def search_records(
+    db: Session,
+    query: str,
+    current_user: Principal,
+    kinds: Optional[List[SearchKind]] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Ranked full-text search over applications, notes and messages.
+
+    Each kind is one indexed query joined to its application and restricted
+    by the caller's access filter (borrowers never match private notes).
+    Raw ranks depend on each table's own term statistics, so they are
+    scaled to the kind's best hit (1.0) before the per-kind top ``limit``
+    hits are merged.
+    """
+    access_filter = get_user_accessible_applications_filter(current_user)
+    if access_filter is False:
+        return []
+    kinds = kinds or list(SearchKind)
+    dialect = db.get_bind().dialect.name
+    
+    sources = {
+        SearchKind.application: (LoanApplication, LoanApplication.application_date),
+        SearchKind.note: (TeamNote, TeamNote.created_at),
+        SearchKind.message: (Message, Message.created_at),
+    }
+    
+    hits = []
+    for kind in kinds:
+        model, created_at = sources[kind]
+        clauses = search_clauses(dialect, model.__tablename__, query)
+        if clauses is None:
+            return []
+        
+        application_id = LoanApplication.id if model is LoanApplication else model.application_id
+        rows = db.query(
+            model.id,
+            application_id.label("application_id"),
+            LoanApplication.business_name,
+            clauses.snippet.label("snippet"),
+            clauses.rank.label("rank"),
+            created_at.label("created_at")
+        ).select_from(model)
+        if clauses.join_target is not None:
+            rows = rows.join(clauses.join_target, clauses.onclause)
+        if model is not LoanApplication:
+            rows = rows.join(LoanApplication, LoanApplication.id == model.application_id)
+        
+        rows = rows.filter(clauses.where)
+        if access_filter is not None:
+            rows = rows.filter(access_filter)
+        if model is TeamNote and current_user.role == UserRole.borrower:
+            rows = rows.filter(TeamNote.is_private == False)
+        
+        rows = rows.order_by(desc("rank")).limit(limit).all()
+        best = rows[0].rank if rows else 0
+        for row in rows:
+            hit = {"kind": kind, **row._asdict()}
+            hit["rank"] = row.rank / best if best > 0 else 1.0
+            hits.append(hit)
+    
+    # Stable, so equally ranked hits keep the order of ``kinds``
+    hits.sort(key=lambda hit: hit["rank"], reverse=True)
+    return hits[:limit]
 
 
 # ===== DASHBOARD & ANALYTICS =====
 
-def get_dashboard_stats(db: Session, current_user: User) -> DashboardStats:
+def get_dashboard_stats(db: Session, current_user: Principal) -> DashboardStats:
     """Get dashboard statistics for current user."""
     query = db.query(LoanApplication)
     
@@ -499,6 +2084,212 @@ def get_dashboard_stats(db: Session, current_user: User) -> DashboardStats:
     )
 
 
+# Facet name -> grouped value column
+FACET_COLUMNS = {
+    "status": LoanApplication.status,
+    "priority": LoanApplication.priority,
+    "business_type": LoanApplication.business_type,
+    "loan_officer": LoanApplication.loan_officer_id,
+}
+
+
+def get_application_facets(
+    db: Session,
+    current_user: Principal,
+    filters: Optional[ApplicationFilters] = None
+) -> Dict[str, Any]:
+    """Count applications per status, priority, business type and loan officer.
+
+    All facets come from one statement under the user's access filter and
+    ``filters``: ``GROUP BY GROUPING SETS`` on PostgreSQL, which reads the
+    filtered applications once, and one grouped ``SELECT`` per facet
+    combined with ``UNION ALL`` on SQLite, which has no grouping sets.
+    Loan officer facets carry the officer's name as the label.
+    """
+    facets = {"total": 0, **{facet: [] for facet in FACET_COLUMNS}}
+    access_filter = get_user_accessible_applications_filter(current_user)
+    if access_filter is False:
+        return facets
+    
+    officer = aliased(User)
+    
+    def base(*columns):
+        query = select(*columns).select_from(LoanApplication).outerjoin(
+            officer, officer.id == LoanApplication.loan_officer_id
+        )
+        if access_filter is not None:
+            query = query.where(access_filter)
+        if filters:
+            query = apply_application_filters(query, filters)
+        return query
+    
+    if db.get_bind().dialect.name == "postgresql":
+        _grouping_set_facets(db, base, officer, facets)
+    else:
+        _union_facets(db, base, officer, facets)
+    
+    for facet in FACET_COLUMNS:
+        facets[facet].sort(key=lambda item: -item["count"])
+    return facets
+
+
+def _grouping_set_facets(db: Session, base, officer, facets: Dict[str, Any]):
+    columns = list(FACET_COLUMNS.values())
+    # GROUPING() has one bit per column, leftmost first, set when the
+    # column is not part of the row's grouping set
+    all_bits = (1 << len(columns)) - 1
+    facet_of_mask = {
+        all_bits ^ (1 << (len(columns) - 1 - index)): facet
+        for index, facet in enumerate(FACET_COLUMNS)
+    }
+    query = base(
+        *columns,
+        officer.name.label("officer_name"),
+        func.grouping(*columns).label("grouping_id"),
+        func.count().label("count")
+    ).group_by(func.grouping_sets(
+        *(tuple_(column) for column in columns[:-1]),
+        tuple_(LoanApplication.loan_officer_id, officer.name),
+        tuple_()
+    ))
+    for row in db.execute(query):
+        if row.grouping_id == all_bits:
+            facets["total"] = row.count
+            continue
+        facet = facet_of_mask[row.grouping_id]
+        value = getattr(row, FACET_COLUMNS[facet].key)
+        if isinstance(value, enum.Enum):
+            value = value.value
+        facets[facet].append({
+            "value": None if value is None else str(value),
+            "label": row.officer_name if facet == "loan_officer" else None,
+            "count": row.count
+        })
+
+
+def _union_facets(db: Session, base, officer, facets: Dict[str, Any]):
+    selects = [
+        base(
+            literal(facet).label("facet"),
+            cast(column, String).label("value"),
+            (officer.name if facet == "loan_officer" else null()).label("label"),
+            func.count().label("count")
+        ).group_by(column, *([officer.name] if facet == "loan_officer" else []))
+        for facet, column in FACET_COLUMNS.items()
+    ]
+    for row in db.execute(union_all(*selects)):
+        value = row.value
+        if row.facet == "loan_officer" and value is not None:
+            # Normalise the stored UUID text (SQLite keeps bare hex)
+            value = str(uuid.UUID(value))
+        facets[row.facet].append({"value": value, "label": row.label, "count": row.count})
+    # Every application has exactly one status, so the status facet sums to the total
+    facets["total"] = sum(item["count"] for item in facets["status"])
+
+
+# ===== SCHEDULED MAINTENANCE =====
+
+def rollup_application_metrics(db: Session, day: datetime) -> ApplicationMetrics:
+    """Store the daily ``ApplicationMetrics`` row for ``day`` (UTC).
+
+    Status counts and the total loan amount are a snapshot of the pipeline
+    when this runs (just after the day ends); processing time covers the
+    decisions made during the day. Rerunning for a day replaces its row.
+    """
+    start = day.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=1)
+    counts: Dict[ApplicationStatus, int] = {}
+    total_amount = Decimal(0)
+    for status_value, count, amount in db.query(
+        LoanApplication.status, func.count(), func.sum(LoanApplication.loan_amount)
+    ).group_by(LoanApplication.status):
+        counts[status_value] = count
+        total_amount += Decimal(amount or 0)
+    decided = db.query(LoanApplication.application_date, LoanApplication.decision_date).filter(
+        LoanApplication.decision_date >= start,
+        LoanApplication.decision_date < end,
+        LoanApplication.application_date.isnot(None)
+    ).all()
+    processing_days = [
+        (_utc(decided_at) - _utc(applied_at)).total_seconds() / 86400 for applied_at, decided_at in decided
+    ]
+    approved = counts.get(ApplicationStatus.approved, 0)
+    rejected = counts.get(ApplicationStatus.rejected, 0)
+    values = {
+        "total_applications": sum(counts.values()),
+        "pending_applications": counts.get(ApplicationStatus.pending, 0),
+        "approved_applications": approved,
+        "rejected_applications": rejected,
+        "under_review_applications": counts.get(ApplicationStatus.under_review, 0),
+        "avg_processing_time_days": (
+            sum(processing_days) / len(processing_days) if processing_days else None
+        ),
+        "approval_rate": approved / (approved + rejected) * 100 if approved + rejected else None,
+        "total_loan_amount": total_amount,
+    }
+    
+    metrics = db.query(ApplicationMetrics).filter(ApplicationMetrics.date == start).first()
+    if metrics is None:
+        metrics = ApplicationMetrics(id=uuid.uuid4(), date=start)
+        db.add(metrics)
+    for name, value in values.items():
+        setattr(metrics, name, value)
+    db.commit()
+    return metrics
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def escalate_stale_applications(
+    db: Session,
+    submitted_before: datetime,
+    priority: ApplicationPriority,
+    limit: int
+) -> int:
+    """Raise up to ``limit`` pending applications submitted before the
+    cutoff to ``priority``, oldest first; returns how many were raised.
+
+    Applications already at or above ``priority`` are left alone, so
+    rerunning is harmless. Each call is one short transaction; call it
+    repeatedly to work through a backlog.
+    """
+    ids = [row.id for row in db.query(LoanApplication.id).filter(
+        LoanApplication.status == ApplicationStatus.pending,
+        LoanApplication.application_date < submitted_before,
+        LoanApplication.priority_rank < PRIORITY_RANKS[priority]
+    ).order_by(LoanApplication.application_date, LoanApplication.id).limit(limit)]
+    if not ids:
+        return 0
+    
+    db.query(LoanApplication).filter(
+        LoanApplication.id.in_(ids),
+        LoanApplication.status == ApplicationStatus.pending
+    ).update(
+        {LoanApplication.priority: priority, LoanApplication.updated_at: datetime.now(timezone.utc)},
+        synchronize_session=False
+    )
+    db.commit()
+    
+    for application_id in ids:
+        notify_application_change(application_id)
+    return len(ids)
+
+
+def get_transaction_application_ids(
+    db: Session,
+    after: Optional[uuid.UUID],
+    limit: int
+) -> List[uuid.UUID]:
+    """Next ``limit`` ids, in order, of applications that have transactions."""
+    query = db.query(Transaction.application_id).distinct()
+    if after is not None:
+        query = query.filter(Transaction.application_id > after)
+    return [row.application_id for row in query.order_by(Transaction.application_id).limit(limit)]
+
+
 # ===== UTILITY FUNCTIONS =====
 
 def create_status_history(
@@ -509,7 +2300,7 @@ def create_status_history(
     new_status: ApplicationStatus,
     reason: Optional[str] = None
 ):
-    """Create an application status history record."""
+    """Add an application status history record; committed with the caller's change."""
     history = ApplicationStatusHistory(
         id=uuid.uuid4(),
         application_id=application_id,
@@ -520,10 +2311,9 @@ def create_status_history(
     )
     
     db.add(history)
-    db.commit()
 
 
-def get_user_accessible_applications_filter(current_user: User):
+def get_user_accessible_applications_filter(current_user: Principal):
     """Get SQLAlchemy filter for applications accessible to user."""
     if current_user.role in [UserRole.admin, UserRole.analyst]:
         # Admin and analysts can see all applications
@@ -545,6 +2335,23 @@ def get_user_accessible_applications_filter(current_user: User):
     return False
 
 
+def application_in_scope(
+    current_user: Principal,
+    borrower_id: uuid.UUID,
+    loan_officer_id: Optional[uuid.UUID],
+    underwriter_id: Optional[uuid.UUID],
+    status: ApplicationStatus
+) -> bool:
+    """In-memory equivalent of get_user_accessible_applications_filter."""
+    if current_user.role in [UserRole.admin, UserRole.analyst]:
+        return True
+    if current_user.role == UserRole.loan_officer:
+        return current_user.id in (loan_officer_id, underwriter_id) or status == ApplicationStatus.pending
+    if current_user.role == UserRole.borrower:
+        return borrower_id == current_user.id
+    return False
+
+
 # ===== SYSTEM SETTINGS =====
 
 def get_system_settings(db: Session) -> List[SystemSettings]:
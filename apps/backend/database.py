@@ -93,6 +93,11 @@ def init_database():
         # Create all tables
         Base.metadata.create_all(bind=engine)
         print("✅ Database tables created successfully")
+        
+        # Full-text search index, maintained by the database on write
+        from search import install_search_index
+        if install_search_index(engine):
+            print("✅ Search index installed")
         return True
     except Exception as e:
         print(f"❌ Failed to initialize database: {e}")
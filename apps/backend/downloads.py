@@ -0,0 +1,177 @@
+"""
+File Downloads for Caelo Backend.
+
+``RangeFileResponse`` streams a file from disk without loading it into
+memory, and answers single-range ``Range`` requests (resumed downloads,
+seeking in viewers) with ``206 Partial Content``. An ``If-Range`` that no
+longer matches sends the whole file instead, as RFC 9110 requires.
+
+When the ASGI server offers zero-copy extensions, the body is handed to
+it: ``http.response.zerocopysend`` lets the server ``sendfile`` the byte
+range straight from the page cache, and ``http.response.pathsend`` does the
+same for a whole file. Otherwise the file is sent in
+``DOWNLOAD_CHUNK_SIZE`` reads off the event loop, so memory stays flat at
+one chunk per download whatever the file size.
+"""
+
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+
+# Configuration
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range lies outside the file."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single ``bytes=`` range, or None to send
+    the whole file (no header, multiple ranges, or a malformed value).
+
+    Raises RangeNotSatisfiable for a well-formed range past the end.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    """False when an ``If-Modified-Since`` date is at or after ``last_modified``."""
+    if not if_modified_since:
+        return True
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return True
+    return int(last_modified) > since
+
+
+class RangeFileResponse(FileResponse):
+    """File response with Range support and zero-copy sending where available."""
+
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+    def __init__(
+        self,
+        path,
+        stat_result: os.stat_result,
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(path, stat_result=stat_result, **kwargs)
+        size = stat_result.st_size
+        self.headers["accept-ranges"] = "bytes"
+        self.offset, self.count = 0, size
+
+        if range_header and self._if_range_matches(if_range):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                self.status_code = 416
+                self.count = 0
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                self.status_code = 206
+                self.offset, self.count = start, end - start + 1
+                self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+                self.headers["content-length"] = str(self.count)
+
+    def _if_range_matches(self, if_range: Optional[str]) -> bool:
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(("W/", '"')):
+            # Only a strong ETag match allows a partial response
+            return if_range == self.headers.get("etag")
+        return if_range == self.headers.get("last-modified")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        extensions = scope.get("extensions") or {}
+        if self.send_header_only or not self.count:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.status_code == 200 and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": self.offset,
+                        "count": self.count,
+                        "more_body": False,
+                    }
+                )
+        else:
+            await self._send_chunks(send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_chunks(self, send: Send):
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            position, remaining = self.offset, self.count
+            while remaining:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(self.chunk_size, remaining), position
+                )
+                if not chunk:
+                    break  # Truncated underneath us; end the body early
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": bool(remaining),
+                    }
+                )
+            if remaining:
+                await send(
+                    {"type": "http.response.body", "body": b"", "more_body": False}
+                )
+        finally:
+            os.close(fd)
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
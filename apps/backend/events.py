@@ -0,0 +1,238 @@
+"""
+Event Bus for Caelo Backend.
+
+Carries realtime events between uvicorn workers. Write paths publish
+``(channel, key, payload)`` events, with the payload already serialized to
+JSON text, and every worker's handlers for the channel receive them in
+batches, the publishing worker included. Handlers feed the local
+``FanoutHub``/``EventStream``, whose bounded per-subscriber queues keep a
+slow client from holding more than ``REALTIME_QUEUE_SIZE`` events.
+
+Backends: in-process (default; a single worker) and any Redis-compatible
+client (``publish``/``pubsub``), selected with EVENT_BUS_BACKEND /
+EVENT_BUS_REDIS_URL. The Redis backend queues events and a flusher thread
+sends up to ``EVENT_BUS_BATCH_SIZE`` of them as one PUBLISH. Publishing
+never waits on Redis, since it's called from request handlers on the
+event loop: when ``EVENT_BUS_MAX_PENDING`` events are waiting, the oldest
+is dropped and counted, rather than letting the queue grow without bound.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "memory")
+EVENT_BUS_REDIS_URL = os.getenv(
+    "EVENT_BUS_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")
+)
+EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "caelo:events")
+EVENT_BUS_BATCH_SIZE = int(os.getenv("EVENT_BUS_BATCH_SIZE", "100"))
+EVENT_BUS_BATCH_DELAY_MS = int(os.getenv("EVENT_BUS_BATCH_DELAY_MS", "5"))
+EVENT_BUS_MAX_PENDING = int(os.getenv("EVENT_BUS_MAX_PENDING", "10000"))
+
+# Handlers get every event of their channel in a batch as (key, payload) pairs
+BatchHandler = Callable[[List[Tuple[str, str]]], None]
+
+
+class BusEvent(NamedTuple):
+    """One published event."""
+
+    channel: str
+    key: str
+    payload: str
+
+
+class EventBus:
+    """Routes published events to per-channel handlers through a backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._handlers: Dict[str, List[BatchHandler]] = defaultdict(list)
+        backend.attach(self._dispatch)
+
+    @property
+    def local(self) -> bool:
+        """True when only this process can have subscribers."""
+        return self.backend.local
+
+    def subscribe(self, channel: str, handler: BatchHandler):
+        self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, key: str, payload: str):
+        """Publish an event; safe from any thread."""
+        self.backend.publish(BusEvent(channel, key, payload))
+
+    def start(self):
+        self.backend.start()
+
+    def close(self):
+        self.backend.close()
+
+    def _dispatch(self, events: List[BusEvent]):
+        by_channel: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for event in events:
+            by_channel[event.channel].append((event.key, event.payload))
+        for channel, items in by_channel.items():
+            for handler in self._handlers.get(channel, ()):
+                try:
+                    handler(items)
+                except Exception:
+                    # One broken consumer must not starve the others
+                    logger.exception("Event handler for %s failed", channel)
+
+
+# ===== BACKENDS =====
+
+
+class InProcessBusBackend:
+    """Delivers each event straight to this process's handlers."""
+
+    local = True
+
+    def __init__(self):
+        self._dispatch = None
+
+    def attach(self, dispatch: Callable[[List[BusEvent]], None]):
+        self._dispatch = dispatch
+
+    def publish(self, event: BusEvent):
+        self._dispatch([event])
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RedisBusBackend:
+    """Batches events onto one Redis pub/sub channel shared by every worker."""
+
+    local = False
+
+    def __init__(
+        self,
+        client,
+        channel: str = EVENT_BUS_CHANNEL,
+        batch_size: int = EVENT_BUS_BATCH_SIZE,
+        batch_delay: float = EVENT_BUS_BATCH_DELAY_MS / 1000,
+        max_pending: int = EVENT_BUS_MAX_PENDING,
+    ):
+        self.client = client
+        self.channel = channel
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.published = 0
+        self.dropped = 0
+        self._dispatch = None
+        self._pending: "deque[BusEvent]" = deque()
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBusBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def attach(self, dispatch: Callable[[List[BusEvent]], None]):
+        self._dispatch = dispatch
+
+    def start(self):
+        if self._threads:
+            return
+        self._closed.clear()
+        for target, name in ((self._flush_loop, "flush"), (self._read_loop, "read")):
+            thread = threading.Thread(
+                target=target, name=f"event-bus-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self):
+        """Flush what's pending and stop both threads."""
+        self._closed.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def publish(self, event: BusEvent):
+        """Queue an event without blocking; the lock is only held to append."""
+        with self._condition:
+            if len(self._pending) >= self.max_pending:
+                # Redis is falling behind: shed the oldest event
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(event)
+            self._condition.notify_all()
+
+    def _next_batch(self) -> List[BusEvent]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending or self._closed.is_set())
+            if len(self._pending) < self.batch_size and not self._closed.is_set():
+                # Linger briefly so bursts go out as one message
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= self.batch_size
+                    or self._closed.is_set(),
+                    timeout=self.batch_delay,
+                )
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            self._condition.notify_all()
+            return batch
+
+    def _flush_loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # Closed and drained
+            try:
+                self.client.publish(
+                    self.channel, json.dumps([list(event) for event in batch])
+                )
+                self.published += len(batch)
+            except Exception:
+                logger.exception(
+                    "Event bus publish failed; dropped %d events", len(batch)
+                )
+                self.dropped += len(batch)
+
+    def _read_loop(self):
+        while not self._closed.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None or message.get("type") != "message":
+                        continue
+                    self._dispatch(
+                        [BusEvent(*item) for item in json.loads(message["data"])]
+                    )
+            except Exception:
+                # Events published while disconnected are lost; streams resync
+                logger.exception("Event bus subscription failed; reconnecting")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+def get_event_bus() -> EventBus:
+    """Build the configured event bus."""
+    if EVENT_BUS_BACKEND == "redis":
+        return EventBus(RedisBusBackend.from_url(EVENT_BUS_REDIS_URL))
+    return EventBus(InProcessBusBackend())
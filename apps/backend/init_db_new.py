@@ -18,7 +18,7 @@ sys.path.append(str(Path(__file__).parent))
 from sqlalchemy.orm import Session
 from database import engine, SessionLocal, init_database
 from models_new import *
-import bcrypt
+from auth_enhanced import hash_password
 from datetime import datetime, timezone
 import uuid
 
@@ -32,14 +32,12 @@ def create_initial_users(db: Session):
         print("ℹ️  Users already exist, skipping user creation")
         return
     
-    # Hash password for demo users
-    password_hash = bcrypt.hashpw("demo123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
+    # Each account gets its own salted hash at the configured cost
     initial_users = [
         User(
             id=uuid.uuid4(),
             email="admin@withcaelo.ai",
-            password_hash=password_hash,
+            password_hash=hash_password("demo123"),
             role=UserRole.admin,
             name="Admin User",
             organization="Caelo Inc.",
@@ -48,7 +46,7 @@ def create_initial_users(db: Session):
         User(
             id=uuid.uuid4(),
             email="sarah@withcaelo.ai", 
-            password_hash=password_hash,
+            password_hash=hash_password("demo123"),
             role=UserRole.admin,
             name="Sarah Chen",
             organization="Caelo Inc.",
@@ -57,7 +55,7 @@ def create_initial_users(db: Session):
         User(
             id=uuid.uuid4(),
             email="mike@cdfi.example.org",
-            password_hash=password_hash,
+            password_hash=hash_password("demo123"),
             role=UserRole.analyst,
             name="Mike Rodriguez", 
             organization="Community Capital Partners",
@@ -66,7 +64,7 @@ def create_initial_users(db: Session):
         User(
             id=uuid.uuid4(),
             email="loan.officer@cdfi.example.org",
-            password_hash=password_hash,
+            password_hash=hash_password("demo123"),
             role=UserRole.loan_officer,
             name="Caleb Mark",
             organization="Community Capital Partners", 
@@ -75,7 +73,7 @@ def create_initial_users(db: Session):
         User(
             id=uuid.uuid4(),
             email="jessica@smallbiz.com",
-            password_hash=password_hash,
+            password_hash=hash_password("demo123"),
             role=UserRole.borrower,
             name="Jessica Williams",
             organization="Sunrise Bakery",
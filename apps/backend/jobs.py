@@ -0,0 +1,541 @@
+"""
+Background Jobs for Caelo Backend.
+
+Side effects that don't have to finish before a response (scoring,
+aggregate recomputes) are declared as tasks and queued instead of run
+inline::
+
+    @task(unique=True, priority=PRIORITY_LOW)
+    def recompute_something(application_id: str):
+        ...
+
+    job_id = recompute_something.delay(str(application.id))
+
+Calling a task directly still runs it inline. Arguments must be
+JSON-serializable so the same tasks run on either backend:
+
+- ``local`` (default): a priority queue served by ``JOBS_THREADS`` threads
+  in this process, with ``executor="process"`` tasks handed to a process
+  pool. For single-node deployments and tests; job status lives in memory
+  for the last ``JOBS_STATUS_RETENTION`` jobs.
+- ``celery``: tasks are registered with a Celery app on CELERY_BROKER_URL
+  and run by ``celery -A celery_worker worker``; status comes from
+  CELERY_RESULT_BACKEND, for ids recorded at enqueue time in
+  JOBS_REGISTRY_URL (Redis) so unknown ids aren't reported as pending.
+
+Failed jobs are retried up to ``max_retries`` times with exponential
+backoff. Lower priority numbers run first (0-9, as with Celery's Redis
+transport). A ``unique`` task queued again with the same arguments while
+an earlier job is still waiting returns that job instead of adding
+another, so bursts of triggers coalesce into one run (local backend).
+"""
+
+import heapq
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+JOBS_BACKEND = os.getenv("JOBS_BACKEND", "local")
+JOBS_THREADS = int(os.getenv("JOBS_THREADS", "4"))
+JOBS_PROCESSES = int(os.getenv("JOBS_PROCESSES", "2"))
+JOBS_STATUS_RETENTION = int(os.getenv("JOBS_STATUS_RETENTION", "10000"))
+JOBS_EAGER = os.getenv("JOBS_EAGER", "false").lower() == "true"
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/1")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/2")
+JOBS_REGISTRY_URL = os.getenv("JOBS_REGISTRY_URL", CELERY_RESULT_BACKEND)
+# How long Celery keeps results, and so how long job ids stay known
+JOBS_RESULT_TTL = 24 * 3600
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+
+class JobState(str, Enum):
+    pending = "pending"
+    running = "running"
+    retrying = "retrying"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclass
+class JobStatus:
+    """Where a queued job is up to."""
+
+    id: str
+    name: str
+    state: JobState
+    priority: Optional[int] = None
+    attempts: int = 0
+    enqueued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Any = None
+
+
+# ===== TASKS =====
+
+
+class Task:
+    """A function that can be queued as a background job."""
+
+    def __init__(
+        self,
+        func: Callable,
+        name: str,
+        max_retries: int,
+        retry_backoff: float,
+        priority: int,
+        executor: str,
+        unique: bool,
+    ):
+        self.func = func
+        self.name = name
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.priority = priority
+        self.executor = executor
+        self.unique = unique
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs) -> str:
+        """Queue the task; returns the job id."""
+        return self.apply_async(args, kwargs)
+
+    def apply_async(
+        self,
+        args: Tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        priority: Optional[int] = None,
+        countdown: float = 0,
+    ) -> str:
+        """Queue the task with per-call options; returns the job id."""
+        return get_job_backend().submit(
+            self,
+            tuple(args),
+            kwargs or {},
+            self.priority if priority is None else priority,
+            countdown,
+        )
+
+    def retry_delay(self, attempt: int) -> float:
+        """Seconds before retry number ``attempt`` (1-based)."""
+        return self.retry_backoff * 2 ** (attempt - 1)
+
+
+# Every declared task by name; backends look tasks up here
+TASKS: Dict[str, Task] = {}
+
+
+def task(
+    func: Optional[Callable] = None,
+    *,
+    name: Optional[str] = None,
+    max_retries: int = 3,
+    retry_backoff: float = 2.0,
+    priority: int = PRIORITY_NORMAL,
+    executor: str = "thread",
+    unique: bool = False,
+):
+    """Declare a background task; usable bare or with options.
+
+    ``executor="process"`` runs the task in a process pool on the local
+    backend, for CPU-bound work.
+    """
+
+    def register(func: Callable) -> Task:
+        declared = Task(
+            func,
+            name or f"{func.__module__}.{func.__qualname__}",
+            max_retries,
+            retry_backoff,
+            priority,
+            executor,
+            unique,
+        )
+        TASKS[declared.name] = declared
+        return declared
+
+    return register(func) if func is not None else register
+
+
+def _invoke(module: str, name: str, args: Tuple, kwargs: Dict[str, Any]):
+    """Run a task by name in a pool process, importing its module first."""
+    importlib.import_module(module)
+    return TASKS[name].func(*args, **kwargs)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ===== BACKENDS =====
+
+
+class LocalJobBackend:
+    """Runs jobs on threads in this process, highest priority first."""
+
+    def __init__(
+        self,
+        threads: int = JOBS_THREADS,
+        processes: int = JOBS_PROCESSES,
+        eager: bool = JOBS_EAGER,
+        retention: int = JOBS_STATUS_RETENTION,
+    ):
+        self.threads = threads
+        self.processes = processes
+        self.eager = eager
+        self.retention = retention
+        self._ready: List[Tuple[int, int, str]] = []  # (priority, seq, job_id)
+        self._delayed: List[
+            Tuple[float, int, int, str]
+        ] = []  # (run_at, seq, priority, job_id)
+        self._jobs: Dict[str, Tuple[Task, Tuple, Dict[str, Any]]] = {}
+        self._statuses: "OrderedDict[str, JobStatus]" = OrderedDict()
+        self._waiting: Dict[Tuple, str] = {}  # unique key -> queued job id
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._closed = False
+
+    def start(self):
+        with self._condition:
+            if self._workers or self.eager:
+                return
+            self._closed = False
+            for index in range(self.threads):
+                worker = threading.Thread(
+                    target=self._work, name=f"job-worker-{index}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def close(self, timeout: float = 10):
+        """Stop after the running jobs finish; queued jobs are dropped."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def submit(
+        self,
+        task: Task,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        priority: int,
+        countdown: float,
+    ) -> str:
+        key = (
+            (task.name, repr(args), repr(sorted(kwargs.items())))
+            if task.unique
+            else None
+        )
+        with self._condition:
+            if key is not None and key in self._waiting:
+                return self._waiting[key]
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = (task, args, kwargs)
+            self._remember(
+                JobStatus(
+                    job_id, task.name, JobState.pending, priority, enqueued_at=_now()
+                )
+            )
+            if key is not None:
+                self._waiting[key] = job_id
+            if not self.eager:
+                self._schedule(job_id, priority, countdown)
+        if self.eager:
+            self._run(job_id)
+        else:
+            self.start()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        with self._condition:
+            return self._statuses.get(job_id)
+
+    def _remember(self, status: JobStatus):
+        self._statuses[status.id] = status
+        while len(self._statuses) > self.retention:
+            oldest, dropped = next(iter(self._statuses.items()))
+            if dropped.state not in (JobState.succeeded, JobState.failed):
+                break  # Never forget a job that's still queued or running
+            self._statuses.popitem(last=False)
+
+    def _schedule(self, job_id: str, priority: int, delay: float):
+        # Called with the condition held
+        if delay > 0:
+            heapq.heappush(
+                self._delayed,
+                (time.monotonic() + delay, next(self._seq), priority, job_id),
+            )
+        else:
+            heapq.heappush(self._ready, (priority, next(self._seq), job_id))
+        self._condition.notify()
+
+    def _next_job(self) -> Optional[str]:
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, seq, priority, job_id = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (priority, seq, job_id))
+                if self._ready:
+                    return heapq.heappop(self._ready)[2]
+                self._condition.wait(
+                    self._delayed[0][0] - now if self._delayed else None
+                )
+            return None
+
+    def _work(self):
+        while True:
+            job_id = self._next_job()
+            if job_id is None:
+                return
+            self._run(job_id)
+
+    def _run(self, job_id: str):
+        task, args, kwargs = self._jobs[job_id]
+        with self._condition:
+            status = self._statuses[job_id]
+            if task.unique:
+                # Triggers from here on need a fresh run
+                self._waiting.pop(
+                    (task.name, repr(args), repr(sorted(kwargs.items()))), None
+                )
+            status.state = JobState.running
+            status.attempts += 1
+            status.started_at = _now()
+        try:
+            if task.executor == "process" and not self.eager:
+                result = (
+                    self._process_pool()
+                    .submit(_invoke, task.func.__module__, task.name, args, kwargs)
+                    .result()
+                )
+            else:
+                result = task.func(*args, **kwargs)
+        except Exception as e:
+            self._failed(job_id, task, status, e)
+            return
+        with self._condition:
+            status.state = JobState.succeeded
+            status.result = result
+            status.error = None
+            status.finished_at = _now()
+            del self._jobs[job_id]
+
+    def _failed(self, job_id: str, task: Task, status: JobStatus, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        with self._condition:
+            status.error = message
+            if status.attempts <= task.max_retries and not self.eager:
+                status.state = JobState.retrying
+                self._schedule(
+                    job_id, status.priority, task.retry_delay(status.attempts)
+                )
+                logger.warning(
+                    "Job %s (%s) failed, retrying: %s", job_id, task.name, message
+                )
+                return
+            status.state = JobState.failed
+            status.finished_at = _now()
+            del self._jobs[job_id]
+        logger.error("Job %s (%s) failed: %s", job_id, task.name, message)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._condition:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+
+class JobRegistry:
+    """Ids of issued jobs, kept in any Redis-compatible client.
+
+    Celery reports a job it has never heard of as PENDING, the same as one
+    still waiting in the queue, so ids are recorded when they are issued.
+    """
+
+    def __init__(self, client, prefix: str = "caelo:job:", ttl: int = JOBS_RESULT_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url: str) -> "JobRegistry":
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def add(self, job_id: str, name: str):
+        self.client.set(self.prefix + job_id, name, ex=self.ttl)
+
+    def discard(self, job_id: str):
+        self.client.delete(self.prefix + job_id)
+
+    def name(self, job_id: str) -> Optional[str]:
+        """The issued job's task name, or None if the id was never issued."""
+        value = self.client.get(self.prefix + job_id)
+        return value.decode() if isinstance(value, bytes) else value
+
+
+class CeleryJobBackend:
+    """Sends jobs to Celery workers; every declared task is registered."""
+
+    _STATES = {
+        "PENDING": JobState.pending,
+        "RECEIVED": JobState.pending,
+        "STARTED": JobState.running,
+        "RETRY": JobState.retrying,
+        "SUCCESS": JobState.succeeded,
+        "FAILURE": JobState.failed,
+        "REVOKED": JobState.failed,
+    }
+
+    def __init__(
+        self,
+        broker_url: str = CELERY_BROKER_URL,
+        result_backend: str = CELERY_RESULT_BACKEND,
+        registry: Optional[JobRegistry] = None,
+    ):
+        from celery import Celery
+
+        self.registry = registry or JobRegistry.from_url(JOBS_REGISTRY_URL)
+        self.app = Celery("caelo", broker=broker_url, backend=result_backend)
+        self.app.conf.update(
+            task_serializer="json",
+            result_serializer="json",
+            accept_content=["json"],
+            task_acks_late=True,  # A worker dying mid-job doesn't lose it
+            # So priorities aren't defeated by prefetching
+            worker_prefetch_multiplier=1,
+            task_track_started=True,
+            result_expires=JOBS_RESULT_TTL,
+            broker_transport_options={
+                "queue_order_strategy": "priority",
+                "priority_steps": list(range(10)),
+            },
+        )
+        self._registered: Dict[str, Any] = {}
+        for declared in list(TASKS.values()):
+            self._register(declared)
+
+    def _register(self, declared: Task):
+        if declared.name in self._registered:
+            return self._registered[declared.name]
+
+        def run(celery_task, *args, **kwargs):
+            try:
+                return declared.func(*args, **kwargs)
+            except Exception as e:
+                raise celery_task.retry(
+                    exc=e,
+                    countdown=declared.retry_delay(celery_task.request.retries + 1),
+                    max_retries=declared.max_retries,
+                )
+
+        registered = self.app.task(name=declared.name, bind=True)(run)
+        self._registered[declared.name] = registered
+        return registered
+
+    def start(self):
+        pass
+
+    def close(self, timeout: float = 10):
+        pass
+
+    def submit(
+        self,
+        task: Task,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        priority: int,
+        countdown: float,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        # Recorded first, so the id is known as soon as a worker can see it
+        self.registry.add(job_id, task.name)
+        try:
+            self._register(task).apply_async(
+                args=args,
+                kwargs=kwargs,
+                task_id=job_id,
+                priority=priority,
+                countdown=countdown or None,
+            )
+        except Exception:
+            self.registry.discard(job_id)
+            raise
+        return job_id
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        name = self.registry.name(job_id)
+        if name is None:
+            return None
+        result = self.app.AsyncResult(job_id)
+        state = self._STATES.get(result.state, JobState.pending)
+        error = (
+            str(result.info) if state in (JobState.retrying, JobState.failed) else None
+        )
+        return JobStatus(
+            job_id,
+            name,
+            state,
+            finished_at=result.date_done
+            if state in (JobState.succeeded, JobState.failed)
+            else None,
+            error=error,
+            result=result.result if state == JobState.succeeded else None,
+        )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_job_backend():
+    """The process-wide job backend, built from configuration on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = (
+                CeleryJobBackend() if JOBS_BACKEND == "celery" else LocalJobBackend()
+            )
+        return _backend
+
+
+def set_job_backend(backend):
+    """Replace the job backend (tests, or custom wiring at startup)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
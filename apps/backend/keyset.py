@@ -0,0 +1,118 @@
+"""
+Keyset Pagination for Caelo Backend.
+
+Sorts are declared as tuples of ``SortKey`` ending in a unique column. A
+page is fetched with ``ORDER BY`` on the keys plus a predicate selecting
+rows strictly after the previous page's last row, so every page is an
+index range scan instead of an ``OFFSET`` that reads and discards all
+earlier rows. Cursors are opaque URL-safe tokens carrying the sort name
+and the last row's key values.
+"""
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, NamedTuple, Sequence
+import uuid
+
+from sqlalchemy import and_, false, or_, tuple_
+
+
+class SortKey(NamedTuple):
+    """One ORDER BY key of a whitelisted sort."""
+
+    column: Any
+    descending: bool
+    value: Callable[[Any], Any]  # Reads the key's value from a result row
+    decode: Callable[[Any], Any]  # Rebuilds the value from its JSON form
+    nullable: bool = False  # NULLs sort last in either direction
+
+
+def order_by_clauses(keys: Sequence[SortKey]) -> List[Any]:
+    """ORDER BY clauses for a sort."""
+    clauses = []
+    for key in keys:
+        clause = key.column.desc() if key.descending else key.column.asc()
+        clauses.append(clause.nulls_last() if key.nullable else clause)
+    return clauses
+
+
+def keyset_predicate(keys: Sequence[SortKey], values: Sequence[Any]):
+    """Filter selecting rows that sort strictly after ``values``.
+
+    Sorts whose keys share one direction and can't be NULL use a row-value
+    comparison, which databases match directly against a composite index;
+    anything else expands to the equivalent OR-of-ANDs with NULLs last,
+    bounded on the leading key.
+    """
+    if len({key.descending for key in keys}) == 1 and not any(
+        key.nullable for key in keys
+    ):
+        columns = tuple_(*(key.column for key in keys))
+        bound = tuple_(*values)
+        return columns < bound if keys[0].descending else columns > bound
+
+    branches = []
+    for index, (key, value) in enumerate(zip(keys, values)):
+        equal = [
+            previous.column.is_(None)
+            if previous_value is None
+            else previous.column == previous_value
+            for previous, previous_value in zip(keys[:index], values[:index])
+        ]
+        if value is None:
+            # Nothing sorts after NULL on this key except later keys' ties
+            after = false()
+        else:
+            after = key.column < value if key.descending else key.column > value
+            if key.nullable:
+                after = or_(after, key.column.is_(None))
+        branches.append(and_(*equal, after))
+    predicate = or_(*branches)
+
+    # Redundant range on the leading key lets the planner seek into the
+    # index instead of scanning from the start and filtering
+    first, first_value = keys[0], values[0]
+    if first_value is not None and not first.nullable:
+        bound = (
+            first.column <= first_value
+            if first.descending
+            else first.column >= first_value
+        )
+        predicate = and_(bound, predicate)
+    elif first_value is None:
+        predicate = and_(first.column.is_(None), predicate)
+    return predicate
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort: str, keys: Sequence[SortKey], row: Any) -> str:
+    """Cursor pointing just after ``row`` in ``sort`` order."""
+    payload = {"s": sort, "v": [_to_json(key.value(row)) for key in keys]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str, keys: Sequence[SortKey]) -> List[Any]:
+    """Key values stored in ``cursor``; raises ValueError if it is malformed
+    or was issued for a different sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        if payload["s"] != sort or len(values) != len(keys):
+            raise ValueError("cursor does not match sort order")
+        return [
+            None if value is None else key.decode(value)
+            for key, value in zip(keys, values)
+        ]
+    except (KeyError, TypeError, ArithmeticError, json.JSONDecodeError) as e:
+        raise ValueError("malformed cursor") from e
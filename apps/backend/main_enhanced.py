@@ -5,23 +5,25 @@ Comprehensive API with authentication, CRUD operations, and role-based access co
 Ready for production with proper error handling, validation, and security.
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Response
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, Query, Header, WebSocket
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from starlette.requests import ClientDisconnect
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import List, Optional, Union, Literal
+import asyncio
+import json
+import mimetypes
 import os
-
-# Rate limiting temporarily removed due to compatibility issues
-# from slowapi import Limiter, _rate_limit_exceeded_handler
-# from slowapi.util import get_remote_address
-# from slowapi.errors import RateLimitExceeded
+import uuid
 
 # Local imports
-from database import get_db, engine, check_database_health, init_database
-from models_new import Base, User, LoanApplication, UserRole, ApplicationStatus, ApplicationPriority
+from database import get_db, engine, check_database_health, init_database, SessionLocal
+from models_new import (
+    Base, User, LoanApplication, Document, UserRole, ApplicationStatus, ApplicationPriority
+)
 from schemas_new import (
     # Auth schemas
     Token, LoginRequest, RegisterRequest, UserResponse, HealthCheck,
@@ -31,31 +33,75 @@ from schemas_new import (
     TransactionCreate, TransactionResponse,
     # Communication schemas
     TeamNoteCreate, TeamNoteResponse, MessageCreate, MessageResponse,
+    # Document schemas
+    DocumentUploadCreate, DocumentUploadResponse, DocumentAnalysisJobResponse, DocumentLink,
+    # Job schemas
+    BackgroundJobResponse,
     # Utility schemas
-    PaginationParams, ApplicationFilters, DashboardStats, ErrorResponse,
-    PaginatedResponse
+    PaginationParams, ApplicationFilters, DashboardStats, ErrorResponse, MessageReadReceipt,
+    ApplicationEvent, MarkMessagesReadRequest, MessageReadStateResponse, InboxSummary,
+    PaginatedResponse, LoanApplicationPage, LoanApplicationSummaryPage, ApplicationFacets,
+    ApplicationSort, BulkStatusTransitionRequest, BulkStatusTransitionResponse, TransitionOutcome,
+    # Batch schemas
+    BatchApplicationsRequest, BatchApplicationsResponse,
+    # Search schemas
+    SearchKind, SearchResponse
 )
 from auth_enhanced import (
-    authenticate_user, create_access_token, create_user, get_current_user,
-    get_current_active_user, require_admin, require_analyst, require_any_staff,
-    hash_password, ACCESS_TOKEN_EXPIRE_MINUTES
+    authenticate_user, issue_access_token, create_user,
+    get_current_user, get_current_active_user, get_current_principal, Principal,
+    require_admin, require_analyst, require_any_staff,
+    hash_password, configure_password_hashing, decode_access_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from crud_operations import (
     # User operations
     get_user, get_users, update_user, deactivate_user,
     # Application operations
     create_loan_application, get_loan_application, get_loan_applications,
+    get_loan_application_summaries, get_application_version,
+    get_application_sections_batch, search_records, get_application_facets,
+    application_cursor, bulk_transition_application_status, application_in_scope,
     update_loan_application, delete_loan_application,
     # Transaction operations
     create_transaction, get_application_transactions,
+    # Document operations
+    create_document_upload, get_document_upload, complete_document_upload,
+    get_document, get_application_documents, delete_document_upload, delete_document, get_document_analysis_job,
+    request_document_analysis,
     # Communication operations
     create_team_note, get_application_team_notes,
     create_message, get_application_messages, mark_message_as_read,
+    mark_messages_read_up_to, get_inbox_summary,
     # Analytics
-    get_dashboard_stats,
+    get_dashboard_stats, application_change_listeners, application_event_listeners,
+    message_event_listeners, transaction_event_listeners,
     # System
     get_system_settings, get_system_setting, update_system_setting
 )
+from serialization import json_response, dump_json, DefaultJSONResponse
+from cache import ResponseCache, get_cache_backend
+from conditional import make_etag, etag_matches, cache_headers, not_modified, IMMUTABLE_CACHE_CONTROL
+from events import get_event_bus
+from analysis_worker import AnalysisWorker, ANALYSIS_WORKER_MODE
+from jobs import get_job_backend, PRIORITY_NORMAL
+from tasks import score_application_transactions, refresh_cash_flow_metrics
+from scheduler import Scheduler, leader_lock, SCHEDULER_ENABLED
+import maintenance  # noqa: F401 - registers the scheduled jobs
+from previews import PreviewCache, PreviewUnavailable, previewable, RENDER_VERSION
+from downloads import RangeFileResponse, modified_since, http_date
+from signed_urls import sign_document_token, verify_document_token, InvalidDocumentToken
+from uploads import (
+    UploadBusy, UploadTooLarge, size_limit, partial_path, create_partial, received_bytes,
+    upload_writer, append_stream, upload_digest, discard, storage_path
+)
+from realtime import (
+    FanoutHub, EventStream, StreamEvent, serve_subscription, sse_frames, next_payload,
+    CLOSE_POLICY_VIOLATION
+)
+from rate_limiter import (
+    RateLimitMiddleware, DEFAULT_RULES, RATE_LIMIT_ENABLED, get_rate_limit_backend
+)
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -67,8 +113,113 @@ try:
 except Exception as e:
     print(f"⚠️  Database initialization warning: {e}")
 
-# Rate limiting temporarily disabled due to compatibility issues
-# limiter = Limiter(key_func=get_remote_address, headers_enabled=True)
+# Dashboard stats are identical within an access scope; cache them per scope
+# and drop them whenever an application is written
+DASHBOARD_STATS_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_STATS_CACHE_TTL_SECONDS", "60"))
+response_cache_backend = get_cache_backend()
+dashboard_stats_cache = ResponseCache(
+    response_cache_backend, "dashboard_stats", DASHBOARD_STATS_CACHE_TTL_SECONDS
+)
+application_change_listeners.append(dashboard_stats_cache.invalidate)
+
+# Facet counts are cached per access scope and filter set on the same terms
+application_facets_cache = ResponseCache(
+    response_cache_backend, "application_facets", DASHBOARD_STATS_CACHE_TTL_SECONDS
+)
+application_change_listeners.append(application_facets_cache.invalidate)
+
+# Realtime events travel over the event bus so clients connected to any
+# worker see writes made on every worker
+event_bus = get_event_bus()
+
+# Per-application fan-out of new messages, read receipts and transactions to
+# WebSockets and long-polling message syncs
+message_hub = FanoutHub()
+MESSAGE_LONG_POLL_MAX_SECONDS = int(os.getenv("MESSAGE_LONG_POLL_MAX_SECONDS", "30"))
+MESSAGE_SYNC_MAX_LIMIT = 500
+
+
+def publish_feed_event(application_id: uuid.UUID, envelope: bytes, data: bytes):
+    """Publish a serialized event to an application's sockets on every worker."""
+    payload = b'{"type":"' + envelope + b'","data":' + data + b"}"
+    event_bus.publish("application_feed", str(application_id), payload.decode("utf-8"))
+
+
+def publish_message_event(event: str, message, actor_id: uuid.UUID):
+    """Serialize a message event once and broadcast it to the application's sockets."""
+    if event_bus.local and not message_hub.subscriber_count(message.application_id):
+        return
+    if event == "created":
+        publish_feed_event(message.application_id, b"message", dump_json(MessageResponse, message))
+    else:
+        publish_feed_event(message.application_id, b"read", dump_json(MessageReadReceipt, {
+            "message_id": message.id,
+            "application_id": message.application_id,
+            "reader_id": actor_id,
+            "read_at": message.read_at
+        }))
+
+
+def publish_transaction_event(event: str, transaction, actor_id: uuid.UUID):
+    """Serialize a new transaction once and broadcast it to the application's sockets."""
+    if event_bus.local and not message_hub.subscriber_count(transaction.application_id):
+        return
+    publish_feed_event(
+        transaction.application_id, b"transaction", dump_json(TransactionResponse, transaction)
+    )
+
+
+def queue_transaction_recompute(event: str, transaction, actor_id: uuid.UUID):
+    """Rescore anomalies and cash flow metrics in the background; queued
+    jobs coalesce, so a statement's worth of transactions costs one run."""
+    application_id = str(transaction.application_id)
+    score_application_transactions.delay(application_id)
+    refresh_cash_flow_metrics.delay(application_id)
+
+
+message_event_listeners.append(publish_message_event)
+transaction_event_listeners.append(publish_transaction_event)
+transaction_event_listeners.append(queue_transaction_recompute)
+event_bus.subscribe("application_feed", lambda events: message_hub.publish_many(
+    [(uuid.UUID(key), payload) for key, payload in events]
+))
+
+# Application created/status/assignment events for SSE dashboards, with a
+# bounded replay buffer for Last-Event-ID resume
+application_events = EventStream()
+
+
+def publish_application_event(event_type: str, details: dict):
+    """Serialize an application event once and publish it to every worker's stream."""
+    body = dump_json(ApplicationEvent, details).decode("utf-8")
+    event_bus.publish("application_events", event_type, body)
+
+
+def receive_application_events(events):
+    """Append application events from the bus to this worker's SSE stream."""
+    for event_type, body in events:
+        details = dict(ApplicationEvent.model_validate_json(body))
+        application_events.publish(event_type, details, body)
+
+
+application_event_listeners.append(publish_application_event)
+event_bus.subscribe("application_events", receive_application_events)
+
+
+def dashboard_scope(current_user: Principal) -> str:
+    """Cache scope for dashboard data: what the user's access filter can see."""
+    if current_user.role in [UserRole.admin, UserRole.analyst]:
+        return "all"
+    return f"{current_user.role.value}:{current_user.id}"
+
+
+def rate_limit_subject(token: str) -> Optional[str]:
+    """User a bearer token was issued to, checking only its signature and expiry."""
+    token_data = decode_access_token(token)
+    if token_data is None:
+        return None
+    return token_data.user_id or token_data.email
+
 
 # FastAPI app
 app = FastAPI(
@@ -76,12 +227,18 @@ app = FastAPI(
     description="Community Lending Platform API with Authentication & CRUD Operations",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=DefaultJSONResponse
 )
 
-# Rate limiting setup temporarily disabled
-# app.state.limiter = limiter
-# app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Rate limiting (token buckets per IP / verified user and route)
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=DEFAULT_RULES,
+    backend=get_rate_limit_backend(),
+    enabled=RATE_LIMIT_ENABLED,
+    identify=rate_limit_subject,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -96,6 +253,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -171,10 +329,7 @@ async def login(
         )
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value},
-        expires_delta=access_token_expires
-    )
+    access_token = issue_access_token(user, expires_delta=access_token_expires)
 
     return Token(
         access_token=access_token,
@@ -233,7 +388,7 @@ async def list_users(
     active_only: bool = True,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(require_any_staff),
+    current_user: Principal = Depends(require_any_staff),
     db: Session = Depends(get_db)
 ):
     """List users (staff only)."""
@@ -243,8 +398,8 @@ async def list_users(
 
 @app.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
-    user_id: str,
-    current_user: User = Depends(require_any_staff),
+    user_id: uuid.UUID,
+    current_user: Principal = Depends(require_any_staff),
     db: Session = Depends(get_db)
 ):
     """Get a specific user by ID (staff only)."""
@@ -259,10 +414,28 @@ async def get_user_by_id(
 
 # ===== LOAN APPLICATION ENDPOINTS =====
 
+def application_etag(
+    db: Session,
+    application_id: uuid.UUID,
+    current_user: Principal,
+    section: str
+) -> str:
+    """Strong ETag for an application view, from one fingerprint query."""
+    version = get_application_version(db, application_id, current_user, section)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan application not found"
+        )
+    # Borrowers see a filtered view (no private notes), so scope the tag
+    scope = "borrower" if current_user.role == UserRole.borrower else "staff"
+    return make_etag(section, scope, version)
+
+
 @app.post("/applications", response_model=LoanApplicationResponse)
 async def create_application(
     application_data: LoanApplicationCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new loan application."""
@@ -279,51 +452,99 @@ async def create_application(
     return LoanApplicationResponse.from_orm(application)
 
 
-@app.get("/applications", response_model=dict)
+@app.get("/applications", response_model=Union[LoanApplicationSummaryPage, LoanApplicationPage])
 async def list_applications(
     status: Optional[ApplicationStatus] = None,
     priority: Optional[ApplicationPriority] = None,
     page: int = 1,
     size: int = 20,
-    current_user: User = Depends(get_current_active_user),
+    sort: ApplicationSort = ApplicationSort.newest,
+    cursor: Optional[str] = None,
+    view: Literal["summary", "full"] = "summary",
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """List loan applications with filtering and pagination."""
+    """List loan applications with filtering and pagination.
+
+    Returns column-projected summaries by default; ``view=full`` returns
+    complete application records with nested users. Pass ``next_cursor``
+    back as ``cursor`` to page through a sort order without offsets.
+    """
     filters = ApplicationFilters(status=status, priority=priority)
-    pagination = PaginationParams(page=page, size=size)
+    pagination = PaginationParams(page=page, size=size, cursor=cursor)
     
-    applications, total = get_loan_applications(db, current_user, filters, pagination)
+    if view == "full":
+        applications, total = get_loan_applications(db, current_user, filters, pagination, sort)
+        page_schema = LoanApplicationPage
+    else:
+        applications, total = get_loan_application_summaries(db, current_user, filters, pagination, sort)
+        page_schema = LoanApplicationSummaryPage
     
-    return {
-        "items": [LoanApplicationResponse.from_orm(app) for app in applications],
+    next_cursor = application_cursor(applications[-1], sort) if len(applications) == size else None
+    
+    return json_response(page_schema, {
+        "items": applications,
         "total": total,
         "page": page,
         "size": size,
-        "pages": (total + size - 1) // size
-    }
+        "pages": (total + size - 1) // size,
+        "next_cursor": next_cursor
+    })
+
+
+@app.post("/applications/bulk/status", response_model=BulkStatusTransitionResponse)
+async def bulk_transition_status(
+    bulk: BulkStatusTransitionRequest,
+    current_user: Principal = Depends(require_any_staff),
+    db: Session = Depends(get_db)
+):
+    """Transition many applications' statuses in one transaction (e.g. committee decisions)."""
+    results = bulk_transition_application_status(db, bulk.transitions, current_user, bulk.reason)
+    updated = sum(1 for result in results if result["outcome"] == TransitionOutcome.updated)
+    return json_response(BulkStatusTransitionResponse, {"updated": updated, "results": results})
+
+
+@app.get("/applications/facets", response_model=ApplicationFacets)
+async def get_application_facet_counts(
+    filters: ApplicationFilters = Depends(),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Counts per status, priority, business type and loan officer for a filter set."""
+    scope = f"{dashboard_scope(current_user)}:{filters.model_dump_json(exclude_none=True)}"
+    body = application_facets_cache.get_or_set(
+        scope,
+        lambda: dump_json(ApplicationFacets, get_application_facets(db, current_user, filters))
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/applications/{application_id}", response_model=LoanApplicationResponse)
 async def get_application(
-    application_id: str,
-    current_user: User = Depends(get_current_active_user),
+    application_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get a specific loan application."""
+    """Get a specific loan application (supports If-None-Match)."""
+    etag = application_etag(db, application_id, current_user, "detail")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
     application = get_loan_application(db, application_id, current_user)
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Loan application not found"
         )
-    return LoanApplicationResponse.from_orm(application)
+    return json_response(LoanApplicationResponse, application, headers=cache_headers(etag))
 
 
 @app.put("/applications/{application_id}", response_model=LoanApplicationResponse)
 async def update_application(
-    application_id: str,
+    application_id: uuid.UUID,
     update_data: LoanApplicationUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update a loan application."""
@@ -338,8 +559,8 @@ async def update_application(
 
 @app.delete("/applications/{application_id}")
 async def delete_application(
-    application_id: str,
-    current_user: User = Depends(require_admin),
+    application_id: uuid.UUID,
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete a loan application (admin only)."""
@@ -356,9 +577,9 @@ async def delete_application(
 
 @app.post("/applications/{application_id}/transactions", response_model=TransactionResponse)
 async def add_transaction(
-    application_id: str,
+    application_id: uuid.UUID,
     transaction_data: TransactionCreate,
-    current_user: User = Depends(require_any_staff),
+    current_user: Principal = Depends(require_any_staff),
     db: Session = Depends(get_db)
 ):
     """Add a transaction to an application."""
@@ -371,22 +592,65 @@ async def add_transaction(
 
 @app.get("/applications/{application_id}/transactions", response_model=List[TransactionResponse])
 async def get_application_transactions_endpoint(
-    application_id: str,
-    current_user: User = Depends(get_current_active_user),
+    application_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get transactions for an application."""
+    """Get transactions for an application (supports If-None-Match)."""
+    etag = application_etag(db, application_id, current_user, "transactions")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
     transactions = get_application_transactions(db, application_id, current_user)
-    return [TransactionResponse.from_orm(txn) for txn in transactions]
+    return json_response(List[TransactionResponse], transactions, headers=cache_headers(etag))
+
+
+@app.post(
+    "/applications/{application_id}/transactions/rescore",
+    response_model=BackgroundJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def rescore_application_transactions(
+    application_id: uuid.UUID,
+    current_user: Principal = Depends(require_any_staff),
+    db: Session = Depends(get_db)
+):
+    """Queue an anomaly rescore of an application's transactions (staff only)."""
+    if not get_loan_application(db, application_id, current_user, load_relationships=False):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan application not found"
+        )
+    job_id = score_application_transactions.apply_async((str(application_id),), priority=PRIORITY_NORMAL)
+    job = get_job_backend().status(job_id)
+    return json_response(BackgroundJobResponse, job, status_code=status.HTTP_202_ACCEPTED)
+
+
+# ===== BACKGROUND JOB ENDPOINTS =====
+
+@app.get("/jobs/{job_id}", response_model=BackgroundJobResponse)
+async def get_job_status(
+    job_id: str,
+    current_user: Principal = Depends(require_any_staff)
+):
+    """Get the status of a background job (staff only)."""
+    job = get_job_backend().status(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return json_response(BackgroundJobResponse, job)
 
 
 # ===== TEAM NOTES ENDPOINTS =====
 
 @app.post("/applications/{application_id}/notes", response_model=TeamNoteResponse)
 async def add_team_note(
-    application_id: str,
+    application_id: uuid.UUID,
     note_data: TeamNoteCreate,
-    current_user: User = Depends(require_any_staff),
+    current_user: Principal = Depends(require_any_staff),
     db: Session = Depends(get_db)
 ):
     """Add a team note to an application."""
@@ -397,22 +661,27 @@ async def add_team_note(
 
 @app.get("/applications/{application_id}/notes", response_model=List[TeamNoteResponse])
 async def get_application_notes(
-    application_id: str,
-    current_user: User = Depends(get_current_active_user),
+    application_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get team notes for an application."""
+    """Get team notes for an application (supports If-None-Match)."""
+    etag = application_etag(db, application_id, current_user, "notes")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
     notes = get_application_team_notes(db, application_id, current_user)
-    return [TeamNoteResponse.from_orm(note) for note in notes]
+    return json_response(List[TeamNoteResponse], notes, headers=cache_headers(etag))
 
 
 # ===== MESSAGING ENDPOINTS =====
 
 @app.post("/applications/{application_id}/messages", response_model=MessageResponse)
 async def send_message(
-    application_id: str,
+    application_id: uuid.UUID,
     message_data: MessageCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Send a message on an application."""
@@ -429,19 +698,53 @@ async def send_message(
 
 @app.get("/applications/{application_id}/messages", response_model=List[MessageResponse])
 async def get_application_messages_endpoint(
-    application_id: str,
-    current_user: User = Depends(get_current_active_user),
+    application_id: uuid.UUID,
+    request: Request,
+    since: Optional[datetime] = None,
+    after_id: Optional[uuid.UUID] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MESSAGE_SYNC_MAX_LIMIT),
+    wait: int = Query(0, ge=0, le=MESSAGE_LONG_POLL_MAX_SECONDS),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get messages for an application."""
-    messages = get_application_messages(db, application_id, current_user)
-    return [MessageResponse.from_orm(msg) for msg in messages]
+    """Get messages for an application.
+
+    Full fetches support If-None-Match. For incremental sync pass the last
+    message's ``created_at`` as ``since`` and its id as ``after_id``. With
+    ``wait`` (seconds), an empty result long-polls: the database connection
+    is returned to the pool and the request is answered as soon as a new
+    message is posted on this worker, or with what's there at the timeout.
+    """
+    headers = None
+    if since is None and after_id is None:
+        etag = application_etag(db, application_id, current_user, "messages")
+        if not wait and etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        headers = cache_headers(etag)
+    
+    # Subscribe before querying so a message posted in between still wakes us
+    subscription = message_hub.subscribe(application_id) if wait else None
+    try:
+        messages = get_application_messages(db, application_id, current_user, since, after_id, limit)
+        if not messages and subscription is not None:
+            db.close()
+            arrived = await next_payload(
+                subscription, wait, lambda payload: json.loads(payload)["type"] == "message"
+            )
+            if arrived is not None:
+                messages = get_application_messages(db, application_id, current_user, since, after_id, limit)
+                headers = None  # The ETag predates the new message
+    finally:
+        if subscription is not None:
+            message_hub.unsubscribe(subscription)
+    
+    return json_response(List[MessageResponse], messages, headers=headers)
 
 
 @app.put("/messages/{message_id}/read", response_model=MessageResponse)
 async def mark_message_read(
-    message_id: str,
-    current_user: User = Depends(get_current_active_user),
+    message_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Mark a message as read."""
@@ -454,23 +757,610 @@ async def mark_message_read(
     return MessageResponse.from_orm(message)
 
 
+@app.post("/applications/{application_id}/messages/read", response_model=MessageReadStateResponse)
+async def mark_messages_read(
+    application_id: uuid.UUID,
+    request: MarkMessagesReadRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Mark all messages from others up to and including one as read."""
+    state = mark_messages_read_up_to(db, application_id, request.up_to_message_id, current_user)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    return json_response(MessageReadStateResponse, state)
+
+
+@app.get("/messages/inbox", response_model=InboxSummary)
+async def get_inbox(
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Unread message counts for every accessible application the user follows."""
+    return json_response(InboxSummary, get_inbox_summary(db, current_user))
+
+
+# ===== DOCUMENT ENDPOINTS =====
+
+# Background analysis of completed uploads (see analysis_worker)
+analysis_worker = AnalysisWorker() if ANALYSIS_WORKER_MODE == "embedded" else None
+
+
+def wake_analysis():
+    if analysis_worker is not None:
+        analysis_worker.wake()
+
+
+# Periodic maintenance (see maintenance); every worker ticks, the leader runs
+scheduler = Scheduler(leader_lock(engine)) if SCHEDULER_ENABLED else None
+
+# Rendered first-page previews, cached on disk by content hash
+preview_cache = PreviewCache()
+
+
+async def upload_status(upload, document=None) -> dict:
+    """Progress of an upload, with the offset read from the partial file."""
+    completed = upload.completed_at is not None
+    return {
+        "id": upload.id,
+        "application_id": upload.application_id,
+        "name": upload.name,
+        "type": upload.type,
+        "size": upload.size,
+        "offset": upload.size if completed else await received_bytes(partial_path(upload.id)),
+        "max_size": size_limit(upload.type.value),
+        "completed": completed,
+        "document": document,
+    }
+
+
+@app.post(
+    "/applications/{application_id}/uploads",
+    response_model=DocumentUploadResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def start_document_upload(
+    application_id: uuid.UUID,
+    upload_data: DocumentUploadCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable document upload.
+
+    The declared size is checked against the document type's limit before
+    any bytes are sent. Send the file with PUT /uploads/{id}. Declaring the
+    file's ``sha256`` lets content the borrower has already uploaded be
+    reused: the upload then comes back completed and nothing is sent.
+    """
+    upload = create_document_upload(db, application_id, upload_data, current_user)
+    document = None
+    if upload.completed_at is not None:
+        document = db.get(Document, upload.document_id)
+        wake_analysis()
+    else:
+        await create_partial(upload.id)
+    return json_response(
+        DocumentUploadResponse,
+        await upload_status(upload, document),
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+@app.get("/uploads/{upload_id}", response_model=DocumentUploadResponse)
+async def get_document_upload_status(
+    upload_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get an upload's progress; ``offset`` is where to resume."""
+    upload = get_document_upload(db, upload_id, current_user)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    document = db.get(Document, upload.document_id) if upload.document_id else None
+    return json_response(DocumentUploadResponse, await upload_status(upload, document))
+
+
+@app.put("/uploads/{upload_id}", response_model=DocumentUploadResponse)
+async def append_document_upload(
+    upload_id: uuid.UUID,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Append the raw request body to an upload at ``Upload-Offset``.
+
+    The body is streamed to disk and hashed as it arrives, without holding
+    a database connection. After an interruption, GET the upload for the
+    offset to resume from. The request that delivers the last byte turns
+    the upload into a Document, stored once per distinct content; if the
+    upload declared a ``sha256`` that the content doesn't match, the bytes
+    are discarded and the request fails with 422. A second append while
+    one is running, on any worker, fails with 409.
+    """
+    upload = get_document_upload(db, upload_id, current_user)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    if upload.completed_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already completed"
+        )
+    
+    try:
+        declared_length = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        declared_length = -1
+    if declared_length < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Content-Length header"
+        )
+    
+    try:
+        with upload_writer(upload.id):
+            path = partial_path(upload.id)
+            offset = await received_bytes(path)
+            if upload_offset != offset:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload is at offset {offset}",
+                    headers={"Upload-Offset": str(offset)}
+                )
+            if offset + declared_length > upload.size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Upload is limited to its declared size of {upload.size} bytes"
+                )
+            
+            db.close()
+            try:
+                offset = await append_stream(upload.id, path, offset, request.stream(), upload.size)
+            except UploadTooLarge:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Upload is limited to its declared size of {upload.size} bytes"
+                )
+            except ClientDisconnect:
+                # Nobody is listening; the bytes received so far are kept
+                return Response(status_code=status.HTTP_400_BAD_REQUEST)
+            
+            document = None
+            if offset == upload.size:
+                digest = await upload_digest(upload.id, path, upload.size)
+                if upload.sha256 and digest != upload.sha256:
+                    await discard(upload.id, path)
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Uploaded content does not match the declared sha256"
+                    )
+                document = complete_document_upload(db, upload, digest, path)
+                wake_analysis()
+            return json_response(DocumentUploadResponse, await upload_status(upload, document))
+    except UploadBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already in progress"
+        )
+
+
+@app.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_document_upload(
+    upload_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Abandon an unfinished upload and delete its partial file."""
+    upload = get_document_upload(db, upload_id, current_user)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    if upload.completed_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already completed"
+        )
+    await discard(upload.id, partial_path(upload.id))
+    delete_document_upload(db, upload)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+async def serve_file(
+    request: Request,
+    path,
+    etag: Optional[str],
+    last_modified: Optional[float],
+    name: str,
+    media_type: Optional[str]
+) -> Response:
+    """Stream a stored file with conditional and Range request handling."""
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document file not found"
+        )
+    etag = etag or make_etag(str(path), stat_result.st_size, stat_result.st_mtime)
+    last_modified = last_modified or stat_result.st_mtime
+    headers = {
+        **cache_headers(etag, IMMUTABLE_CACHE_CONTROL),
+        "Last-Modified": http_date(last_modified),
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        unchanged = etag_matches(if_none_match, etag)
+    else:
+        unchanged = not modified_since(request.headers.get("if-modified-since"), last_modified)
+    if unchanged:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return RangeFileResponse(
+        path,
+        stat_result,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+        headers=headers,
+        media_type=media_type or mimetypes.guess_type(name)[0] or "application/octet-stream",
+        filename=name,
+        method=request.method
+    )
+
+
+async def serve_preview(
+    request: Request,
+    source,
+    mime_type: Optional[str],
+    content_key: str,
+    size: str
+) -> Response:
+    """Serve a cached first-page preview, rendering it on first request."""
+    if not previewable(mime_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="No preview available for this document type"
+        )
+    etag = make_etag(content_key, size, RENDER_VERSION)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+    try:
+        path = await preview_cache.get(source, mime_type, content_key, size)
+    except (PreviewUnavailable, FileNotFoundError):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="No preview available for this document"
+        )
+    return FileResponse(
+        path, media_type="image/jpeg", headers=cache_headers(etag, IMMUTABLE_CACHE_CONTROL)
+    )
+
+
+@app.api_route("/documents/{document_id}/download", methods=["GET", "HEAD"], response_class=FileResponse)
+async def download_document(
+    document_id: uuid.UUID,
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Download a document's file, streamed from disk.
+
+    Supports single ``Range`` requests for resuming and seeking. The ETag
+    is the content's sha256, so downloads revalidate with a 304 and are
+    cached as immutable.
+    """
+    document = get_document(db, document_id, current_user)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    path = storage_path(document.file_path)
+    uploaded_at = document.uploaded_at
+    if uploaded_at is not None and uploaded_at.tzinfo is None:
+        uploaded_at = uploaded_at.replace(tzinfo=timezone.utc)
+    etag = f'"{document.sha256}"' if document.sha256 else None
+    name, mime_type = document.name, document.mime_type
+    db.close()  # Don't hold a connection for the length of the download
+    
+    return await serve_file(
+        request, path, etag, uploaded_at.timestamp() if uploaded_at else None, name, mime_type
+    )
+
+
+@app.get("/documents/{document_id}/preview", response_class=FileResponse)
+async def get_document_preview(
+    document_id: uuid.UUID,
+    request: Request,
+    size: Literal["thumbnail", "preview"] = Query("thumbnail"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """JPEG of a document's first page, rendered on first request.
+
+    Previews are immutable for a document, so clients and the browser
+    cache keep them for a year.
+    """
+    document = get_document(db, document_id, current_user)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    mime_type = document.mime_type or mimetypes.guess_type(document.name)[0]
+    content_key = document.sha256 or document.id.hex
+    source = storage_path(document.file_path)
+    db.close()
+    return await serve_preview(request, source, mime_type, content_key, size)
+
+
+def document_link(document: Document, variant: str) -> dict:
+    token, expires = sign_document_token(
+        variant, document.id.hex, document.file_path, document.name,
+        document.mime_type or mimetypes.guess_type(document.name)[0], document.sha256
+    )
+    return {
+        "document_id": document.id,
+        "variant": variant,
+        "url": f"/files/{token}",
+        "expires_at": datetime.fromtimestamp(expires, timezone.utc),
+    }
+
+
+@app.get("/documents/{document_id}/link", response_model=DocumentLink)
+async def get_document_link(
+    document_id: uuid.UUID,
+    variant: Literal["download", "thumbnail", "preview"] = Query("download"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Short-lived signed URL for a document, fetchable without credentials."""
+    document = get_document(db, document_id, current_user)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return json_response(DocumentLink, document_link(document, variant))
+
+
+@app.get("/applications/{application_id}/document-links", response_model=List[DocumentLink])
+async def get_application_document_links(
+    application_id: uuid.UUID,
+    variant: Literal["download", "thumbnail", "preview"] = Query("thumbnail"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Signed URLs for every document of an application after one access
+    check; preview variants skip documents that have no preview."""
+    documents = get_application_documents(db, application_id, current_user)
+    if variant != "download":
+        documents = [
+            document for document in documents
+            if previewable(document.mime_type or mimetypes.guess_type(document.name)[0])
+        ]
+    return json_response(List[DocumentLink], [document_link(document, variant) for document in documents])
+
+
+@app.api_route("/files/{token}", methods=["GET", "HEAD"], response_class=FileResponse)
+async def serve_signed_file(token: str, request: Request):
+    """Serve a signed document URL. Only the token's signature and expiry
+    are checked; there is no database access on this route."""
+    try:
+        grant = verify_document_token(token)
+    except InvalidDocumentToken:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired link"
+        )
+    source = storage_path(grant.key)
+    if grant.variant == "download":
+        etag = f'"{grant.sha256}"' if grant.sha256 else None
+        return await serve_file(request, source, etag, None, grant.name, grant.mime_type)
+    return await serve_preview(
+        request, source, grant.mime_type, grant.sha256 or grant.document_id, grant.variant
+    )
+
+
+@app.get("/documents/{document_id}/analysis", response_model=DocumentAnalysisJobResponse)
+async def get_document_analysis(
+    document_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get the status of a document's background analysis."""
+    job = get_document_analysis_job(db, document_id, current_user)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document analysis not found"
+        )
+    return json_response(DocumentAnalysisJobResponse, job)
+
+
+@app.post(
+    "/documents/{document_id}/analysis",
+    response_model=DocumentAnalysisJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def reanalyze_document(
+    document_id: uuid.UUID,
+    current_user: Principal = Depends(require_any_staff),
+    db: Session = Depends(get_db)
+):
+    """Queue a document to be analyzed again (staff only)."""
+    job = request_document_analysis(db, document_id, current_user)
+    wake_analysis()
+    return json_response(DocumentAnalysisJobResponse, job, status_code=status.HTTP_202_ACCEPTED)
+
+
+@app.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document_endpoint(
+    document_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Delete a document; its file is removed once no document references it."""
+    if not delete_document(db, document_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# ===== REALTIME ENDPOINTS =====
+
+@app.websocket("/ws/applications/{application_id}")
+async def application_socket(
+    websocket: WebSocket,
+    application_id: uuid.UUID,
+    token: Optional[str] = None
+):
+    """Push new messages, read receipts and transactions for an application.
+
+    Authenticates with the access token as ``?token=`` (browsers can't set
+    headers on WebSocket requests) or a Bearer Authorization header. The
+    database session is released before the connection starts waiting.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    
+    application = None
+    if token:
+        db = SessionLocal()
+        try:
+            current_user = await get_current_principal(token, db)
+            application = get_loan_application(db, application_id, current_user, load_relationships=False)
+        except HTTPException:
+            application = None
+        finally:
+            db.close()
+    
+    if application is None:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    await serve_subscription(websocket, message_hub.subscribe(application_id))
+
+
+@app.get("/events/applications")
+async def application_event_stream(
+    request: Request,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-Sent Events for applications in the caller's access scope.
+
+    Streams ``application_created``, ``status_changed`` and ``assigned``
+    events. Browsers' EventSource can't set headers, so the access token may
+    be passed as ``?token=``; on reconnect the ``Last-Event-ID`` header
+    replays missed events, or a ``reset`` event tells the client to refetch.
+    """
+    authorization = request.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    db = SessionLocal()
+    try:
+        current_user = await get_current_principal(token, db)
+    finally:
+        db.close()
+    
+    def visible(event: StreamEvent) -> bool:
+        details = event.data
+        return any(
+            application_in_scope(
+                current_user, details["borrower_id"], details["loan_officer_id"],
+                details["underwriter_id"], event_status
+            )
+            for event_status in (details["status"], details["old_status"])
+            if event_status is not None
+        )
+    
+    return StreamingResponse(
+        sse_frames(application_events, last_event_id, visible),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ===== SEARCH ENDPOINTS =====
+
+@app.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    kinds: Optional[List[SearchKind]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Ranked full-text search across applications, notes and messages the user can see."""
+    items = search_records(db, q, current_user, kinds, limit)
+    return json_response(SearchResponse, {"query": q, "items": items})
+
+
+# ===== BATCH ENDPOINTS =====
+
+@app.post("/batch/applications", response_model=BatchApplicationsResponse)
+async def batch_read_applications(
+    batch: BatchApplicationsRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Read sections of several applications in one request.
+
+    Access is checked once for all ids and each section is loaded with a
+    single query; inaccessible or unknown ids are reported, not raised.
+    """
+    items, not_found, forbidden = get_application_sections_batch(
+        db, batch.application_ids, batch.sections, current_user
+    )
+    return json_response(BatchApplicationsResponse, {
+        "items": items,
+        "not_found": not_found,
+        "forbidden": forbidden
+    })
+
+
 # ===== DASHBOARD & ANALYTICS ENDPOINTS =====
 
 @app.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_statistics(
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get dashboard statistics for current user."""
-    stats = get_dashboard_stats(db, current_user)
-    return stats
+    """Get dashboard statistics for current user (cached per access scope)."""
+    body = dashboard_stats_cache.get_or_set(
+        dashboard_scope(current_user),
+        lambda: dump_json(DashboardStats, get_dashboard_stats(db, current_user))
+    )
+    return Response(content=body, media_type="application/json")
 
 
 # ===== SYSTEM ADMINISTRATION ENDPOINTS =====
 
 @app.get("/admin/settings")
 async def get_settings(
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get system settings (admin only)."""
@@ -481,7 +1371,7 @@ async def get_settings(
 @app.get("/admin/settings/{setting_key}")
 async def get_setting(
     setting_key: str,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get a specific system setting (admin only)."""
@@ -530,15 +1420,28 @@ if os.getenv("DEBUG", "false").lower() == "true":
 async def startup_event():
     """Startup tasks."""
     print("🚀 Caelo API Starting Up...")
+    bcrypt_rounds = configure_password_hashing()
+    print(f"🔑 Password hashing: bcrypt cost {bcrypt_rounds}")
     print(f"📊 Database: PostgreSQL")
     print(f"🔐 JWT Expiry: {ACCESS_TOKEN_EXPIRE_MINUTES} minutes")
     print(f"🌐 CORS Origins configured")
     print(f"✅ API Documentation: /docs")
+    event_bus.start()
+    if analysis_worker is not None:
+        await analysis_worker.start()
+    if scheduler is not None:
+        scheduler.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
+    if analysis_worker is not None:
+        await analysis_worker.close()
+    if scheduler is not None:
+        await asyncio.to_thread(scheduler.close)
+    await asyncio.to_thread(get_job_backend().close)
+    event_bus.close()
     print("👋 Caelo API Shutting Down...")
 
 
@@ -0,0 +1,143 @@
+"""
+Scheduled Maintenance for Caelo Backend.
+
+The periodic jobs run by the ``scheduler`` leader: the daily
+``ApplicationMetrics`` rollup, priority escalation of applications left
+pending too long, a sweep recomputing every application's anomaly
+baseline, and expiry of abandoned resumable uploads. Work is done in
+batches of ``SCHEDULER_BATCH_SIZE``, each in its own short transaction,
+until the job's deadline.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from database import SessionLocal
+from models_new import ApplicationPriority
+from crud_operations import (
+    rollup_application_metrics,
+    escalate_stale_applications,
+    get_transaction_application_ids,
+    score_transaction_anomalies,
+    get_system_setting,
+    update_system_setting,
+    get_stale_document_uploads,
+    expire_document_uploads,
+)
+from scheduler import scheduled
+from uploads import discard, partial_path
+
+
+# Configuration
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "200"))
+METRICS_ROLLUP_SCHEDULE = os.getenv("METRICS_ROLLUP_SCHEDULE", "10 0 * * *")
+ESCALATION_SCHEDULE = os.getenv("ESCALATION_SCHEDULE", "*/15 * * * *")
+ANOMALY_BASELINE_SCHEDULE = os.getenv("ANOMALY_BASELINE_SCHEDULE", "30 2 * * *")
+UPLOAD_EXPIRY_SCHEDULE = os.getenv("UPLOAD_EXPIRY_SCHEDULE", "45 * * * *")
+# Pending applications older than these are raised to high, then urgent
+ESCALATE_HIGH_AFTER_DAYS = float(os.getenv("ESCALATE_HIGH_AFTER_DAYS", "3"))
+ESCALATE_URGENT_AFTER_DAYS = float(os.getenv("ESCALATE_URGENT_AFTER_DAYS", "7"))
+# Unfinished resumable uploads started longer ago than this are deleted
+UPLOAD_EXPIRE_AFTER_HOURS = float(os.getenv("UPLOAD_EXPIRE_AFTER_HOURS", "72"))
+
+
+@scheduled(METRICS_ROLLUP_SCHEDULE)
+def daily_metrics_rollup(deadline: float):
+    """Record yesterday's ApplicationMetrics row."""
+    db = SessionLocal()
+    try:
+        rollup_application_metrics(db, datetime.now(timezone.utc) - timedelta(days=1))
+    finally:
+        db.close()
+
+
+@scheduled(ESCALATION_SCHEDULE, max_runtime=60)
+def escalate_stale_pending_applications(deadline: float):
+    """Raise the priority of applications that have waited too long."""
+    now = datetime.now(timezone.utc)
+    tiers = [
+        (ApplicationPriority.urgent, now - timedelta(days=ESCALATE_URGENT_AFTER_DAYS)),
+        (ApplicationPriority.high, now - timedelta(days=ESCALATE_HIGH_AFTER_DAYS)),
+    ]
+    db = SessionLocal()
+    try:
+        for priority, cutoff in tiers:
+            while time.monotonic() < deadline:
+                if (
+                    escalate_stale_applications(
+                        db, cutoff, priority, SCHEDULER_BATCH_SIZE
+                    )
+                    < SCHEDULER_BATCH_SIZE
+                ):
+                    break
+    finally:
+        db.close()
+
+
+# System setting recording where the baseline sweep stopped at its last
+# deadline, so any leader (or a restarted one) resumes from there
+BASELINE_CURSOR_SETTING = "anomaly_baseline_cursor"
+
+
+@scheduled(ANOMALY_BASELINE_SCHEDULE, max_runtime=600)
+def recompute_anomaly_baselines(deadline: float):
+    """Rescore each application's transactions against its current baseline.
+
+    Catches up on rescores queued jobs lost (the local job backend keeps
+    its queue in memory) and applies ANOMALY_Z_THRESHOLD changes. A sweep
+    cut short by the deadline resumes where it stopped on the next run.
+    """
+    db = SessionLocal()
+    try:
+        setting = get_system_setting(db, BASELINE_CURSOR_SETTING)
+        saved = setting.value.get("after") if setting else None
+        after = uuid.UUID(saved) if saved else None
+        swept = False
+        while not swept and time.monotonic() < deadline:
+            application_ids = get_transaction_application_ids(
+                db, after, SCHEDULER_BATCH_SIZE
+            )
+            for application_id in application_ids:
+                if time.monotonic() >= deadline:
+                    break
+                score_transaction_anomalies(db, application_id)
+                after = application_id
+            else:
+                swept = len(application_ids) < SCHEDULER_BATCH_SIZE
+            # Saved every batch, so a leader that dies mid-sweep loses one batch at most
+            update_system_setting(
+                db,
+                BASELINE_CURSOR_SETTING,
+                {"after": None if swept or after is None else str(after)},
+                "Application the anomaly baseline sweep resumes after",
+            )
+    finally:
+        db.close()
+
+
+async def _discard_partials(upload_ids):
+    await asyncio.gather(
+        *(discard(upload_id, partial_path(upload_id)) for upload_id in upload_ids)
+    )
+
+
+@scheduled(UPLOAD_EXPIRY_SCHEDULE, max_runtime=60)
+def expire_abandoned_uploads(deadline: float):
+    """Delete uploads left unfinished for UPLOAD_EXPIRE_AFTER_HOURS, and
+    their partial files."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=UPLOAD_EXPIRE_AFTER_HOURS)
+    db = SessionLocal()
+    try:
+        while time.monotonic() < deadline:
+            upload_ids = get_stale_document_uploads(db, cutoff, SCHEDULER_BATCH_SIZE)
+            db.rollback()  # Don't hold the read transaction across the file removals
+            # Files first: if this stops midway, the rows are found again next run
+            asyncio.run(_discard_partials(upload_ids))
+            expire_document_uploads(db, upload_ids)
+            if len(upload_ids) < SCHEDULER_BATCH_SIZE:
+                break
+    finally:
+        db.close()
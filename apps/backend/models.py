@@ -1,8 +1,12 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
-from database import Base
 import enum
 
+# The legacy API keeps its own metadata: models_new also maps "users", and
+# sharing database.Base would stop the two being imported in one process
+Base = declarative_base()
+
 
 class UserRole(str, enum.Enum):
     admin = "admin"
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Enum, Text, 
-    Numeric, ForeignKey, JSON, UUID, Float
+    Numeric, ForeignKey, JSON, UUID, Float, SmallInteger, BigInteger, Computed, Index, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -65,6 +65,13 @@ class IndustryRisk(str, enum.Enum):
     high = "high"
 
 
+class AnalysisJobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
 # ===== CORE MODELS =====
 
 class User(Base):
@@ -77,6 +84,7 @@ class User(Base):
     name = Column(String(255), nullable=False)
     organization = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped to revoke issued tokens
     last_login = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -103,6 +111,12 @@ class LoanApplication(Base):
     # Status & Priority
     status = Column(Enum(ApplicationStatus), default=ApplicationStatus.pending, index=True)
     priority = Column(Enum(ApplicationPriority), default=ApplicationPriority.medium, index=True)
+    # Sortable urgency (low=0 .. urgent=3); stored names don't sort in urgency order
+    priority_rank = Column(SmallInteger, Computed(
+        "CASE priority WHEN 'low' THEN 0 WHEN 'medium' THEN 1 "
+        "WHEN 'high' THEN 2 WHEN 'urgent' THEN 3 ELSE 1 END",
+        persisted=True
+    ))
     
     # Assignment
     borrower_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
@@ -132,6 +146,26 @@ class LoanApplication(Base):
     messages = relationship("Message", back_populates="application")
     financial_analyses = relationship("FinancialAnalysis", back_populates="application")
 
+    # Composite indexes backing each whitelisted queue sort (see APPLICATION_SORTS
+    # in crud_operations), each ending in id for stable keyset cursors
+    __table_args__ = (
+        Index("ix_loan_applications_date_id", "application_date", "id"),
+        Index("ix_loan_applications_priority_amount_id", "priority_rank", "loan_amount", "id"),
+        Index("ix_loan_applications_priority_age_id",
+              text("priority_rank DESC"), "application_date", "id"),
+        Index("ix_loan_applications_amount_id", "loan_amount", "id"),
+        # Risk sorts put unscored applications last: SQLite's native NULL
+        # ordering does that on a backward scan, PostgreSQL needs it declared
+        Index("ix_loan_applications_priority_risk_id",
+              "priority_rank", "risk_score", "id").ddl_if(dialect="sqlite"),
+        Index("ix_loan_applications_risk_id", "risk_score", "id").ddl_if(dialect="sqlite"),
+        Index("ix_loan_applications_priority_risk_id",
+              text("priority_rank DESC"), text("risk_score DESC NULLS LAST"),
+              text("id DESC")).ddl_if(dialect="postgresql"),
+        Index("ix_loan_applications_risk_id",
+              text("risk_score DESC NULLS LAST"), text("id DESC")).ddl_if(dialect="postgresql"),
+    )
+
 
 class BusinessMetrics(Base):
     __tablename__ = "business_metrics"
@@ -178,6 +212,8 @@ class Transaction(Base):
     
     id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     application_id = Column(PostgresUUID(as_uuid=True), ForeignKey("loan_applications.id"), nullable=False, index=True)
+    # Statement the transaction was extracted from, if any
+    document_id = Column(PostgresUUID(as_uuid=True), ForeignKey("documents.id"), nullable=True, index=True)
     
     # Transaction Details
     transaction_date = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -214,17 +250,88 @@ class Document(Base):
     file_path = Column(String(512), nullable=False)
     file_size = Column(Integer, nullable=True)  # in bytes
     mime_type = Column(String(100), nullable=True)
+    sha256 = Column(String(64), nullable=True, index=True)  # Hex digest of the file contents
     
     # Analysis Results
     is_analyzed = Column(Boolean, default=False)
     analysis_results = Column(JSON, nullable=True)  # Store extracted data
     
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())  # Analysis writes, for ETags
     
     # Relationships
     application = relationship("LoanApplication", back_populates="documents")
 
 
+class StoredBlob(Base):
+    """File content stored once under its SHA-256, shared by documents.
+
+    ``ref_count`` counts the documents whose ``sha256`` points here. At
+    zero the file and row are purged under the row lock; until then an
+    upload of the same content can revive the row.
+    """
+    __tablename__ = "stored_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DocumentAnalysisJob(Base):
+    """Queued background analysis of one document.
+
+    Workers claim due jobs (``run_after`` passed) and push ``run_after``
+    out by a lease while they run, so a job whose worker died is claimed
+    again once the lease expires. Failed attempts are retried with backoff
+    until ``max_attempts``.
+    """
+    __tablename__ = "document_analysis_jobs"
+    
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(PostgresUUID(as_uuid=True), ForeignKey("documents.id"), nullable=False, unique=True)
+    requested_by = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    
+    status = Column(Enum(AnalysisJobStatus), nullable=False, default=AnalysisJobStatus.queued)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Claim query: due jobs in order
+        Index("ix_document_analysis_jobs_status_run_after", "status", "run_after"),
+    )
+
+
+class DocumentUpload(Base):
+    """A resumable upload in progress; becomes a Document when complete.
+
+    The bytes received so far are the partial file's size on disk, not a
+    column, so an interrupted request never leaves the two out of step.
+    """
+    __tablename__ = "document_uploads"
+    
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    application_id = Column(PostgresUUID(as_uuid=True), ForeignKey("loan_applications.id"), nullable=False, index=True)
+    uploader_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    
+    # Declared by the client up front; checked against per-type limits
+    name = Column(String(255), nullable=False)
+    type = Column(Enum(DocumentType), nullable=False)
+    mime_type = Column(String(100), nullable=True)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=True)  # Optional; enables dedup before sending bytes
+    
+    document_id = Column(PostgresUUID(as_uuid=True), ForeignKey("documents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class TeamNote(Base):
     __tablename__ = "team_notes"
     
@@ -262,6 +369,50 @@ class Message(Base):
     # Relationships
     application = relationship("LoanApplication", back_populates="messages")
     sender = relationship("User", back_populates="messages_sent")
+    
+    __table_args__ = (
+        # Conversations are read in this order, and synced from a (created_at, id) cursor
+        Index("ix_messages_application_created_id", "application_id", "created_at", "id"),
+    )
+
+
+class MessageReadState(Base):
+    """Per-user read marker and unread counter for an application's messages.
+
+    ``unread_count`` is maintained on write: messages from others after the
+    marker that the user hasn't read on their own (see MessageReceipt). Rows are created on demand for the borrower and assigned staff
+    when a message is posted or staff are assigned, and for anyone who
+    sends or reads a message.
+    """
+    __tablename__ = "message_read_states"
+    
+    application_id = Column(PostgresUUID(as_uuid=True), ForeignKey("loan_applications.id"), primary_key=True)
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    
+    # Marker: the newest message the user has read, in (created_at, id) order
+    last_read_message_id = Column(PostgresUUID(as_uuid=True), ForeignKey("messages.id"), nullable=True)
+    last_read_at = Column(DateTime(timezone=True), nullable=True)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Inbox summaries read every row of one user
+        Index("ix_message_read_states_user_application", "user_id", "application_id"),
+    )
+
+
+class MessageReceipt(Base):
+    """A single message read by one user ahead of their read marker.
+
+    Lets a message be taken off that user's unread count exactly once.
+    Receipts at or before the marker are redundant and pruned when it moves.
+    """
+    __tablename__ = "message_receipts"
+
+    message_id = Column(PostgresUUID(as_uuid=True), ForeignKey("messages.id"), primary_key=True)
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    read_at = Column(DateTime(timezone=True), nullable=False)
 
 
 # ===== ANALYSIS MODELS =====
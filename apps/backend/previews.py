@@ -0,0 +1,242 @@
+"""
+Document Previews for Caelo Backend.
+
+Renders a small JPEG of a document's first page on first request and
+keeps it in a disk cache, so every later view is a plain file read.
+Images are decoded at reduced scale where the format allows (JPEG draft
+mode) and downsampled; text documents such as CSV statements are drawn
+as their first lines. Other formats have no preview.
+
+Previews are keyed by the document's content hash and the preview size,
+so identical content shares previews and a cached file never goes stale.
+The cache is bounded to ``PREVIEW_CACHE_MAX_BYTES``: hits refresh a
+file's mtime, and once the tracked total passes the limit the least
+recently used previews are deleted down to 90% of it. Concurrent requests
+for the same missing preview wait for a single render.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from uploads import UPLOAD_FOLDER
+
+
+# Configuration
+PREVIEW_CACHE_DIR = Path(
+    os.getenv("PREVIEW_CACHE_DIR", str(UPLOAD_FOLDER / "previews"))
+)
+PREVIEW_CACHE_MAX_BYTES = int(
+    os.getenv("PREVIEW_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+PREVIEW_MAX_CONCURRENT_RENDERS = int(os.getenv("PREVIEW_MAX_CONCURRENT_RENDERS", "2"))
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "80"))
+
+# Longest edge in pixels per preview size
+PREVIEW_SIZES: Dict[str, int] = {"thumbnail": 256, "preview": 1024}
+
+# Bump when rendering changes so old cached previews are not reused
+RENDER_VERSION = 1
+
+# Hits don't rewrite the mtime more often than this, in seconds
+_TOUCH_INTERVAL = 3600
+
+_TEXT_TYPES = ("text/", "application/csv", "application/json")
+_TEXT_LINES = 40
+_TEXT_COLUMNS = 100
+
+
+class PreviewUnavailable(Exception):
+    """The document's format can't be previewed."""
+
+
+def previewable(mime_type: Optional[str]) -> bool:
+    return bool(mime_type) and (
+        mime_type.startswith("image/") or mime_type.startswith(_TEXT_TYPES)
+    )
+
+
+def preview_path(content_key: str, size: str) -> Path:
+    """Cache location of a preview; ``content_key`` is the document's sha256."""
+    return (
+        PREVIEW_CACHE_DIR
+        / content_key[:2]
+        / f"{content_key}-{size}-v{RENDER_VERSION}.jpg"
+    )
+
+
+# ===== RENDERING =====
+
+
+def render_preview(source: Path, mime_type: str, edge: int) -> Image.Image:
+    """First page of a document as an RGB image at most ``edge`` pixels on a side."""
+    if mime_type.startswith("image/"):
+        return _render_image(source, edge)
+    if mime_type.startswith(_TEXT_TYPES):
+        return _render_text(source, edge)
+    raise PreviewUnavailable(mime_type)
+
+
+def _render_image(source: Path, edge: int) -> Image.Image:
+    try:
+        with Image.open(source) as image:
+            # Decode JPEGs at the smallest scale still at least ``edge`` wide;
+            # other formats ignore this. Multi-frame images open on frame 0.
+            image.draft("RGB", (edge, edge))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                return background
+            return image.convert("RGB")
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise PreviewUnavailable(str(e))
+
+
+def _render_text(source: Path, edge: int) -> Image.Image:
+    with open(source, encoding="utf-8", errors="replace") as f:
+        lines = [
+            line.rstrip("\r\n")[:_TEXT_COLUMNS]
+            for _, line in zip(range(_TEXT_LINES), f)
+        ]
+    font = ImageFont.load_default()
+    # Draw at a fixed page size, then scale to the requested edge
+    page = Image.new("RGB", (850, 1100), "white")
+    draw = ImageDraw.Draw(page)
+    for row, line in enumerate(lines):
+        draw.text((24, 24 + row * 26), line, fill="black", font=font)
+    page.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+    return page
+
+
+def _write_preview(source: Path, mime_type: str, edge: int, destination: Path) -> int:
+    """Render and atomically store a preview; returns its size in bytes."""
+    image = render_preview(source, mime_type, edge)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=destination.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(
+                f, "JPEG", quality=PREVIEW_QUALITY, optimize=True, progressive=True
+            )
+        os.replace(temp, destination)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return destination.stat().st_size
+
+
+# ===== CACHE =====
+
+
+class PreviewCache:
+    """Size-bounded on-disk LRU of rendered previews for one process."""
+
+    def __init__(
+        self,
+        max_bytes: int = PREVIEW_CACHE_MAX_BYTES,
+        max_concurrent_renders: int = PREVIEW_MAX_CONCURRENT_RENDERS,
+    ):
+        self.max_bytes = max_bytes
+        self._renders = asyncio.Semaphore(max_concurrent_renders)
+        self._pending: Dict[Path, asyncio.Future] = {}
+        self._total: Optional[int] = None  # Bytes on disk, scanned lazily
+        self._lock = threading.Lock()
+
+    async def get(
+        self, source: Path, mime_type: str, content_key: str, size: str
+    ) -> Path:
+        """Path of the cached preview, rendering it first if needed.
+
+        Raises PreviewUnavailable for formats without a preview.
+        """
+        path = preview_path(content_key, size)
+        if await asyncio.to_thread(self._hit, path):
+            return path
+
+        pending = self._pending.get(path)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return path
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[path] = future
+        try:
+            async with self._renders:
+                written = await asyncio.to_thread(
+                    _write_preview, source, mime_type, PREVIEW_SIZES[size], path
+                )
+            future.set_result(path)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._pending[path]
+        await asyncio.to_thread(self._added, written)
+        return path
+
+    def _hit(self, path: Path) -> bool:
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if now - mtime > _TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                return False  # Evicted in between
+        return True
+
+    def _added(self, size: int):
+        with self._lock:
+            if self._total is None:
+                self._total = _disk_usage()
+            else:
+                self._total += size
+            if self._total > self.max_bytes:
+                self._total = evict(int(self.max_bytes * 0.9))
+
+
+def _disk_usage() -> int:
+    total = 0
+    if PREVIEW_CACHE_DIR.exists():
+        for entry in PREVIEW_CACHE_DIR.rglob("*.jpg"):
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def evict(target_bytes: int) -> int:
+    """Delete least recently used previews until at most ``target_bytes``
+    remain; returns the bytes left."""
+    entries = []
+    if PREVIEW_CACHE_DIR.exists():
+        for entry in PREVIEW_CACHE_DIR.rglob("*.jpg"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in entries:
+        if total <= target_bytes:
+            break
+        try:
+            entry.unlink()
+            total -= size
+        except FileNotFoundError:
+            pass
+    return total
@@ -0,0 +1,359 @@
+"""
+Rate Limiting for Caelo Backend.
+
+Native ASGI middleware replacing the disabled slowapi integration. Requests
+are checked against token buckets keyed by client IP or verified token
+subject and route, with an in-memory LRU-bounded backend for single workers
+and an optional Redis backend shared across workers.
+"""
+
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+
+# Configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_TRUST_FORWARDED = (
+    os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+# ===== RULES =====
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a slowapi-style rate such as "10/minute" into (limit, seconds)."""
+    try:
+        count, period = rate.strip().split("/")
+        return int(count), _PERIODS[period.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """A limit applied to requests matching a method and path prefix.
+
+    ``key_by`` is ``"ip"`` or ``"user"``; user-keyed rules fall back to the
+    client IP for unauthenticated requests.
+    """
+
+    name: str
+    rate: str
+    path: str = "/"
+    methods: Tuple[str, ...] = ()
+    key_by: str = "ip"
+    exact: bool = False
+
+    @cached_property
+    def limit(self) -> int:
+        return parse_rate(self.rate)[0]
+
+    @cached_property
+    def period(self) -> int:
+        return parse_rate(self.rate)[1]
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods and method not in self.methods:
+            return False
+        if self.exact:
+            return path == self.path
+        return path.startswith(self.path)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a single bucket check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+
+
+# ===== BACKENDS =====
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets held in a per-process LRU map.
+
+    Each check is a dict lookup plus arithmetic; the least recently used
+    bucket is evicted once ``max_keys`` is reached so memory stays bounded
+    under key-spraying clients.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def hit(self, key: str, limit: int, period: int) -> RateLimitResult:
+        return self.hit_sync(key, limit, period)
+
+    def hit_sync(
+        self, key: str, limit: int, period: int, now: Optional[float] = None
+    ) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        refill_rate = limit / period
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(limit), now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * refill_rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            allowed = True
+        else:
+            allowed = False
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=int(bucket[0]),
+            reset_after=(limit - bucket[0]) / refill_rate
+            if allowed
+            else (1 - bucket[0]) / refill_rate,
+        )
+
+    def reset(self):
+        self._buckets.clear()
+
+
+class RedisRateLimitBackend:
+    """Token buckets stored in Redis so all workers share one budget.
+
+    The refill-and-take step runs as a Lua script, keeping each check to a
+    single atomic round trip.
+    """
+
+    SCRIPT = """
+    local limit = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local rate = limit / period
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or limit
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], period * 2)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, prefix: str = "caelo:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        import redis.asyncio as redis_asyncio
+
+        return cls(redis_asyncio.from_url(url))
+
+    async def hit(self, key: str, limit: int, period: int) -> RateLimitResult:
+        allowed, tokens = await self._script(
+            keys=[self.prefix + key], args=[limit, period, time.time()]
+        )
+        tokens = float(tokens)
+        refill_rate = limit / period
+        return RateLimitResult(
+            allowed=bool(int(allowed)),
+            limit=limit,
+            remaining=int(tokens),
+            reset_after=(limit - tokens) / refill_rate
+            if allowed
+            else (1 - tokens) / refill_rate,
+        )
+
+
+# ===== MIDDLEWARE =====
+
+
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.partition(b" ")
+            if scheme.lower() == b"bearer" and token:
+                return token.decode("latin-1")
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing ``RateLimitRule`` budgets.
+
+    Every matching rule is checked; the most restrictive result is reported
+    in ``X-RateLimit-*`` headers and a 429 is returned if any rule denies.
+
+    ``identify`` maps a bearer token to the subject it was issued to, or
+    None if the token doesn't verify; it should check the signature only
+    (no database). User buckets are keyed by that subject, so rotating
+    made-up tokens gets no fresh budget: unverified requests, and all
+    requests when no ``identify`` is given, share their IP's bucket.
+    """
+
+    def __init__(
+        self,
+        app,
+        rules: List[RateLimitRule],
+        backend=None,
+        enabled: bool = True,
+        identify: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.app = app
+        self.rules = rules
+        self.backend = backend if backend is not None else InMemoryRateLimitBackend()
+        self.enabled = enabled
+        self.identify = identify
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        matched = [rule for rule in self.rules if rule.matches(method, path)]
+        if not matched:
+            await self.app(scope, receive, send)
+            return
+
+        ip = _client_ip(scope)
+        user = None
+        tightest: Optional[RateLimitResult] = None
+        for rule in matched:
+            if rule.key_by == "user":
+                if user is None:
+                    user = self._verified_subject(scope) or ""
+                subject = f"user:{user}" if user else f"ip:{ip}"
+            else:
+                subject = f"ip:{ip}"
+            result = await self.backend.hit(
+                f"{rule.name}:{subject}", rule.limit, rule.period
+            )
+            if (
+                tightest is None
+                or not result.allowed
+                or (tightest.allowed and result.remaining < tightest.remaining)
+            ):
+                tightest = result
+            if not result.allowed:
+                break
+
+        headers = [
+            (b"x-ratelimit-limit", str(tightest.limit).encode()),
+            (b"x-ratelimit-remaining", str(max(tightest.remaining, 0)).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(tightest.reset_after)).encode()),
+        ]
+
+        if not tightest.allowed:
+            await self._reject(scope, send, headers, tightest)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _verified_subject(self, scope) -> Optional[str]:
+        token = _bearer_token(scope)
+        if token is None or self.identify is None:
+            return None
+        return self.identify(token)
+
+    async def _reject(self, scope, send, headers, result: RateLimitResult):
+        body = json.dumps(
+            {
+                "error": "Rate limit exceeded",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "path": scope["path"],
+            }
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers
+                + [
+                    (
+                        b"retry-after",
+                        str(max(1, math.ceil(result.reset_after))).encode(),
+                    ),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+# ===== DEFAULTS =====
+
+DEFAULT_RULES = [
+    RateLimitRule(
+        "login", "10/minute", path="/auth/login", methods=("POST",), exact=True
+    ),
+    RateLimitRule(
+        "register", "5/minute", path="/auth/register", methods=("POST",), exact=True
+    ),
+    RateLimitRule(
+        "applications",
+        f"{RATE_LIMIT_PER_MINUTE}/minute",
+        path="/applications",
+        methods=("GET",),
+        key_by="user",
+        exact=True,
+    ),
+    RateLimitRule(
+        "dashboard",
+        f"{RATE_LIMIT_PER_MINUTE}/minute",
+        path="/dashboard",
+        methods=("GET",),
+        key_by="user",
+    ),
+]
+
+
+def get_rate_limit_backend():
+    """Build the configured backend: Redis when a URL is set, else in-memory."""
+    if RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend.from_url(RATE_LIMIT_REDIS_URL)
+    return InMemoryRateLimitBackend()
@@ -0,0 +1,319 @@
+"""
+Realtime Fan-Out for Caelo Backend.
+
+An in-process hub that broadcasts pre-serialized payloads to every
+WebSocket subscribed to a topic (an application id). Publishing never
+touches the database: writers serialize an event once to JSON text and
+the hub hands the same string to each subscriber's bounded queue. Idle
+connections cost one small queue and one pending receive each, so a
+worker holds thousands.
+
+A subscriber that falls ``REALTIME_QUEUE_SIZE`` events behind is closed
+with code 1013 (try again later); clients reconnect and refetch instead of
+the worker buffering without bound.
+
+``EventStream`` adds a bounded replay buffer on top of the hub for
+Server-Sent Events: every event gets an id, and a client reconnecting with
+``Last-Event-ID`` is sent what it missed, or a ``reset`` event when that is
+no longer buffered.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import uuid
+from collections import defaultdict, deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+
+# Configuration
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# WebSocket close codes
+CLOSE_POLICY_VIOLATION = 1008  # Authentication or access failure
+CLOSE_TRY_AGAIN_LATER = 1013  # Subscriber overflowed its queue
+
+_CLOSED = object()
+
+
+class Subscription:
+    """One subscriber's bounded queue of payloads for a topic."""
+
+    def __init__(self, hub: "FanoutHub", topic: Hashable, max_queue: int):
+        self.hub = hub
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_queue + 1)
+        self.max_queue = max_queue
+        self.overflowed = False
+        self.closed = False
+
+    def _deliver(self, payload: Any):
+        if self.closed:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            # Too far behind: drop the backlog and end the subscription
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.close()
+            return
+        self.queue.put_nowait(payload)
+
+    def close(self):
+        """End the subscription; ``get`` returns None once drained."""
+        if not self.closed:
+            self.closed = True
+            self.queue.put_nowait(_CLOSED)
+
+    async def get(self) -> Optional[Any]:
+        """Next payload, or None when the subscription has ended."""
+        payload = await self.queue.get()
+        return None if payload is _CLOSED else payload
+
+
+class FanoutHub:
+    """Topic -> subscribers map for one worker process."""
+
+    def __init__(self, max_queue: int = REALTIME_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self._topics: Dict[Hashable, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: Hashable) -> Subscription:
+        """Subscribe to ``topic``; must be called from the event loop."""
+        subscription = Subscription(self, topic, self.max_queue)
+        with self._lock:
+            self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def subscriber_count(self, topic: Hashable) -> int:
+        with self._lock:
+            return len(self._topics.get(topic, ()))
+
+    def publish(self, topic: Hashable, payload: Any) -> int:
+        """Hand ``payload`` to every subscriber of ``topic``; safe from any thread.
+
+        Returns the number of subscribers it was queued for.
+        """
+        return self.publish_many([(topic, payload)])
+
+    def publish_many(self, items: List[Tuple[Hashable, Any]]) -> int:
+        """Publish ``(topic, payload)`` pairs, waking each event loop once.
+
+        Returns the number of deliveries queued.
+        """
+        deliveries: Dict[
+            asyncio.AbstractEventLoop, List[Tuple[Subscription, Any]]
+        ] = defaultdict(list)
+        with self._lock:
+            for topic, payload in items:
+                for subscription in self._topics.get(topic, ()):
+                    deliveries[subscription.loop].append((subscription, payload))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, batch in deliveries.items():
+            if loop is running:
+                _deliver_all(batch)
+            else:
+                loop.call_soon_threadsafe(_deliver_all, batch)
+        return sum(len(batch) for batch in deliveries.values())
+
+
+def _deliver_all(batch: List[Tuple[Subscription, Any]]):
+    for subscription, payload in batch:
+        subscription._deliver(payload)
+
+
+async def serve_subscription(websocket: WebSocket, subscription: Subscription):
+    """Forward a subscription's payloads to a WebSocket until either end closes.
+
+    Client frames are read (and ignored) only to notice disconnects.
+    """
+
+    async def watch_client():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        subscription.close()
+
+    watcher = asyncio.create_task(watch_client())
+    try:
+        while True:
+            payload = await subscription.get()
+            if payload is None:
+                break
+            await websocket.send_text(payload)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        subscription.hub.unsubscribe(subscription)
+
+    if subscription.overflowed:
+        try:
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        except RuntimeError:
+            pass
+
+
+async def next_payload(
+    subscription: Subscription,
+    timeout: float,
+    accept: Callable[[Any], bool] = lambda payload: True,
+) -> Optional[Any]:
+    """Wait up to ``timeout`` seconds for a payload ``accept`` returns True for.
+
+    Returns None on timeout or when the subscription ends. Used for long
+    polling, where the caller unsubscribes afterwards.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        try:
+            payload = await asyncio.wait_for(subscription.get(), remaining)
+        except asyncio.TimeoutError:
+            return None
+        if payload is None or accept(payload):
+            return payload
+
+
+# ===== SERVER-SENT EVENTS =====
+
+
+class StreamEvent(NamedTuple):
+    """One event in an EventStream, with its pre-rendered SSE frame."""
+
+    id: str
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    frame: str
+
+
+class EventStream:
+    """Broadcast stream whose last ``size`` events can be replayed by id.
+
+    Ids are ``<epoch>-<seq>``; the epoch changes per process, so a
+    ``Last-Event-ID`` from before a restart (or from another worker) is
+    recognised as unresumable rather than silently misread.
+    """
+
+    def __init__(self, hub: Optional[FanoutHub] = None, size: int = EVENT_BUFFER_SIZE):
+        self.hub = hub or FanoutHub()
+        self.epoch = uuid.uuid4().hex[:8]
+        self._topic = f"stream:{self.epoch}"
+        self._seq = itertools.count(1)
+        self._buffer: "deque[StreamEvent]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict[str, Any], body: str) -> StreamEvent:
+        """Record and broadcast an event; ``body`` is its JSON text."""
+        with self._lock:
+            seq = next(self._seq)
+            event_id = f"{self.epoch}-{seq}"
+            event = StreamEvent(
+                event_id,
+                seq,
+                event_type,
+                data,
+                f"id: {event_id}\nevent: {event_type}\ndata: {body}\n\n",
+            )
+            self._buffer.append(event)
+        self.hub.publish(self._topic, event)
+        return event
+
+    def subscribe(self) -> Subscription:
+        return self.hub.subscribe(self._topic)
+
+    def replay(self, last_event_id: Optional[str]) -> Optional[List[StreamEvent]]:
+        """Buffered events after ``last_event_id``; None if it can't be resumed."""
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._lock:
+            events = list(self._buffer)
+        newest = events[-1].seq if events else 0
+        if seq > newest or (events and events[0].seq > seq + 1):
+            # From the future, or older than the buffer reaches
+            return None
+        return [event for event in events if event.seq > seq]
+
+
+async def sse_frames(
+    stream: EventStream,
+    last_event_id: Optional[str],
+    visible: Callable[[StreamEvent], bool],
+    heartbeat: float = SSE_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """SSE frames for one client: missed events first, then live ones.
+
+    Events the client may not see are skipped. Comment frames are sent
+    every ``heartbeat`` seconds so proxies keep the connection open and
+    disconnects are noticed.
+    """
+    # Subscribe before reading the buffer so nothing published in between is lost
+    subscription = stream.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        missed = stream.replay(last_event_id)
+        if missed is None:
+            yield "event: reset\ndata: {}\n\n"
+            missed = []
+        delivered = missed[-1].seq if missed else 0
+        for event in missed:
+            if visible(event):
+                yield event.frame
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                # Overflowed: end the response; the client resumes by id
+                break
+            if event.seq <= delivered:
+                continue
+            delivered = event.seq
+            if visible(event):
+                yield event.frame
+    finally:
+        stream.hub.unsubscribe(subscription)
@@ -0,0 +1,361 @@
+"""
+Scheduled Jobs for Caelo Backend.
+
+Periodic maintenance is declared with a cron expression (five UTC fields,
+or ``@hourly``/``@daily``/``@weekly``/``@monthly``)::
+
+    @scheduled("*/15 * * * *", max_runtime=60)
+    def escalate_stale(deadline: float):
+        ...
+
+Every API process runs a ``Scheduler``, but only the leader runs jobs. The
+leader holds a session-level advisory lock on PostgreSQL, on a connection
+of its own outside the request pool, or an exclusive lock on a file next
+to the database on SQLite (dev), for as long as it lives; when it exits
+the lock is released and the next process to find a job due takes over.
+Followers keep their schedule in step without running anything.
+
+Jobs receive a ``time.monotonic()`` deadline and are expected to work in
+small batches, committing each one, and stop once it has passed. They
+should also be safe to rerun, since a job whose time is missed (the
+leader was down) just runs at its next scheduled time.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from calendar import monthrange
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+SCHEDULER_MAX_RUNTIME_SECONDS = float(os.getenv("SCHEDULER_MAX_RUNTIME_SECONDS", "120"))
+
+# pg advisory lock key shared by every process of this deployment
+SCHEDULER_LOCK_KEY = int.from_bytes(
+    hashlib.sha256(b"caelo-scheduler").digest()[:8], "big", signed=True
+)
+
+_MACROS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# (low, high) of minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+# ===== CRON SCHEDULES =====
+
+
+def _parse_field(text: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in text.split(","):
+        spec, slash, step_text = part.partition("/")
+        step = int(step_text) if slash else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(bound) for bound in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if slash else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"field {part!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """A parsed five-field cron expression, evaluated in UTC."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _MACROS.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression {expression!r} needs five fields")
+        try:
+            parsed = [
+                _parse_field(text, low, high)
+                for text, (low, high) in zip(fields, _FIELD_RANGES)
+            ]
+        except ValueError as e:
+            raise ValueError(f"invalid cron expression {expression!r}: {e}")
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        # Cron runs on either day field matching when both are restricted
+        self._any_day = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        return (day or weekday) if self._any_day else (day and weekday)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``."""
+        candidate = moment.astimezone(timezone.utc).replace(
+            second=0, microsecond=0
+        ) + timedelta(minutes=1)
+        give_up = candidate.year + 5
+        while candidate.year <= give_up:
+            if candidate.month not in self.months:
+                days_left = (
+                    monthrange(candidate.year, candidate.month)[1] - candidate.day + 1
+                )
+                candidate = (candidate + timedelta(days=days_left)).replace(
+                    hour=0, minute=0
+                )
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron expression {self.expression!r} never matches")
+
+
+@dataclass
+class ScheduledJob:
+    """A maintenance function and when to run it."""
+
+    name: str
+    schedule: CronSchedule
+    func: Callable[[float], None]
+    max_runtime: float = SCHEDULER_MAX_RUNTIME_SECONDS
+    last_started_at: Optional[datetime] = field(default=None)
+    last_error: Optional[str] = field(default=None)
+
+
+# Every declared job by name
+SCHEDULE: Dict[str, ScheduledJob] = {}
+
+
+def scheduled(
+    cron: str,
+    name: Optional[str] = None,
+    max_runtime: float = SCHEDULER_MAX_RUNTIME_SECONDS,
+):
+    """Declare a scheduled job; the function is called with its deadline."""
+    schedule = CronSchedule(cron)
+
+    def register(func: Callable[[float], None]) -> Callable[[float], None]:
+        job = ScheduledJob(name or func.__name__, schedule, func, max_runtime)
+        SCHEDULE[job.name] = job
+        return func
+
+    return register
+
+
+# ===== LEADER ELECTION =====
+
+
+class AdvisoryLeaderLock:
+    """PostgreSQL session advisory lock held on a dedicated connection.
+
+    ``engine`` should be unpooled (see ``leader_lock``): the leader keeps
+    the connection open for as long as it lives.
+    """
+
+    def __init__(self, engine, key: int = SCHEDULER_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._connection = None
+
+    def acquire(self) -> bool:
+        """True while this process is the leader; checks the lock's
+        connection is still alive, since the lock dies with it."""
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                logger.warning("Scheduler lost its leader lock connection")
+                self._discard()
+        try:
+            connection = self.engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+        except Exception as e:
+            logger.warning("Scheduler could not connect to take the leader lock: %s", e)
+            return False
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            ).scalar()
+        except Exception:
+            connection.invalidate()
+            connection.close()
+            return False
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": self.key}
+            )
+            self._connection.close()
+            self._connection = None
+        except Exception:
+            self._discard()
+
+    def _discard(self):
+        # Never hand a connection that may still hold the lock back to the pool
+        try:
+            self._connection.invalidate()
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+class FileLeaderLock:
+    """Exclusive ``flock`` on a file, for processes sharing one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        import fcntl
+
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        import fcntl
+
+        if self._file is None:
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class LocalLeaderLock:
+    """Always the leader; for in-memory databases, which one process owns."""
+
+    def acquire(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+
+def leader_lock(engine):
+    """The leader lock suited to the engine's database."""
+    if engine.dialect.name == "postgresql":
+        # Not the request pool's engine: the held connection would take one
+        # of its slots for the process's whole life
+        return AdvisoryLeaderLock(create_engine(engine.url, poolclass=NullPool))
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        return FileLeaderLock(f"{database}.scheduler.lock")
+    return LocalLeaderLock()
+
+
+# ===== SCHEDULER =====
+
+
+class Scheduler:
+    """Runs due jobs on a background thread while this process leads."""
+
+    def __init__(
+        self,
+        lock,
+        jobs: Optional[List[ScheduledJob]] = None,
+        tick_seconds: float = SCHEDULER_TICK_SECONDS,
+    ):
+        self.lock = lock
+        self.jobs = list(SCHEDULE.values()) if jobs is None else jobs
+        self.tick_seconds = tick_seconds
+        self._next_runs: Dict[str, datetime] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10):
+        """Stop ticking (a running job finishes first) and give up leadership."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.lock.release()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            self._stop.wait(self.tick_seconds)
+
+    def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """Run the jobs that have come due, if leading; returns their names."""
+        now = now or datetime.now(timezone.utc)
+        due = []
+        for job in self.jobs:
+            next_run = self._next_runs.get(job.name)
+            if next_run is not None and next_run <= now:
+                due.append(job)
+            if next_run is None or next_run <= now:
+                self._next_runs[job.name] = job.schedule.next_after(now)
+        if not due or not self.lock.acquire():
+            return []
+        ran = []
+        for job in due:
+            if self._stop.is_set():
+                break
+            self.run_job(job)
+            ran.append(job.name)
+        return ran
+
+    def run_job(self, job: ScheduledJob):
+        job.last_started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        try:
+            job.func(started + job.max_runtime)
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Scheduled job %s failed", job.name)
+            return
+        job.last_error = None
+        logger.info(
+            "Scheduled job %s finished in %.1fs", job.name, time.monotonic() - started
+        )
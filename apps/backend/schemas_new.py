@@ -14,7 +14,7 @@ import uuid
 
 from models_new import (
     UserRole, ApplicationStatus, ApplicationPriority, RecommendationType,
-    DocumentType, TransactionType, IndustryRisk
+    DocumentType, TransactionType, IndustryRisk, AnalysisJobStatus
 )
 
 
@@ -32,6 +32,11 @@ class TokenData(BaseModel):
     """Token payload data."""
     email: Optional[str] = None
     role: Optional[UserRole] = None
+    # Present only on stateless claims tokens
+    user_id: Optional[uuid.UUID] = None
+    name: Optional[str] = None
+    organization: Optional[str] = None
+    token_version: Optional[int] = None
 
 
 class Token(BaseModel):
@@ -97,6 +102,9 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase, TimestampMixin):
     """User response schema."""
     id: uuid.UUID
+    # Stored emails were validated on the way in; re-running the email
+    # validator for every nested user dominated list serialization time
+    email: str
     last_login: Optional[datetime] = None
 
     class Config:
@@ -165,6 +173,7 @@ class TransactionResponse(TransactionBase, TimestampMixin):
     """Transaction response schema."""
     id: uuid.UUID
     application_id: uuid.UUID
+    document_id: Optional[uuid.UUID] = None
     anomaly_score: Optional[float] = None
     is_anomaly: bool = False
     anomaly_explanation: Optional[str] = None
@@ -223,6 +232,60 @@ class MessageResponse(MessageBase, TimestampMixin):
         from_attributes = True
 
 
+class MessageReadReceipt(BaseModel):
+    """Pushed to an application's subscribers when a message is read."""
+    message_id: uuid.UUID
+    application_id: uuid.UUID
+    reader_id: uuid.UUID
+    read_at: datetime
+
+
+class MarkMessagesReadRequest(BaseModel):
+    """Mark every message from others up to and including one as read."""
+    up_to_message_id: uuid.UUID
+
+
+class MessageReadStateResponse(BaseModel):
+    """A user's read marker and unread count for one application."""
+    application_id: uuid.UUID
+    unread_count: int
+    last_read_message_id: Optional[uuid.UUID] = None
+    last_read_at: Optional[datetime] = None
+    marked: int = 0  # Unread messages of this user that the request read
+
+    class Config:
+        from_attributes = True
+
+
+class InboxEntry(BaseModel):
+    """Unread messages on one accessible application."""
+    application_id: uuid.UUID
+    business_name: str
+    status: ApplicationStatus
+    unread_count: int
+    last_read_at: Optional[datetime] = None
+
+
+class InboxSummary(BaseModel):
+    """Unread counts across every application the user follows."""
+    total_unread: int
+    applications: List[InboxEntry]
+
+
+class ApplicationEvent(BaseModel):
+    """Streamed to users whose scope includes the application when it is
+    created, changes status or is (re)assigned."""
+    application_id: uuid.UUID
+    business_name: str
+    status: ApplicationStatus
+    old_status: Optional[ApplicationStatus] = None
+    borrower_id: uuid.UUID
+    loan_officer_id: Optional[uuid.UUID] = None
+    underwriter_id: Optional[uuid.UUID] = None
+    actor_id: uuid.UUID
+    occurred_at: datetime
+
+
 # ===== DOCUMENT SCHEMAS =====
 
 class DocumentBase(BaseModel):
@@ -244,6 +307,7 @@ class DocumentResponse(DocumentBase):
     id: uuid.UUID
     application_id: uuid.UUID
     file_path: str
+    sha256: Optional[str] = None
     is_analyzed: bool = False
     analysis_results: Optional[Dict[str, Any]] = None
     uploaded_at: datetime
@@ -252,6 +316,72 @@ class DocumentResponse(DocumentBase):
         from_attributes = True
 
 
+class DocumentUploadCreate(BaseModel):
+    """Start a resumable upload; ``size`` is the full file size in bytes.
+
+    With ``sha256`` (lowercase hex) the upload completes immediately if the
+    borrower has already stored that content, and the finished upload is
+    verified against it.
+    """
+    name: str = Field(..., max_length=255)
+    type: DocumentType
+    size: int = Field(..., gt=0)
+    mime_type: Optional[str] = Field(None, max_length=100)
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-f]{64}$")
+
+
+class DocumentUploadResponse(BaseModel):
+    """Progress of a resumable upload; ``offset`` is where to continue."""
+    id: uuid.UUID
+    application_id: uuid.UUID
+    name: str
+    type: DocumentType
+    size: int
+    offset: int
+    max_size: int
+    completed: bool = False
+    document: Optional[DocumentResponse] = None
+
+
+class DocumentLink(BaseModel):
+    """Signed, expiring URL for a document or its preview."""
+    document_id: uuid.UUID
+    variant: str
+    url: str
+    expires_at: datetime
+
+
+class DocumentAnalysisJobResponse(BaseModel):
+    """Status of a document's background analysis."""
+    document_id: uuid.UUID
+    status: AnalysisJobStatus
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BackgroundJobResponse(BaseModel):
+    """Status of a queued background job."""
+    id: str
+    name: str
+    state: str  # pending, running, retrying, succeeded or failed
+    priority: Optional[int] = None
+    attempts: int = 0
+    enqueued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 # ===== LOAN APPLICATION SCHEMAS =====
 
 class LoanApplicationBase(BaseModel):
@@ -283,6 +413,49 @@ class LoanApplicationUpdate(BaseModel):
     analyst_notes: Optional[str] = None
 
 
+class StatusTransition(BaseModel):
+    """Target status for one application in a bulk transition."""
+    application_id: uuid.UUID
+    status: ApplicationStatus
+    reason: Optional[str] = None
+
+
+class BulkStatusTransitionRequest(BaseModel):
+    """Bulk status transition request (e.g. a committee's decisions)."""
+    transitions: List[StatusTransition] = Field(..., min_length=1, max_length=200)
+    reason: Optional[str] = None  # Default reason for transitions without one
+
+    @validator('transitions')
+    def validate_unique_applications(cls, v):
+        if len({transition.application_id for transition in v}) != len(v):
+            raise ValueError('Each application can only appear once')
+        return v
+
+
+class TransitionOutcome(str, Enum):
+    """Result of one transition in a bulk request."""
+    updated = "updated"
+    unchanged = "unchanged"
+    not_found = "not_found"
+    forbidden = "forbidden"
+    invalid_transition = "invalid_transition"
+
+
+class StatusTransitionResult(BaseModel):
+    """Per-application result of a bulk transition."""
+    application_id: uuid.UUID
+    outcome: TransitionOutcome
+    old_status: Optional[ApplicationStatus] = None
+    new_status: Optional[ApplicationStatus] = None
+    detail: Optional[str] = None
+
+
+class BulkStatusTransitionResponse(BaseModel):
+    """Bulk status transition response."""
+    updated: int
+    results: List[StatusTransitionResult]
+
+
 class LoanApplicationResponse(LoanApplicationBase, TimestampMixin):
     """Loan application response schema."""
     id: uuid.UUID
@@ -312,6 +485,89 @@ class LoanApplicationResponse(LoanApplicationBase, TimestampMixin):
         from_attributes = True
 
 
+class LoanApplicationSummary(BaseModel):
+    """Loan application row for queue and dashboard lists.
+
+    A column projection: no nested users or child collections.
+    """
+    id: uuid.UUID
+    business_name: str
+    business_type: str
+    loan_amount: Decimal
+    status: ApplicationStatus
+    priority: ApplicationPriority
+    risk_score: Optional[float] = None
+    recommendation: Optional[RecommendationType] = None
+    borrower_id: uuid.UUID
+    borrower_name: str
+    loan_officer_id: Optional[uuid.UUID] = None
+    underwriter_id: Optional[uuid.UUID] = None
+    application_date: datetime
+    decision_date: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ===== BATCH SCHEMAS =====
+
+class BatchSection(str, Enum):
+    """Sections that can be requested per application in a batch read."""
+    summary = "summary"
+    transactions = "transactions"
+    notes = "notes"
+    messages = "messages"
+
+
+class BatchApplicationsRequest(BaseModel):
+    """Batch read request for several applications' sub-resources."""
+    application_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=50)
+    sections: List[BatchSection] = Field(default_factory=lambda: list(BatchSection), min_length=1)
+
+
+class BatchApplicationResult(BaseModel):
+    """Requested sections for one application; unrequested sections are null."""
+    id: uuid.UUID
+    summary: Optional[LoanApplicationSummary] = None
+    transactions: Optional[List[TransactionResponse]] = None
+    notes: Optional[List[TeamNoteResponse]] = None
+    messages: Optional[List[MessageResponse]] = None
+
+
+class BatchApplicationsResponse(BaseModel):
+    """Batch read response."""
+    items: List[BatchApplicationResult]
+    not_found: List[uuid.UUID] = []
+    forbidden: List[uuid.UUID] = []
+
+
+# ===== SEARCH SCHEMAS =====
+
+class SearchKind(str, Enum):
+    """Searchable record types."""
+    application = "application"
+    note = "note"
+    message = "message"
+
+
+class SearchHit(BaseModel):
+    """One ranked full-text match."""
+    kind: SearchKind
+    id: uuid.UUID
+    application_id: uuid.UUID
+    business_name: str
+    snippet: str
+    rank: float  # Relative to the best hit of the same kind, which is 1.0
+    created_at: Optional[datetime] = None
+
+
+class SearchResponse(BaseModel):
+    """Ranked search results across applications, notes and messages."""
+    query: str
+    items: List[SearchHit]
+
+
 # ===== DASHBOARD & ANALYTICS SCHEMAS =====
 
 class DashboardStats(BaseModel):
@@ -326,6 +582,22 @@ class DashboardStats(BaseModel):
     approval_rate: Optional[float] = None
 
 
+class FacetCount(BaseModel):
+    """Number of applications sharing one facet value."""
+    value: Optional[str] = None  # None groups applications with no value (e.g. unassigned)
+    label: Optional[str] = None
+    count: int
+
+
+class ApplicationFacets(BaseModel):
+    """Facet counts for the applications matching a filter set."""
+    total: int
+    status: List[FacetCount] = []
+    priority: List[FacetCount] = []
+    business_type: List[FacetCount] = []
+    loan_officer: List[FacetCount] = []
+
+
 class ApplicationFilters(BaseModel):
     """Application filtering schema."""
     status: Optional[ApplicationStatus] = None
@@ -339,10 +611,22 @@ class ApplicationFilters(BaseModel):
     max_amount: Optional[Decimal] = None
 
 
+class ApplicationSort(str, Enum):
+    """Whitelisted application queue sorts ("-" = descending), each index-backed."""
+    newest = "-application_date"
+    oldest = "application_date"
+    priority_risk = "-priority,-risk_score"
+    priority_amount = "-priority,-loan_amount"
+    priority_age = "-priority,application_date"
+    risk = "-risk_score"
+    amount = "-loan_amount"
+
+
 class PaginationParams(BaseModel):
-    """Pagination parameters."""
+    """Pagination parameters; a keyset ``cursor`` takes precedence over ``page``."""
     page: int = Field(1, ge=1)
     size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None
 
 
 class PaginatedResponse(BaseModel):
@@ -352,6 +636,17 @@ class PaginatedResponse(BaseModel):
     page: int
     size: int
     pages: int
+    next_cursor: Optional[str] = None
+
+
+class LoanApplicationPage(PaginatedResponse):
+    """Paginated loan applications."""
+    items: List[LoanApplicationResponse]
+
+
+class LoanApplicationSummaryPage(PaginatedResponse):
+    """Paginated loan application summaries."""
+    items: List[LoanApplicationSummary]
 
 
 # ===== SYSTEM SCHEMAS =====
@@ -0,0 +1,185 @@
+"""
+Full-Text Search for Caelo Backend.
+
+Maintains an inverted index over application, note and message text inside
+the database itself, so it stays current on every write without application
+code: on PostgreSQL a stored generated ``tsvector`` column with a GIN index
+per table, on SQLite an external-content FTS5 table kept in sync by
+triggers. ``search_clauses`` builds the dialect-specific match, rank and
+snippet expressions that CRUD queries combine with their access filters.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, inspect, literal_column, text
+from sqlalchemy.sql import column, table
+
+
+# Text configuration used for stemming and stop words on PostgreSQL
+SEARCH_LANGUAGE = "english"
+
+# Markers around matched terms in snippets (plain text, never HTML)
+SNIPPET_START = "**"
+SNIPPET_END = "**"
+SNIPPET_WORDS = 16
+
+# Indexed tables -> (column, weight) pairs; weights rank business names above
+# purpose text above free-form analyst notes
+SEARCH_SOURCES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "loan_applications": (
+        ("business_name", "A"),
+        ("loan_purpose", "B"),
+        ("analyst_notes", "C"),
+    ),
+    "team_notes": (("content", "A"),),
+    "messages": (("content", "A"),),
+}
+
+# bm25 column weights for SQLite, matching the PostgreSQL A/B/C/D weights
+_BM25_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchClauses(NamedTuple):
+    """Expressions needed to search one indexed table."""
+
+    join_target: Any  # FTS table to join, or None when the index is inline
+    onclause: Any
+    where: Any
+    rank: Any  # Higher is more relevant on every dialect
+    snippet: Any
+
+
+# ===== INDEX MAINTENANCE =====
+
+
+def _postgres_ddl(table_name: str, columns: Tuple[Tuple[str, str], ...]) -> List[str]:
+    vector = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce({name}, '')), '{weight}')"
+        for name, weight in columns
+    )
+    return [
+        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector "
+        f"ON {table_name} USING GIN (search_vector)",
+    ]
+
+
+def _sqlite_ddl(table_name: str, columns: Tuple[Tuple[str, str], ...]) -> List[str]:
+    fts = f"{table_name}_fts"
+    names = ", ".join(name for name, _ in columns)
+    new_values = ", ".join(f"new.{name}" for name, _ in columns)
+    old_values = ", ".join(f"old.{name}" for name, _ in columns)
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.rowid, {new_values});"
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.rowid, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{table_name}', content_rowid='rowid', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} "
+        f"ON {table_name} BEGIN {delete} {insert} END",
+    ]
+
+
+def install_search_index(bind) -> bool:
+    """Create the search index for every indexed table that exists (idempotent).
+
+    Newly created SQLite FTS tables are rebuilt from their content table so
+    rows written before the index existed are searchable. Returns False on
+    dialects without full-text support.
+    """
+    dialect = bind.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        return False
+
+    with bind.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        for table_name, columns in SEARCH_SOURCES.items():
+            if table_name not in existing:
+                continue
+            if dialect == "postgresql":
+                for statement in _postgres_ddl(table_name, columns):
+                    conn.execute(text(statement))
+                continue
+
+            fts = f"{table_name}_fts"
+            created = fts not in existing
+            for statement in _sqlite_ddl(table_name, columns):
+                conn.execute(text(statement))
+            if created:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    return True
+
+
+# ===== QUERY BUILDING =====
+
+
+def fts5_match_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: all terms, last one also as a prefix.
+
+    Every term is quoted so FTS5 operators and punctuation in user input
+    can't produce syntax errors. FTS5 doesn't stem prefix terms, so the last
+    term matches either its stem or the raw prefix (for typeahead). Returns
+    None when there is nothing to match.
+    """
+    terms = [f'"{term}"' for term in _TOKEN_RE.findall(query)]
+    if not terms:
+        return None
+    terms[-1] = f"({terms[-1]} OR {terms[-1]}*)"
+    return " AND ".join(terms)
+
+
+def search_clauses(
+    dialect: str, table_name: str, query: str
+) -> Optional[SearchClauses]:
+    """Build match, rank and snippet expressions for ``query`` on ``table_name``.
+
+    Returns None when the query has no searchable terms.
+    """
+    columns = SEARCH_SOURCES[table_name]
+
+    if dialect == "postgresql":
+        if not _TOKEN_RE.search(query):
+            return None
+        tsquery = func.websearch_to_tsquery(SEARCH_LANGUAGE, query)
+        vector = literal_column(f"{table_name}.search_vector")
+        document = func.concat_ws(
+            " ", *(literal_column(f"{table_name}.{name}") for name, _ in columns)
+        )
+        options = (
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+            f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+        )
+        return SearchClauses(
+            join_target=None,
+            onclause=None,
+            where=vector.op("@@")(tsquery),
+            rank=func.ts_rank_cd(vector, tsquery),
+            snippet=func.ts_headline(SEARCH_LANGUAGE, document, tsquery, options),
+        )
+
+    match = fts5_match_query(query)
+    if match is None:
+        return None
+    fts_name = f"{table_name}_fts"
+    fts = table(fts_name, column("rowid"))
+    weights = ", ".join(str(_BM25_WEIGHTS[weight]) for _, weight in columns)
+    return SearchClauses(
+        join_target=fts,
+        onclause=fts.c.rowid == literal_column(f"{table_name}.rowid"),
+        where=literal_column(fts_name).op("MATCH")(match),
+        # bm25 is lower-is-better; negate so callers can sort descending
+        rank=-literal_column(f"bm25({fts_name}, {weights})"),
+        snippet=func.snippet(
+            literal_column(fts_name), -1, SNIPPET_START, SNIPPET_END, "…", SNIPPET_WORDS
+        ),
+    )
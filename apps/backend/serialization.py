@@ -0,0 +1,55 @@
+"""
+Fast JSON serialization for Caelo Backend.
+
+Endpoints normally build Pydantic models with ``from_orm`` and let FastAPI
+validate them again against ``response_model`` before running
+``jsonable_encoder`` and ``json.dumps``. The helpers here validate ORM
+objects once through a cached ``TypeAdapter`` and dump straight to JSON
+bytes in pydantic-core, returning a ready ``Response`` that FastAPI passes
+through untouched.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+# Response class for routes that still go through FastAPI's own encoding
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema: Any) -> TypeAdapter:
+    """Build (once) the validator/serializer pair for a schema or type."""
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, data: Any, from_attributes: bool = True) -> bytes:
+    """Validate ``data`` against ``schema`` once and serialize it to JSON bytes."""
+    adapter = get_adapter(schema)
+    return adapter.dump_json(
+        adapter.validate_python(data, from_attributes=from_attributes)
+    )
+
+
+def json_response(
+    schema: Any,
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize ``data`` as ``schema`` into a response FastAPI sends as-is."""
+    return Response(
+        content=dump_json(schema, data),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
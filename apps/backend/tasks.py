@@ -0,0 +1,34 @@
+"""
+Background Tasks for Caelo Backend.
+
+Work queued off the request path (see ``jobs``). Each task opens its own
+database session, since it runs after the request's session is closed,
+possibly in another process. Arguments are strings so they serialize for
+either job backend.
+"""
+
+import uuid
+
+from database import SessionLocal
+from jobs import PRIORITY_LOW, task
+from crud_operations import recompute_cash_flow_metrics, score_transaction_anomalies
+
+
+@task(unique=True, priority=PRIORITY_LOW)
+def score_application_transactions(application_id: str) -> int:
+    """Rescore an application's transactions for anomalies."""
+    db = SessionLocal()
+    try:
+        return score_transaction_anomalies(db, uuid.UUID(application_id))
+    finally:
+        db.close()
+
+
+@task(unique=True, priority=PRIORITY_LOW)
+def refresh_cash_flow_metrics(application_id: str) -> bool:
+    """Recompute an application's cash flow metrics from its transactions."""
+    db = SessionLocal()
+    try:
+        return recompute_cash_flow_metrics(db, uuid.UUID(application_id))
+    finally:
+        db.close()
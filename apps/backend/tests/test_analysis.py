@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+import pytest
+
+from analysis import (
+    DocumentUnreadable,
+    analyze_document,
+    parse_amount,
+    parse_bank_statement,
+    retry_delay,
+    robust_z_scores,
+)
+
+
+def write(tmp_path, text, name="statement.csv"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+class TestBankStatements:
+    """Test extracting transactions from CSV statement exports."""
+
+    def test_signed_amounts_become_inflows_and_outflows(self, tmp_path):
+        path = write(
+            tmp_path,
+            (
+                "Date,Description,Amount,Category\n"
+                '2024-01-02,Customer payment,"1,250.00",Sales\n'
+                "01/05/2024,Rent,(900.00),\n"
+                "2024-01-09,Supplies,-45.5,Supplies\n"
+            ),
+        )
+
+        output = parse_bank_statement(path)
+
+        assert [
+            (t["type"], t["amount"], t["category"]) for t in output["transactions"]
+        ] == [
+            ("inflow", "1250.00", "Sales"),
+            ("outflow", "900.00", "Uncategorized"),
+            ("outflow", "45.50", "Supplies"),
+        ]
+        results = output["results"]
+        assert results["period_start"] == "2024-01-02"
+        assert results["period_end"] == "2024-01-09"
+        assert results["net_flow"] == "304.50"
+
+    def test_debit_and_credit_columns(self, tmp_path):
+        path = write(
+            tmp_path,
+            (
+                "Posting Date;Memo;Debit;Credit\n"
+                "2024-02-01;Deposit;;500.00\n"
+                "2024-02-03;Card;20.00;\n"
+            ),
+        )
+
+        transactions = parse_bank_statement(path)["transactions"]
+
+        assert [(t["type"], t["amount"]) for t in transactions] == [
+            ("inflow", "500.00"),
+            ("outflow", "20.00"),
+        ]
+
+    def test_bad_rows_are_skipped_and_counted(self, tmp_path):
+        path = write(
+            tmp_path,
+            (
+                "Date,Description,Amount\n"
+                "2024-01-02,Payment,10.00\n"
+                "not a date,Broken,5.00\n"
+                "2024-01-03,Zero,0\n"
+            ),
+        )
+
+        output = parse_bank_statement(path)
+
+        assert output["results"]["transaction_count"] == 1
+        assert output["results"]["skipped_rows"] == 2
+
+    def test_statement_without_amount_column_is_unreadable(self, tmp_path):
+        path = write(tmp_path, "Date,Description\n2024-01-02,Payment\n")
+
+        with pytest.raises(DocumentUnreadable):
+            parse_bank_statement(path)
+
+    def test_other_documents_get_file_facts(self, tmp_path):
+        path = write(tmp_path, "line one\nline two\n", name="plan.txt")
+
+        output = analyze_document(path, "business_plan", "text/plain")
+
+        assert output["results"] == {"kind": "file", "bytes": 18, "lines": 2}
+        assert output["transactions"] == []
+
+
+class TestParsing:
+    """Test amount parsing and retry backoff."""
+
+    def test_amount_formats(self):
+        assert parse_amount("$1,234.56") == Decimal("1234.56")
+        assert parse_amount("(12.00)") == Decimal("-12.00")
+        assert parse_amount("  ") is None
+        with pytest.raises(ValueError):
+            parse_amount("twelve")
+
+    def test_retry_delay_doubles(self):
+        assert retry_delay(2) == 2 * retry_delay(1)
+
+
+class TestRobustZScores:
+    """Test the anomaly baseline used to rescore transactions."""
+
+    def test_outlier_stands_out_from_baseline(self):
+        scores = robust_z_scores([100, 110, 95, 105, 98, 102, 99, 101, 5000])
+
+        assert abs(scores[-1]) > 3.5
+        assert all(abs(score) < 3.5 for score in scores[:-1])
+
+    def test_no_baseline_for_small_or_flat_samples(self):
+        assert robust_z_scores([100, 5000]) == [None, None]
+        assert robust_z_scores([100] * 10) == [None] * 10
@@ -0,0 +1,189 @@
+import asyncio
+import uuid
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+import analysis_worker
+from analysis import ANALYSIS_CRASH_ERROR
+from analysis_worker import AnalysisWorker
+from crud_operations import (
+    claim_analysis_jobs,
+    complete_analysis_job,
+    release_analysis_job,
+)
+from models_new import (
+    AnalysisJobStatus,
+    Document,
+    DocumentAnalysisJob,
+    DocumentType,
+    LoanApplication,
+)
+
+
+class BrokenPool(Executor):
+    """Stands in for a process pool whose process has died."""
+
+    created = []
+
+    def __init__(self, max_workers=None, **options):
+        self.max_workers = max_workers
+        self.shut_down = False
+        BrokenPool.created.append(self)
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("a child process terminated"))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shut_down = True
+
+
+def job(isolate=False):
+    return {
+        "job_id": uuid.uuid4(),
+        "attempts": 1,
+        "document_id": uuid.uuid4(),
+        "path": "/nonexistent",
+        "document_type": "other",
+        "mime_type": None,
+        "isolate": isolate,
+    }
+
+
+class TestBrokenPool:
+    """Test that a dead pool process doesn't charge every job on the pool."""
+
+    @pytest_asyncio.fixture
+    async def worker(self, monkeypatch):
+        BrokenPool.created = []
+        monkeypatch.setattr(analysis_worker, "ProcessPoolExecutor", BrokenPool)
+        worker = AnalysisWorker(processes=2)
+        worker._loop = asyncio.get_running_loop()
+        worker._isolation = asyncio.Lock()
+        worker._pool = worker._new_pool()
+        worker.recorded = []
+
+        async def record(operation, *args):
+            worker.recorded.append((operation.__name__, args[0]["job_id"], args[1:]))
+
+        worker._record = record
+        return worker
+
+    @pytest.mark.asyncio
+    async def test_pool_is_replaced_once_and_jobs_requeued(self, worker):
+        broken = worker._pool
+        jobs = [job(), job()]
+
+        await asyncio.gather(*(worker._process(item) for item in jobs))
+
+        assert broken.shut_down
+        assert len(BrokenPool.created) == 2
+        assert worker._pool is BrokenPool.created[1]
+        assert not worker._pool.shut_down
+        assert worker.recorded == [
+            ("release_analysis_job", item["job_id"], (ANALYSIS_CRASH_ERROR,))
+            for item in jobs
+        ]
+
+    @pytest.mark.asyncio
+    async def test_isolated_crash_counts_an_attempt(self, worker):
+        pool = worker._pool
+        item = job(isolate=True)
+
+        await worker._process(item)
+
+        # Run on a single-process pool of its own, leaving the shared one
+        isolated = BrokenPool.created[-1]
+        assert isolated.max_workers == 1 and isolated.shut_down
+        assert worker._pool is pool and not pool.shut_down
+        assert worker.recorded == [
+            ("fail_analysis_job", item["job_id"], (ANALYSIS_CRASH_ERROR, True))
+        ]
+
+
+@pytest.fixture
+def queued_job(enhanced_sessions, make_user):
+    borrower, _ = make_user("borrower")
+    db = enhanced_sessions()
+    application = LoanApplication(
+        business_name="Acme Bakery",
+        business_type="Retail",
+        loan_amount=Decimal("25000"),
+        loan_purpose="Equipment",
+        borrower_id=borrower.id,
+    )
+    db.add(application)
+    db.flush()
+    document = Document(
+        application_id=application.id,
+        name="plan.txt",
+        type=DocumentType.other,
+        file_path="blobs/plan.txt",
+    )
+    db.add(document)
+    db.flush()
+    analysis_job = DocumentAnalysisJob(
+        document_id=document.id, run_after=datetime.now(timezone.utc)
+    )
+    db.add(analysis_job)
+    db.commit()
+    yield db, analysis_job.id
+    db.close()
+
+
+class TestReleaseAnalysisJob:
+    """Test requeueing a claimed job without using up an attempt."""
+
+    def test_released_job_is_reclaimed_for_isolation(self, queued_job):
+        db, job_id = queued_job
+        (claimed,) = claim_analysis_jobs(db, 5)
+        assert claimed["attempts"] == 1
+        assert not claimed["isolate"]
+
+        assert release_analysis_job(db, claimed, ANALYSIS_CRASH_ERROR)
+        stored = db.get(DocumentAnalysisJob, job_id, populate_existing=True)
+        assert stored.status == AnalysisJobStatus.queued
+        assert stored.attempts == 0
+
+        (reclaimed,) = claim_analysis_jobs(db, 5)
+        assert reclaimed["attempts"] == 1
+        assert reclaimed["isolate"]
+
+    def test_stale_claim_cannot_release(self, queued_job):
+        db, _ = queued_job
+        (claimed,) = claim_analysis_jobs(db, 5)
+
+        assert not release_analysis_job(
+            db, dict(claimed, attempts=2), ANALYSIS_CRASH_ERROR
+        )
+
+
+class TestCompleteAnalysisJob:
+    """Test storing a job's results."""
+
+    def test_completed_analysis_changes_the_detail_etag(
+        self, enhanced_client, make_user, queued_job
+    ):
+        db, job_id = queued_job
+        _, headers = make_user("admin")
+        document_id = db.get(DocumentAnalysisJob, job_id).document_id
+        url = f"/applications/{db.get(Document, document_id).application_id}"
+        before = enhanced_client.get(url, headers=headers)
+        assert before.status_code == 200, before.text
+        assert not before.json()["documents"][0]["is_analyzed"]
+
+        (claimed,) = claim_analysis_jobs(db, 5)
+        assert complete_analysis_job(db, claimed, {"summary": "ok"}, [])
+
+        after = enhanced_client.get(
+            url, headers={**headers, "If-None-Match": before.headers["ETag"]}
+        )
+        assert after.status_code == 200
+        assert after.headers["ETag"] != before.headers["ETag"]
+        assert after.json()["documents"][0]["is_analyzed"]
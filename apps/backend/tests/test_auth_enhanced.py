@@ -0,0 +1,289 @@
+import uuid
+from datetime import datetime, timezone
+
+import bcrypt
+import pytest
+
+import auth_enhanced
+from auth_enhanced import (
+    DEFAULT_BCRYPT_ROUNDS,
+    TokenVersionCache,
+    authenticate_user,
+    calibrate_bcrypt_rounds,
+    configure_password_hashing,
+    create_access_token,
+    create_claims_token,
+    get_bcrypt_rounds,
+    revoke_user_tokens,
+    token_version_cache,
+    verify_and_update_password,
+)
+from crud_operations import deactivate_user, update_user
+from models_new import User, UserRole
+
+
+@pytest.fixture(autouse=True)
+def fresh_token_versions():
+    token_version_cache.clear()
+    yield
+    token_version_cache.clear()
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def claims_headers(user):
+    return bearer(create_claims_token(user))
+
+
+def set_user_fields(sessions, user_id, **fields):
+    """Change a user row directly, without revoking its tokens."""
+    db = sessions()
+    try:
+        db.query(User).filter(User.id == user_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+class TestGetCurrentPrincipal:
+    """Claims tokens are checked against the user's token version."""
+
+    def test_claims_token_authorizes(self, enhanced_client, make_user):
+        admin, _ = make_user("admin")
+
+        response = enhanced_client.get(
+            f"/users/{admin.id}", headers=claims_headers(admin)
+        )
+
+        assert response.status_code == 200
+        assert response.json()["email"] == admin.email
+
+    def test_token_rejected_after_version_bump(
+        self, enhanced_client, enhanced_sessions, make_user
+    ):
+        admin, _ = make_user("admin")
+        headers = claims_headers(admin)
+        assert enhanced_client.get("/users", headers=headers).status_code == 200
+
+        db = enhanced_sessions()
+        revoke_user_tokens(db, db.get(User, admin.id))
+        db.commit()
+        db.close()
+
+        assert enhanced_client.get("/users", headers=headers).status_code == 401
+        admin.token_version = 1
+        assert (
+            enhanced_client.get("/users", headers=claims_headers(admin)).status_code
+            == 200
+        )
+
+    def test_update_user_changing_a_claim_revokes_tokens(
+        self, enhanced_client, enhanced_sessions, make_user
+    ):
+        analyst, _ = make_user("analyst")
+        headers = claims_headers(analyst)
+
+        db = enhanced_sessions()
+        update_user(db, analyst.id, {"last_login": datetime.now(timezone.utc)})
+        db.close()
+        assert enhanced_client.get("/users", headers=headers).status_code == 200
+
+        db = enhanced_sessions()
+        update_user(db, analyst.id, {"role": UserRole.borrower})
+        db.close()
+        assert enhanced_client.get("/users", headers=headers).status_code == 401
+
+    def test_legacy_token_without_claims_falls_back_to_user_lookup(
+        self, enhanced_client, make_user
+    ):
+        analyst, _ = make_user("analyst")
+        headers = bearer(
+            create_access_token({"sub": analyst.email, "role": analyst.role.value})
+        )
+
+        assert enhanced_client.get("/users", headers=headers).status_code == 200
+
+    def test_inactive_user_is_rejected(
+        self, enhanced_client, enhanced_sessions, make_user
+    ):
+        admin, _ = make_user("admin")
+        claims = claims_headers(admin)
+        legacy = bearer(create_access_token({"sub": admin.email}))
+
+        set_user_fields(enhanced_sessions, admin.id, is_active=False)
+        token_version_cache.invalidate(admin.id)
+
+        assert enhanced_client.get("/users", headers=claims).status_code == 403
+        assert enhanced_client.get("/users", headers=legacy).status_code == 403
+
+    def test_deactivated_user_tokens_are_revoked(
+        self, enhanced_client, enhanced_sessions, make_user
+    ):
+        admin, _ = make_user("admin")
+        headers = claims_headers(admin)
+
+        db = enhanced_sessions()
+        deactivate_user(db, admin.id)
+        db.close()
+
+        assert enhanced_client.get("/users", headers=headers).status_code == 401
+
+
+class TestRoleChecker:
+    """Role checks authorize from the token's role claim."""
+
+    def test_role_claim_is_enforced(self, enhanced_client, make_user):
+        borrower, _ = make_user("borrower")
+        loan_officer, _ = make_user("loan_officer")
+
+        assert (
+            enhanced_client.get("/users", headers=claims_headers(borrower)).status_code
+            == 403
+        )
+        assert (
+            enhanced_client.get(
+                "/users", headers=claims_headers(loan_officer)
+            ).status_code
+            == 200
+        )
+
+    def test_role_comes_from_claims_not_the_user_row(
+        self, enhanced_client, enhanced_sessions, make_user
+    ):
+        borrower, _ = make_user("borrower")
+        headers = claims_headers(borrower)
+
+        # Promoted behind the API's back: the token's role still applies
+        set_user_fields(enhanced_sessions, borrower.id, role=UserRole.admin)
+
+        assert enhanced_client.get("/users", headers=headers).status_code == 403
+
+
+class TestTokenVersionCache:
+    """Token versions are cached per process until invalidated or expired."""
+
+    def test_hit_skips_the_database_until_invalidated(
+        self, enhanced_sessions, make_user
+    ):
+        user, _ = make_user("borrower")
+        cache = TokenVersionCache(ttl=60)
+        db = enhanced_sessions()
+
+        assert cache.get(db, user.id) == (0, True)
+        set_user_fields(enhanced_sessions, user.id, token_version=3)
+        assert cache.get(db, user.id) == (0, True)
+
+        cache.invalidate(user.id)
+        assert cache.get(db, user.id) == (3, True)
+        db.close()
+
+    def test_entries_expire_after_ttl(self, enhanced_sessions, make_user):
+        user, _ = make_user("borrower")
+        cache = TokenVersionCache(ttl=0)
+        db = enhanced_sessions()
+
+        assert cache.get(db, user.id) == (0, True)
+        set_user_fields(enhanced_sessions, user.id, is_active=False)
+        assert cache.get(db, user.id) == (0, False)
+        db.close()
+
+    def test_unknown_user_is_not_cached(self, enhanced_sessions):
+        cache = TokenVersionCache()
+        db = enhanced_sessions()
+
+        assert cache.get(db, uuid.uuid4()) is None
+        assert cache._entries == {}
+        db.close()
+
+
+def hash_at(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def cost_of(password_hash):
+    return int(password_hash.split("$")[2])
+
+
+@pytest.fixture
+def cheap_hashing():
+    """Hash at cost 5 (tolerance 1), restoring the default policy afterwards."""
+    configure_password_hashing(5)
+    yield
+    configure_password_hashing(DEFAULT_BCRYPT_ROUNDS)
+
+
+class TestPasswordRehashing:
+    """Hashes outside the cost policy are replaced on a successful login."""
+
+    def test_hash_within_tolerance_is_kept(self, cheap_hashing):
+        assert get_bcrypt_rounds() == 5
+        assert verify_and_update_password("s3cret", hash_at("s3cret", 5)) == (
+            True,
+            None,
+        )
+        assert verify_and_update_password("s3cret", hash_at("s3cret", 6)) == (
+            True,
+            None,
+        )
+
+    @pytest.mark.parametrize("rounds", [4, 7])
+    def test_hash_outside_tolerance_is_replaced(self, cheap_hashing, rounds):
+        valid, new_hash = verify_and_update_password(
+            "s3cret", hash_at("s3cret", rounds)
+        )
+
+        assert valid
+        assert cost_of(new_hash) == 5
+        assert bcrypt.checkpw(b"s3cret", new_hash.encode())
+
+    def test_wrong_password_is_not_rehashed(self, cheap_hashing):
+        assert verify_and_update_password("guess", hash_at("s3cret", 7)) == (
+            False,
+            None,
+        )
+
+    def test_login_saves_the_upgraded_hash(
+        self, cheap_hashing, enhanced_sessions, make_user
+    ):
+        user, _ = make_user("borrower", password_hash=hash_at("s3cret", 4))
+        db = enhanced_sessions()
+
+        assert authenticate_user(db, user.email, "wrong") is None
+        assert cost_of(db.get(User, user.id).password_hash) == 4
+
+        assert authenticate_user(db, user.email, "s3cret") is not None
+        db.close()
+
+        db = enhanced_sessions()
+        stored = db.get(User, user.id)
+        assert cost_of(stored.password_hash) == 5
+        assert stored.last_login is not None
+        db.close()
+
+
+class TestCalibrateBcryptRounds:
+    """Calibration extrapolates a sample hash and clamps to the bounds."""
+
+    @pytest.fixture(autouse=True)
+    def bounds(self, monkeypatch):
+        monkeypatch.setattr(auth_enhanced, "BCRYPT_MIN_ROUNDS", 10)
+        monkeypatch.setattr(auth_enhanced, "BCRYPT_MAX_ROUNDS", 15)
+
+    def sample_takes(self, monkeypatch, ms):
+        monkeypatch.setattr(auth_enhanced, "_time_hash", lambda salt: ms)
+
+    def test_picks_the_cost_closest_to_the_target(self, monkeypatch):
+        # 4ms at cost 8 doubles to 256ms at cost 14
+        self.sample_takes(monkeypatch, 4.0)
+        assert calibrate_bcrypt_rounds(target_ms=250, sample_rounds=8) == 14
+        assert calibrate_bcrypt_rounds(target_ms=120, sample_rounds=8) == 13
+
+    def test_fast_hosts_are_capped_at_the_maximum(self, monkeypatch):
+        self.sample_takes(monkeypatch, 0.001)
+        assert calibrate_bcrypt_rounds(target_ms=250, sample_rounds=8) == 15
+
+    def test_slow_hosts_never_drop_below_the_minimum(self, monkeypatch):
+        self.sample_takes(monkeypatch, 500.0)
+        assert calibrate_bcrypt_rounds(target_ms=250, sample_rounds=8) == 10
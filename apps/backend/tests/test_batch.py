@@ -0,0 +1,198 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from models_new import (
+    ApplicationStatus,
+    LoanApplication,
+    Message,
+    TeamNote,
+    Transaction,
+    TransactionType,
+)
+
+
+def add_application(sessions, borrower, **fields):
+    db = sessions()
+    application = LoanApplication(
+        business_name=fields.pop("business_name", "Acme Bakery"),
+        business_type="Retail",
+        loan_amount=Decimal("25000.00"),
+        loan_purpose="Equipment",
+        borrower_id=borrower.id,
+        **fields,
+    )
+    db.add(application)
+    db.commit()
+    application_id = application.id
+    db.close()
+    return application_id
+
+
+@pytest.fixture
+def seeded(enhanced_sessions, make_user):
+    """Two applications of one borrower with child rows, one of another's."""
+    admin = make_user("admin")
+    borrower = make_user("borrower")
+    other = make_user("borrower")
+    officer = admin[0]
+    now = datetime.now(timezone.utc)
+
+    first = add_application(enhanced_sessions, borrower[0])
+    second = add_application(
+        enhanced_sessions,
+        borrower[0],
+        business_name="Acme Annex",
+        status=ApplicationStatus.under_review,
+        loan_officer_id=officer.id,
+        risk_score=0.42,
+    )
+    foreign = add_application(enhanced_sessions, other[0])
+
+    db = enhanced_sessions()
+    for days, application_id in [(1, first), (2, first), (3, second)]:
+        db.add(
+            Transaction(
+                application_id=application_id,
+                transaction_date=now - timedelta(days=days),
+                type=TransactionType.inflow,
+                category="Sales",
+                description=f"Sale {days}",
+                amount=Decimal("100.00"),
+            )
+        )
+    db.add(TeamNote(application_id=first, author_id=officer.id, content="Looks good"))
+    db.add(
+        TeamNote(
+            application_id=first,
+            author_id=officer.id,
+            content="Internal only",
+            is_private=True,
+        )
+    )
+    db.add(
+        Message(
+            application_id=second,
+            sender_id=borrower[0].id,
+            content="Any news?",
+            is_from_lender=False,
+        )
+    )
+    db.commit()
+    db.close()
+    return {
+        "admin": admin[1],
+        "borrower": borrower[1],
+        "first": str(first),
+        "second": str(second),
+        "foreign": str(foreign),
+    }
+
+
+def batch(client, headers, ids, sections=None):
+    body = {"application_ids": ids}
+    if sections is not None:
+        body["sections"] = sections
+    return client.post("/batch/applications", json=body, headers=headers)
+
+
+class TestBatchApplications:
+    def test_unknown_and_inaccessible_ids_are_reported_separately(
+        self, enhanced_client, seeded
+    ):
+        missing = str(uuid.uuid4())
+
+        response = batch(
+            enhanced_client,
+            seeded["borrower"],
+            [seeded["foreign"], missing, seeded["first"]],
+            ["summary"],
+        )
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert [item["id"] for item in body["items"]] == [seeded["first"]]
+        assert body["not_found"] == [missing]
+        assert body["forbidden"] == [seeded["foreign"]]
+
+    def test_sections_are_grouped_per_application(self, enhanced_client, seeded):
+        response = batch(
+            enhanced_client, seeded["admin"], [seeded["second"], seeded["first"]]
+        )
+
+        assert response.status_code == 200, response.text
+        second, first = response.json()["items"]
+        assert (second["id"], first["id"]) == (seeded["second"], seeded["first"])
+        assert [t["description"] for t in first["transactions"]] == ["Sale 1", "Sale 2"]
+        assert [t["description"] for t in second["transactions"]] == ["Sale 3"]
+        assert sorted(note["content"] for note in first["notes"]) == [
+            "Internal only",
+            "Looks good",
+        ]
+        assert second["notes"] == []
+        assert [message["content"] for message in second["messages"]] == ["Any news?"]
+        assert first["messages"] == []
+
+    def test_unrequested_sections_are_null(self, enhanced_client, seeded):
+        response = batch(
+            enhanced_client, seeded["admin"], [seeded["first"]], ["transactions"]
+        )
+
+        (item,) = response.json()["items"]
+        assert len(item["transactions"]) == 2
+        assert item["summary"] is None
+        assert item["notes"] is None
+        assert item["messages"] is None
+
+    def test_borrowers_do_not_see_private_notes(self, enhanced_client, seeded):
+        response = batch(
+            enhanced_client, seeded["borrower"], [seeded["first"]], ["notes"]
+        )
+
+        (item,) = response.json()["items"]
+        assert [note["content"] for note in item["notes"]] == ["Looks good"]
+
+    def test_at_most_fifty_ids(self, enhanced_client, seeded):
+        ids = [str(uuid.uuid4()) for _ in range(49)] + [seeded["first"]]
+        response = batch(enhanced_client, seeded["admin"], ids, ["summary"])
+        assert response.status_code == 200
+        assert len(response.json()["not_found"]) == 49
+
+        response = batch(
+            enhanced_client, seeded["admin"], ids + [str(uuid.uuid4())], ["summary"]
+        )
+        assert response.status_code == 422
+
+
+class TestApplicationSummaries:
+    def test_summary_fields_match_the_full_view(self, enhanced_client, seeded):
+        summaries = enhanced_client.get("/applications", headers=seeded["admin"])
+        full = enhanced_client.get(
+            "/applications", params={"view": "full"}, headers=seeded["admin"]
+        )
+        assert summaries.status_code == full.status_code == 200
+
+        full_by_id = {item["id"]: item for item in full.json()["items"]}
+        assert summaries.json()["total"] == full.json()["total"] == 3
+        for summary in summaries.json()["items"]:
+            record = full_by_id[summary["id"]]
+            assert summary["borrower_name"] == record["borrower"]["name"]
+            for field, value in summary.items():
+                if field != "borrower_name":
+                    assert value == record[field], field
+
+    def test_summary_matches_the_batch_summary(self, enhanced_client, seeded):
+        summaries = enhanced_client.get("/applications", headers=seeded["borrower"])
+        response = batch(
+            enhanced_client,
+            seeded["borrower"],
+            [seeded["first"], seeded["second"]],
+            ["summary"],
+        )
+
+        listed = {item["id"]: item for item in summaries.json()["items"]}
+        assert set(listed) == {seeded["first"], seeded["second"]}
+        for item in response.json()["items"]:
+            assert item["summary"] == listed[item["id"]]
@@ -0,0 +1,89 @@
+import time
+
+from cache import InMemoryCacheBackend, RedisCacheBackend, ResponseCache
+
+
+class FakeRedis:
+    """Minimal stand-in for the redis client commands the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None:
+            return None
+        if value[1] is not None and value[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return value[0]
+
+    def set(self, key, value, ex=None):
+        expires = time.monotonic() + ex if ex else None
+        self.data[key] = (
+            value if isinstance(value, bytes) else str(value).encode(),
+            expires,
+        )
+
+    def incr(self, key):
+        current = int(self.get(key) or 0) + 1
+        self.set(key, current)
+        return current
+
+
+class TestInMemoryCacheBackend:
+    """Test the in-process LRU backend."""
+
+    def test_ttl_expiry(self):
+        backend = InMemoryCacheBackend()
+        backend.set("k", b"v", ttl=0)
+
+        assert backend.get("k") is None
+
+    def test_lru_eviction(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1", ttl=60)
+        backend.set("b", b"2", ttl=60)
+        backend.get("a")
+        backend.set("c", b"3", ttl=60)
+
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
+
+
+class TestResponseCache:
+    """Test scope-keyed caching with generation-based invalidation."""
+
+    def check_backend(self, backend):
+        cache = ResponseCache(backend, "stats", ttl=60)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b'{"total": %d}' % len(calls)
+
+        assert cache.get_or_set("all", compute) == b'{"total": 1}'
+        assert cache.get_or_set("all", compute) == b'{"total": 1}'
+        assert cache.get_or_set("borrower:1", compute) == b'{"total": 2}'
+
+        cache.invalidate("application-id")
+
+        assert cache.get("all") is None
+        assert cache.get_or_set("all", compute) == b'{"total": 3}'
+
+    def test_in_memory_backend(self):
+        self.check_backend(InMemoryCacheBackend())
+
+    def test_redis_backend(self):
+        self.check_backend(RedisCacheBackend(FakeRedis()))
+
+    def test_entry_computed_during_invalidation_is_not_served(self):
+        cache = ResponseCache(InMemoryCacheBackend(), "stats", ttl=60)
+
+        def compute():
+            cache.invalidate()
+            return b"stale"
+
+        assert cache.get_or_set("all", compute) == b"stale"
+        assert cache.get("all") is None
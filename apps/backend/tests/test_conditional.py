@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from conditional import cache_headers, etag_matches, make_etag, not_modified
+
+
+class TestMakeEtag:
+    """Test ETag construction from version fingerprints."""
+
+    def test_etag_is_strong_and_stable(self):
+        version = (3, datetime(2025, 1, 1, 12, 0), None)
+        etag = make_etag("messages", "staff", version)
+
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("messages", "staff", version)
+
+    def test_etag_changes_with_version_and_scope(self):
+        version = (3, datetime(2025, 1, 1, 12, 0))
+
+        assert make_etag("notes", "staff", version) != make_etag(
+            "notes", "staff", (4, datetime(2025, 1, 1, 12, 0))
+        )
+        assert make_etag("notes", "staff", version) != make_etag(
+            "notes", "borrower", version
+        )
+
+
+class TestEtagMatches:
+    """Test If-None-Match evaluation."""
+
+    def test_matches(self):
+        etag = make_etag("detail", "staff", (1,))
+
+        assert etag_matches(etag, etag) is True
+        assert etag_matches(f'"other", {etag}', etag) is True
+        assert etag_matches(f"W/{etag}", etag) is True
+        assert etag_matches("*", etag) is True
+
+    def test_no_match(self):
+        etag = make_etag("detail", "staff", (1,))
+
+        assert etag_matches(None, etag) is False
+        assert etag_matches('"stale"', etag) is False
+
+
+class TestNotModified:
+    """Test 304 responses."""
+
+    def test_not_modified_response(self):
+        etag = make_etag("detail", "staff", (1,))
+        response = not_modified(etag)
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+        assert cache_headers(etag)["Cache-Control"] == "private, no-cache"
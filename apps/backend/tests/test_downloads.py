@@ -0,0 +1,101 @@
+import os
+
+import pytest
+from fastapi import FastAPI, Header, Request
+from fastapi.testclient import TestClient
+
+from downloads import (
+    RangeFileResponse,
+    RangeNotSatisfiable,
+    modified_since,
+    parse_range,
+)
+
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "statement.bin"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.api_route("/file", methods=["GET", "HEAD"])
+    async def download(
+        request: Request, range: str = Header(None), if_range: str = Header(None)
+    ):
+        return RangeFileResponse(
+            path,
+            os.stat(path),
+            range_header=range,
+            if_range=if_range,
+            headers={"ETag": '"abc"'},
+            method=request.method,
+        )
+
+    return TestClient(app)
+
+
+class TestParseRange:
+    """Test Range header parsing."""
+
+    def test_ranges(self):
+        assert parse_range("bytes=0-99", 1000) == (0, 99)
+        assert parse_range("bytes=900-", 1000) == (900, 999)
+        assert parse_range("bytes=-100", 1000) == (900, 999)
+        assert parse_range("bytes=990-2000", 1000) == (990, 999)
+
+    def test_unusable_ranges_send_whole_file(self):
+        assert parse_range(None, 1000) is None
+        assert parse_range("bytes=0-1,5-9", 1000) is None
+        assert parse_range("items=0-1", 1000) is None
+        assert parse_range("bytes=9-1", 1000) is None
+
+    def test_range_past_end_is_not_satisfiable(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=1000-", 1000)
+
+    def test_modified_since(self):
+        assert not modified_since("Thu, 01 Jan 2026 00:00:00 GMT", 1767225600)
+        assert modified_since("Thu, 01 Jan 2026 00:00:00 GMT", 1767225601)
+        assert modified_since("garbage", 0)
+
+
+class TestRangeFileResponse:
+    """Test full, partial and conditional file responses."""
+
+    def test_full_download(self, client):
+        response = client.get("/file")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_partial_download(self, client):
+        response = client.get("/file", headers={"Range": "bytes=100-199"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+        assert response.headers["content-length"] == "100"
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get("/file", headers={"Range": "bytes=20000-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_stale_if_range_sends_whole_file(self, client):
+        response = client.get(
+            "/file", headers={"Range": "bytes=0-9", "If-Range": '"old"'}
+        )
+
+        assert response.status_code == 200
+        assert len(response.content) == len(CONTENT)
+
+    def test_head_sends_no_body(self, client):
+        response = client.head("/file", headers={"Range": "bytes=0-9"})
+
+        assert response.status_code == 206
+        assert response.content == b""
@@ -0,0 +1,133 @@
+import json
+import queue
+import threading
+import time
+
+from events import BusEvent, EventBus, InProcessBusBackend, RedisBusBackend
+
+
+class FakeBroker:
+    """Minimal stand-in for Redis pub/sub shared by several clients."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.publishes = []
+        self.lock = threading.Lock()
+
+    def client(self):
+        return FakeRedis(self)
+
+
+class FakeRedis:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, data):
+        with self.broker.lock:
+            self.broker.publishes.append((channel, data))
+            subscribers = [s for s in self.broker.subscribers if channel in s.channels]
+        for subscriber in subscribers:
+            subscriber.messages.put(
+                {"type": "message", "channel": channel, "data": data}
+            )
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self.broker)
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+        with self.broker.lock:
+            self.broker.subscribers.append(self)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self.broker.lock:
+            if self in self.broker.subscribers:
+                self.broker.subscribers.remove(self)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestInProcessBus:
+    """Test direct in-process delivery."""
+
+    def test_events_reach_channel_handlers(self):
+        bus = EventBus(InProcessBusBackend())
+        received = []
+        bus.subscribe("feed", received.extend)
+        bus.subscribe("other", lambda items: received.append("wrong channel"))
+
+        bus.publish("feed", "a", "{}")
+
+        assert received == [("a", "{}")]
+
+    def test_failing_handler_does_not_block_others(self):
+        bus = EventBus(InProcessBusBackend())
+        received = []
+        bus.subscribe("feed", lambda items: 1 / 0)
+        bus.subscribe("feed", received.extend)
+
+        bus.publish("feed", "a", "{}")
+
+        assert received == [("a", "{}")]
+
+
+class TestRedisBus:
+    """Test cross-worker delivery through a Redis-compatible broker."""
+
+    def test_events_reach_every_worker(self):
+        broker = FakeBroker()
+        workers = [EventBus(RedisBusBackend(broker.client())) for _ in range(2)]
+        received = [[], []]
+        for bus, inbox in zip(workers, received):
+            bus.subscribe("feed", inbox.extend)
+            bus.start()
+        assert wait_until(lambda: len(broker.subscribers) == 2)
+
+        workers[0].publish("feed", "app-1", '{"type":"message"}')
+
+        try:
+            assert wait_until(lambda: all(received))
+            assert received == [[("app-1", '{"type":"message"}')]] * 2
+        finally:
+            for bus in workers:
+                bus.close()
+
+    def test_events_are_published_in_batches(self):
+        broker = FakeBroker()
+        backend = RedisBusBackend(broker.client(), batch_size=100)
+        for i in range(250):
+            backend.publish(BusEvent("feed", str(i), "{}"))
+
+        backend.start()
+        backend.close()
+
+        assert [len(json.loads(data)) for _, data in broker.publishes] == [100, 100, 50]
+        assert backend.published == 250
+
+    def test_full_queue_sheds_oldest_events_without_waiting(self):
+        backend = RedisBusBackend(FakeBroker().client(), max_pending=3)
+        started = time.monotonic()
+        for i in range(5):
+            backend.publish(BusEvent("feed", str(i), "{}"))
+
+        assert time.monotonic() - started < 0.05
+        assert backend.dropped == 2
+        assert [event.key for event in backend._pending] == ["2", "3", "4"]
@@ -0,0 +1,215 @@
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+
+from auth_enhanced import AuthPrincipal
+from crud_operations import get_application_facets
+from models_new import (
+    ApplicationPriority,
+    ApplicationStatus,
+    LoanApplication,
+    UserRole,
+)
+
+
+@pytest.fixture
+def seeded(enhanced_sessions, make_user):
+    """Two borrowers' applications, some assigned to one of two loan officers."""
+    people = {
+        "admin": make_user("admin"),
+        "officer": make_user("loan_officer"),
+        "other_officer": make_user("loan_officer"),
+        "borrower": make_user("borrower"),
+        "other_borrower": make_user("borrower"),
+    }
+    officer = people["officer"][0].id
+    other_officer = people["other_officer"][0].id
+    rows = [
+        ("borrower", "Retail", "pending", "high", None),
+        ("borrower", "Retail", "under_review", "high", officer),
+        ("borrower", "Services", "approved", "low", officer),
+        ("other_borrower", "Retail", "under_review", "urgent", other_officer),
+        ("other_borrower", "Farming", "rejected", "medium", other_officer),
+    ]
+    db = enhanced_sessions()
+    for borrower, business_type, status, priority, loan_officer_id in rows:
+        db.add(
+            LoanApplication(
+                business_name=f"{business_type} Co",
+                business_type=business_type,
+                loan_amount=Decimal("10000"),
+                loan_purpose="Working capital",
+                status=ApplicationStatus(status),
+                priority=ApplicationPriority(priority),
+                borrower_id=people[borrower][0].id,
+                loan_officer_id=loan_officer_id,
+            )
+        )
+    db.commit()
+    db.close()
+    return people
+
+
+def counts(facet_items):
+    return {item["value"]: item["count"] for item in facet_items}
+
+
+def get_facets(client, headers, **params):
+    response = client.get("/applications/facets", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestApplicationFacets:
+    def test_counts_every_facet(self, enhanced_client, seeded):
+        admin, headers = seeded["admin"]
+        officer = seeded["officer"][0]
+        other_officer = seeded["other_officer"][0]
+
+        facets = get_facets(enhanced_client, headers)
+
+        assert facets["total"] == 5
+        assert counts(facets["status"]) == {
+            "pending": 1,
+            "under_review": 2,
+            "approved": 1,
+            "rejected": 1,
+        }
+        assert counts(facets["priority"]) == {
+            "high": 2,
+            "low": 1,
+            "urgent": 1,
+            "medium": 1,
+        }
+        assert facets["business_type"][0] == {
+            "value": "Retail",
+            "label": None,
+            "count": 3,
+        }
+        assert counts(facets["loan_officer"]) == {
+            None: 1,
+            str(officer.id): 2,
+            str(other_officer.id): 2,
+        }
+        labels = {item["value"]: item["label"] for item in facets["loan_officer"]}
+        assert labels[str(officer.id)] == officer.name
+        assert labels[None] is None
+
+    def test_filters_apply_to_every_facet(self, enhanced_client, seeded):
+        facets = get_facets(enhanced_client, seeded["admin"][1], status="under_review")
+
+        assert facets["total"] == 2
+        assert counts(facets["priority"]) == {"high": 1, "urgent": 1}
+        assert counts(facets["business_type"]) == {"Retail": 2}
+
+    def test_borrowers_only_count_their_own(self, enhanced_client, seeded):
+        facets = get_facets(enhanced_client, seeded["other_borrower"][1])
+
+        assert facets["total"] == 2
+        assert counts(facets["business_type"]) == {"Retail": 1, "Farming": 1}
+
+    def test_loan_officers_count_assigned_and_pending(self, enhanced_client, seeded):
+        officer, headers = seeded["officer"]
+
+        facets = get_facets(enhanced_client, headers)
+
+        assert facets["total"] == 3
+        assert counts(facets["loan_officer"]) == {None: 1, str(officer.id): 2}
+
+    def test_counts_are_invalidated_by_changes(self, enhanced_client, seeded):
+        headers = seeded["admin"][1]
+        assert get_facets(enhanced_client, headers)["total"] == 5
+
+        response = enhanced_client.post(
+            "/applications",
+            json={
+                "business_name": "New Bakery",
+                "business_type": "Retail",
+                "loan_amount": 5000,
+                "loan_purpose": "Ovens",
+            },
+            headers=seeded["borrower"][1],
+        )
+        assert response.status_code == 200, response.text
+
+        facets = get_facets(enhanced_client, headers)
+        assert facets["total"] == 6
+        assert counts(facets["status"])["pending"] == 2
+
+        response = enhanced_client.put(
+            f"/applications/{response.json()['id']}",
+            json={"status": "under_review"},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+
+        facets = get_facets(enhanced_client, headers)
+        assert counts(facets["status"])["pending"] == 1
+        assert counts(facets["status"])["under_review"] == 3
+
+
+class PostgresRecorder:
+    """A session on a PostgreSQL engine that returns canned grouped rows."""
+
+    def __init__(self, rows):
+        self.engine = create_engine("postgresql://caelo@db/caelo")
+        self.rows = rows
+        self.statements = []
+
+    def get_bind(self):
+        return self.engine
+
+    def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.rows
+
+
+def grouped_row(grouping_id, count, **values):
+    columns = dict(
+        status=None,
+        priority=None,
+        business_type=None,
+        loan_officer_id=None,
+        officer_name=None,
+    )
+    return SimpleNamespace(
+        grouping_id=grouping_id, count=count, **{**columns, **values}
+    )
+
+
+class TestPostgresFacets:
+    def test_one_grouping_sets_scan_is_decoded_per_facet(self):
+        officer_id = uuid.uuid4()
+        db = PostgresRecorder(
+            [
+                grouped_row(0b0111, 2, status=ApplicationStatus.pending),
+                grouped_row(0b1011, 2, priority=ApplicationPriority.high),
+                grouped_row(0b1101, 2, business_type="Retail"),
+                grouped_row(0b1110, 1, loan_officer_id=officer_id, officer_name="Olu"),
+                grouped_row(0b1110, 1),
+                grouped_row(0b1111, 2),
+            ]
+        )
+        admin = AuthPrincipal(
+            id=uuid.uuid4(), email="admin@example.com", role=UserRole.admin, name="A"
+        )
+
+        facets = get_application_facets(db, admin)
+
+        (statement,) = db.statements
+        assert "GROUP BY GROUPING SETS" in statement
+        assert "UNION" not in statement
+        assert facets == {
+            "total": 2,
+            "status": [{"value": "pending", "label": None, "count": 2}],
+            "priority": [{"value": "high", "label": None, "count": 2}],
+            "business_type": [{"value": "Retail", "label": None, "count": 2}],
+            "loan_officer": [
+                {"value": str(officer_id), "label": "Olu", "count": 1},
+                {"value": None, "label": None, "count": 1},
+            ],
+        }
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+from jobs import (
+    JobRegistry,
+    JobState,
+    LocalJobBackend,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    set_job_backend,
+    task,
+)
+
+
+calls = []
+failures = {"remaining": 0}
+gate = threading.Event()
+
+
+@task(name="tests.record")
+def record(value):
+    calls.append(value)
+    return value
+
+
+@task(name="tests.blocked")
+def blocked():
+    gate.wait(5)
+
+
+@task(name="tests.flaky", max_retries=2, retry_backoff=0.01)
+def flaky():
+    if failures["remaining"]:
+        failures["remaining"] -= 1
+        raise RuntimeError("temporary outage")
+    return "done"
+
+
+@task(name="tests.coalesced", unique=True)
+def coalesced(key):
+    calls.append(key)
+
+
+def wait_for(backend, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = backend.status(job_id)
+        if job.state in (JobState.succeeded, JobState.failed):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def backend():
+    calls.clear()
+    gate.clear()
+    backend = LocalJobBackend(threads=1)
+    set_job_backend(backend)
+    yield backend
+    gate.set()
+    backend.close()
+    set_job_backend(None)
+
+
+class TestLocalJobBackend:
+    """Test queuing, ordering and retrying jobs on the local backend."""
+
+    def test_job_runs_and_reports_result(self, backend):
+        job_id = record.delay("a")
+
+        job = wait_for(backend, job_id)
+
+        assert job.state == JobState.succeeded
+        assert job.result == "a"
+        assert job.attempts == 1
+        assert job.name == "tests.record"
+
+    def test_higher_priority_runs_first(self, backend):
+        blocker = blocked.delay()
+        low = record.apply_async(("low",), priority=PRIORITY_LOW)
+        high = record.apply_async(("high",), priority=PRIORITY_HIGH)
+        gate.set()
+
+        wait_for(backend, blocker)
+        wait_for(backend, low)
+        wait_for(backend, high)
+
+        assert calls == ["high", "low"]
+
+    def test_failed_job_is_retried(self, backend):
+        failures["remaining"] = 2
+
+        job = wait_for(backend, flaky.delay())
+
+        assert job.state == JobState.succeeded
+        assert job.attempts == 3
+
+    def test_job_fails_after_retries_run_out(self, backend):
+        failures["remaining"] = 5
+
+        job = wait_for(backend, flaky.delay())
+
+        assert job.state == JobState.failed
+        assert job.attempts == 3
+        assert "temporary outage" in job.error
+
+    def test_unique_jobs_coalesce_while_queued(self, backend):
+        blocker = blocked.delay()
+        first = coalesced.delay("app-1")
+        assert coalesced.delay("app-1") == first
+        other = coalesced.delay("app-2")
+        gate.set()
+
+        for job_id in (blocker, first, other):
+            wait_for(backend, job_id)
+
+        assert sorted(calls) == ["app-1", "app-2"]
+        assert coalesced.delay("app-1") != first
+
+    def test_eager_mode_runs_inline(self):
+        calls.clear()
+        backend = LocalJobBackend(eager=True)
+        set_job_backend(backend)
+        try:
+            job_id = record.delay("now")
+        finally:
+            set_job_backend(None)
+
+        assert calls == ["now"]
+        assert backend.status(job_id).state == JobState.succeeded
+
+    def test_calling_task_runs_it_directly(self):
+        assert record("inline") == "inline"
+
+
+class FakeRedis:
+    """The string commands JobRegistry uses, returning bytes like redis-py."""
+
+    def __init__(self):
+        self.values = {}
+        self.expiries = {}
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+        self.expiries[key] = ex
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class TestJobRegistry:
+    """Test recording issued job ids for the Celery backend."""
+
+    def test_only_issued_ids_are_known(self):
+        client = FakeRedis()
+        registry = JobRegistry(client, ttl=60)
+
+        registry.add("abc", "tests.record")
+
+        assert registry.name("abc") == "tests.record"
+        assert registry.name("abd") is None
+        assert client.expiries["caelo:job:abc"] == 60
+        registry.discard("abc")
+        assert registry.name("abc") is None
+
+
+class TestCeleryJobBackend:
+    """Test job status through Celery, which needs the celery package."""
+
+    def test_unknown_job_id_is_not_found(self):
+        pytest.importorskip("celery")
+        from jobs import CeleryJobBackend
+
+        backend = CeleryJobBackend(
+            broker_url="memory://",
+            result_backend="cache+memory://",
+            registry=JobRegistry(FakeRedis()),
+        )
+
+        job_id = backend.submit(record, ("queued",), {}, PRIORITY_LOW, 0)
+
+        job = backend.status(job_id)
+        assert (job.name, job.state) == ("tests.record", JobState.pending)
+        assert backend.status("never-issued") is None
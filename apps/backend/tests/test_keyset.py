@@ -0,0 +1,124 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    Table,
+    create_engine,
+    insert,
+    select,
+)
+
+from keyset import (
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    keyset_predicate,
+    order_by_clauses,
+)
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("rank", Integer, nullable=False),
+    Column("score", Float, nullable=True),
+)
+
+
+def key(name, descending, nullable=False):
+    return SortKey(
+        items.c[name],
+        descending,
+        lambda row: getattr(row, name),
+        float if name == "score" else int,
+        nullable,
+    )
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    rows = [
+        {"id": i, "rank": rank, "score": score}
+        for i, (rank, score) in enumerate(
+            itertools.product([0, 1, 2], [None, 1.5, 2.5, 2.5])
+        )
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(items), rows)
+    return engine
+
+
+def paginate(engine, keys, size):
+    seen, cursor = [], None
+    with engine.connect() as conn:
+        while True:
+            query = select(items).order_by(*order_by_clauses(keys)).limit(size)
+            if cursor:
+                query = query.where(
+                    keyset_predicate(keys, decode_cursor(cursor, "test", keys))
+                )
+            rows = conn.execute(query).all()
+            seen += [row.id for row in rows]
+            if len(rows) < size:
+                return seen
+            cursor = encode_cursor("test", keys, rows[-1])
+
+
+class TestKeysetPagination:
+    """Test that cursor pages reproduce the full ordering."""
+
+    @pytest.mark.parametrize(
+        "keys",
+        [
+            (key("rank", True), key("id", True)),
+            (key("rank", False), key("id", False)),
+            (key("rank", True), key("score", True, nullable=True), key("id", True)),
+            (key("rank", True), key("score", False, nullable=True), key("id", False)),
+        ],
+    )
+    def test_pages_match_full_ordering(self, engine, keys):
+        with engine.connect() as conn:
+            expected = [
+                row.id
+                for row in conn.execute(select(items).order_by(*order_by_clauses(keys)))
+            ]
+
+        for size in (1, 2, 5):
+            assert paginate(engine, keys, size) == expected
+
+    def test_nulls_sort_last(self, engine):
+        keys = (key("score", True, nullable=True), key("id", True))
+        with engine.connect() as conn:
+            scores = [
+                row.score
+                for row in conn.execute(select(items).order_by(*order_by_clauses(keys)))
+            ]
+
+        assert scores[-3:] == [None, None, None]
+
+
+class TestCursorEncoding:
+    """Test cursor round trips and validation."""
+
+    def test_round_trip(self):
+        keys = (key("score", True, nullable=True), key("id", True))
+        cursor = encode_cursor("test", keys, SimpleNamespace(score=None, id=7))
+
+        assert decode_cursor(cursor, "test", keys) == [None, 7]
+
+    def test_rejects_other_sort_and_garbage(self):
+        keys = (key("rank", True), key("id", True))
+        cursor = encode_cursor("test", keys, SimpleNamespace(rank=1, id=2))
+
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "other", keys)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", "test", keys)
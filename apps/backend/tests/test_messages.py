@@ -0,0 +1,207 @@
+import pytest
+
+
+APPLICATION = {
+    "business_name": "Acme Bakery",
+    "business_type": "Retail",
+    "loan_amount": 25000,
+    "loan_purpose": "Equipment",
+}
+
+
+@pytest.fixture
+def people(make_user):
+    return {
+        "admin": make_user("admin")[1],
+        "borrower": make_user("borrower")[1],
+        "stranger": make_user("borrower")[1],
+    }
+
+
+def create_application(client, headers):
+    response = client.post("/applications", json=APPLICATION, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def send(client, application_id, headers, content="Hello"):
+    response = client.post(
+        f"/applications/{application_id}/messages",
+        json={
+            "application_id": application_id,
+            "content": content,
+            "is_from_lender": False,
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def inbox(client, headers):
+    return client.get("/messages/inbox", headers=headers).json()
+
+
+class TestUnreadCounters:
+    """Test unread counters kept on message writes."""
+
+    def test_new_message_counts_for_others_not_sender(self, enhanced_client, people):
+        application_id = create_application(enhanced_client, people["borrower"])
+        send(enhanced_client, application_id, people["admin"])
+        send(enhanced_client, application_id, people["admin"])
+
+        assert inbox(enhanced_client, people["borrower"])["total_unread"] == 2
+        assert inbox(enhanced_client, people["admin"])["total_unread"] == 0
+
+        send(enhanced_client, application_id, people["borrower"])
+
+        # Replying moves the sender's marker to their own message
+        assert inbox(enhanced_client, people["borrower"])["total_unread"] == 0
+        assert inbox(enhanced_client, people["admin"])["total_unread"] == 1
+
+    def test_reading_one_message_leaves_earlier_ones_unread(
+        self, enhanced_client, people
+    ):
+        application_id = create_application(enhanced_client, people["borrower"])
+        first = send(enhanced_client, application_id, people["admin"])
+        second = send(enhanced_client, application_id, people["admin"])
+
+        response = enhanced_client.put(
+            f"/messages/{second}/read", headers=people["borrower"]
+        )
+        enhanced_client.put(f"/messages/{second}/read", headers=people["borrower"])
+
+        assert response.status_code == 200
+        messages = enhanced_client.get(
+            f"/applications/{application_id}/messages", headers=people["borrower"]
+        ).json()
+        assert {m["id"]: m["is_read"] for m in messages} == {first: False, second: True}
+        assert inbox(enhanced_client, people["borrower"])["total_unread"] == 1
+
+    def test_read_marker_only_moves_forward(self, enhanced_client, people):
+        application_id = create_application(enhanced_client, people["borrower"])
+        ids = [send(enhanced_client, application_id, people["admin"]) for _ in range(3)]
+
+        def read_up_to(message_id):
+            response = enhanced_client.post(
+                f"/applications/{application_id}/messages/read",
+                json={"up_to_message_id": message_id},
+                headers=people["borrower"],
+            )
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        assert read_up_to(ids[1])["marked"] == 2
+        state = read_up_to(ids[0])
+        assert state["marked"] == 0
+        assert state["unread_count"] == 1
+        assert state["last_read_message_id"] == ids[1]
+        assert read_up_to(ids[2])["unread_count"] == 0
+
+    def test_inbox_totals_across_applications(self, enhanced_client, people):
+        busy = create_application(enhanced_client, people["borrower"])
+        quiet = create_application(enhanced_client, people["borrower"])
+        for _ in range(2):
+            send(enhanced_client, busy, people["admin"])
+        send(enhanced_client, quiet, people["admin"])
+
+        summary = inbox(enhanced_client, people["borrower"])
+
+        assert summary["total_unread"] == 3
+        assert [
+            (a["application_id"], a["unread_count"]) for a in summary["applications"]
+        ] == [
+            (busy, 2),
+            (quiet, 1),
+        ]
+
+    def test_read_endpoints_check_access(self, enhanced_client, people):
+        application_id = create_application(enhanced_client, people["borrower"])
+        other_application = create_application(enhanced_client, people["stranger"])
+        message_id = send(enhanced_client, application_id, people["admin"])
+
+        assert (
+            enhanced_client.put(
+                f"/messages/{message_id}/read", headers=people["stranger"]
+            ).status_code
+            == 403
+        )
+        for target, headers, expected in (
+            (application_id, people["stranger"], 403),
+            (other_application, people["borrower"], 404),
+        ):
+            response = enhanced_client.post(
+                f"/applications/{target}/messages/read",
+                json={"up_to_message_id": message_id},
+                headers=headers,
+            )
+            assert response.status_code == expected
+        assert inbox(enhanced_client, people["stranger"])["total_unread"] == 0
+        assert inbox(enhanced_client, people["borrower"])["total_unread"] == 1
+
+    def test_each_recipient_counts_their_own_read(
+        self, enhanced_client, make_user, people
+    ):
+        officer, officer_headers = make_user("loan_officer")
+        underwriter, underwriter_headers = make_user("loan_officer")
+        application_id = create_application(enhanced_client, people["borrower"])
+        response = enhanced_client.put(
+            f"/applications/{application_id}",
+            json={
+                "loan_officer_id": str(officer.id),
+                "underwriter_id": str(underwriter.id),
+            },
+            headers=people["admin"],
+        )
+        assert response.status_code == 200, response.text
+        message_id = send(enhanced_client, application_id, people["borrower"])
+        assert inbox(enhanced_client, officer_headers)["total_unread"] == 1
+        assert inbox(enhanced_client, underwriter_headers)["total_unread"] == 1
+
+        for headers in (officer_headers, underwriter_headers, officer_headers):
+            response = enhanced_client.put(
+                f"/messages/{message_id}/read", headers=headers
+            )
+            assert response.status_code == 200, response.text
+
+        assert inbox(enhanced_client, officer_headers)["total_unread"] == 0
+        assert inbox(enhanced_client, underwriter_headers)["total_unread"] == 0
+
+    def test_read_up_to_skips_messages_already_read_on_their_own(
+        self, enhanced_client, people
+    ):
+        application_id = create_application(enhanced_client, people["borrower"])
+        ids = [send(enhanced_client, application_id, people["admin"]) for _ in range(3)]
+        enhanced_client.put(f"/messages/{ids[2]}/read", headers=people["borrower"])
+
+        response = enhanced_client.post(
+            f"/applications/{application_id}/messages/read",
+            json={"up_to_message_id": ids[1]},
+            headers=people["borrower"],
+        )
+
+        assert response.status_code == 200, response.text
+        assert response.json()["marked"] == 2
+        assert response.json()["unread_count"] == 0
+        enhanced_client.put(f"/messages/{ids[2]}/read", headers=people["borrower"])
+        assert inbox(enhanced_client, people["borrower"])["total_unread"] == 0
+
+    def test_loan_officers_read_messages_on_any_application(
+        self, enhanced_client, make_user, people
+    ):
+        officer, officer_headers = make_user("loan_officer")
+        application_id = create_application(enhanced_client, people["borrower"])
+        message_id = send(enhanced_client, application_id, people["borrower"])
+        response = enhanced_client.put(
+            f"/applications/{application_id}",
+            json={"status": "under_review"},
+            headers=people["admin"],
+        )
+        assert response.status_code == 200, response.text
+
+        # Unassigned and no longer pending, like the other per-application routes
+        response = enhanced_client.put(
+            f"/messages/{message_id}/read", headers=officer_headers
+        )
+
+        assert response.status_code == 200, response.text
@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import pytest
+from PIL import Image
+
+import previews
+from previews import PreviewCache, PreviewUnavailable, evict, render_preview
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "previews"
+    monkeypatch.setattr(previews, "PREVIEW_CACHE_DIR", directory)
+    return directory
+
+
+def write_image(path, size=(2000, 1000), mode="RGB", fmt="JPEG"):
+    Image.new(mode, size, "red").save(path, fmt)
+    return path
+
+
+class TestRendering:
+    """Test first-page rendering."""
+
+    def test_image_is_downsampled_to_edge(self, tmp_path):
+        source = write_image(tmp_path / "scan.jpg")
+
+        image = render_preview(source, "image/jpeg", 256)
+
+        assert image.size == (256, 128)
+        assert image.mode == "RGB"
+
+    def test_transparent_image_is_flattened(self, tmp_path):
+        source = write_image(
+            tmp_path / "logo.png", size=(64, 64), mode="RGBA", fmt="PNG"
+        )
+
+        assert render_preview(source, "image/png", 256).mode == "RGB"
+
+    def test_text_is_drawn_as_a_page(self, tmp_path):
+        source = tmp_path / "statement.csv"
+        source.write_text("Date,Description,Amount\n2024-01-02,Payment,10.00\n")
+
+        image = render_preview(source, "text/csv", 256)
+
+        assert max(image.size) == 256
+
+    def test_other_formats_have_no_preview(self, tmp_path):
+        source = tmp_path / "doc.pdf"
+        source.write_bytes(b"%PDF-1.4")
+
+        with pytest.raises(PreviewUnavailable):
+            render_preview(source, "application/pdf", 256)
+
+
+class TestPreviewCache:
+    """Test lazy rendering and the size-bounded disk cache."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_render_once(
+        self, tmp_path, cache_dir, monkeypatch
+    ):
+        source = write_image(tmp_path / "scan.jpg")
+        renders = []
+        original = previews._write_preview
+        monkeypatch.setattr(
+            previews,
+            "_write_preview",
+            lambda *args: renders.append(1) or original(*args),
+        )
+        cache = PreviewCache()
+
+        paths = await asyncio.gather(
+            *(cache.get(source, "image/jpeg", "ab" * 32, "thumbnail") for _ in range(5))
+        )
+        await cache.get(source, "image/jpeg", "ab" * 32, "thumbnail")
+
+        assert len(renders) == 1
+        assert len(set(paths)) == 1 and paths[0].exists()
+
+    def test_eviction_removes_least_recently_used(self, cache_dir):
+        cache_dir.mkdir()
+        for age, name in enumerate(["new", "middle", "old"]):
+            path = cache_dir / f"{name}.jpg"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 - age, 1000 - age))
+
+        remaining = evict(150)
+
+        assert remaining == 100
+        assert [p.name for p in cache_dir.iterdir()] == ["new.jpg"]
@@ -0,0 +1,137 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from rate_limiter import (
+    InMemoryRateLimitBackend,
+    RateLimitMiddleware,
+    RateLimitRule,
+    parse_rate,
+)
+
+
+SUBJECTS = {"token-a": "alice", "token-b": "bob"}
+
+
+def build_app(rules, backend=None, identify=SUBJECTS.get) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware, rules=rules, backend=backend, identify=identify
+    )
+
+    @app.post("/auth/login")
+    async def login():
+        return {"ok": True}
+
+    @app.get("/applications")
+    async def applications():
+        return {"items": []}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+class TestParseRate:
+    """Test rate string parsing."""
+
+    def test_parse_rate(self):
+        assert parse_rate("10/minute") == (10, 60)
+        assert parse_rate("5/seconds") == (5, 1)
+
+    def test_parse_rate_invalid(self):
+        with pytest.raises(ValueError):
+            parse_rate("ten per minute")
+
+
+class TestInMemoryBackend:
+    """Test the in-memory token bucket backend."""
+
+    def test_bucket_exhausts_and_refills(self):
+        backend = InMemoryRateLimitBackend()
+        for _ in range(3):
+            assert backend.hit_sync("k", 3, 60, now=0.0).allowed is True
+
+        denied = backend.hit_sync("k", 3, 60, now=0.0)
+        assert denied.allowed is False
+        assert denied.remaining == 0
+        assert denied.reset_after == pytest.approx(20.0)
+
+        # One token refills every 20 seconds
+        assert backend.hit_sync("k", 3, 60, now=20.0).allowed is True
+
+    def test_lru_eviction_bounds_memory(self):
+        backend = InMemoryRateLimitBackend(max_keys=2)
+        backend.hit_sync("a", 1, 60, now=0.0)
+        backend.hit_sync("b", 1, 60, now=0.0)
+        backend.hit_sync("a", 1, 60, now=0.0)
+        backend.hit_sync("c", 1, 60, now=0.0)
+
+        assert len(backend) == 2
+        assert backend.hit_sync("b", 1, 60, now=0.0).allowed is True
+
+
+class TestRateLimitMiddleware:
+    """Test the ASGI rate limiting middleware."""
+
+    def test_headers_and_429(self):
+        rules = [RateLimitRule("login", "2/minute", path="/auth/login", exact=True)]
+        client = TestClient(build_app(rules))
+
+        first = client.post("/auth/login")
+        assert first.status_code == 200
+        assert first.headers["x-ratelimit-limit"] == "2"
+        assert first.headers["x-ratelimit-remaining"] == "1"
+
+        client.post("/auth/login")
+        blocked = client.post("/auth/login")
+        assert blocked.status_code == 429
+        assert blocked.json()["error"] == "Rate limit exceeded"
+        assert int(blocked.headers["retry-after"]) >= 1
+
+    def test_unmatched_route_is_not_limited(self):
+        rules = [RateLimitRule("login", "1/minute", path="/auth/login", exact=True)]
+        client = TestClient(build_app(rules))
+
+        for _ in range(5):
+            response = client.get("/health")
+            assert response.status_code == 200
+            assert "x-ratelimit-limit" not in response.headers
+
+    def test_user_rules_key_by_bearer_token(self):
+        rules = [RateLimitRule("apps", "1/minute", path="/applications", key_by="user")]
+        client = TestClient(build_app(rules))
+
+        alice = {"Authorization": "Bearer token-a"}
+        bob = {"Authorization": "Bearer token-b"}
+
+        assert client.get("/applications", headers=alice).status_code == 200
+        assert client.get("/applications", headers=alice).status_code == 429
+        assert client.get("/applications", headers=bob).status_code == 200
+
+    def test_unverified_tokens_share_the_ip_bucket(self):
+        rules = [RateLimitRule("apps", "2/minute", path="/applications", key_by="user")]
+        client = TestClient(build_app(rules))
+
+        # Rotating made-up tokens never earns a fresh bucket
+        for attempt in range(2):
+            headers = {"Authorization": f"Bearer forged-{attempt}"}
+            assert client.get("/applications", headers=headers).status_code == 200
+        forged = {"Authorization": "Bearer forged-2"}
+        assert client.get("/applications", headers=forged).status_code == 429
+        assert client.get("/applications").status_code == 429
+
+        # A verified user still gets their own
+        alice = {"Authorization": "Bearer token-a"}
+        assert client.get("/applications", headers=alice).status_code == 200
+
+    def test_without_identify_user_rules_fall_back_to_ip(self):
+        rules = [RateLimitRule("apps", "1/minute", path="/applications", key_by="user")]
+        client = TestClient(build_app(rules, identify=None))
+
+        alice = {"Authorization": "Bearer token-a"}
+        bob = {"Authorization": "Bearer token-b"}
+        assert client.get("/applications", headers=alice).status_code == 200
+        assert client.get("/applications", headers=bob).status_code == 429
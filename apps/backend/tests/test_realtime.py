@@ -0,0 +1,139 @@
+import asyncio
+import threading
+
+import pytest
+
+from realtime import EventStream, FanoutHub, next_payload, sse_frames
+
+
+class TestFanoutHub:
+    """Test in-process topic fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_every_subscriber_of_topic(self):
+        hub = FanoutHub()
+        first, second = hub.subscribe("a"), hub.subscribe("a")
+        other = hub.subscribe("b")
+
+        assert hub.publish("a", "hello") == 2
+        assert await first.get() == "hello"
+        assert await second.get() == "hello"
+        assert other.queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_drops_empty_topics(self):
+        hub = FanoutHub()
+        subscription = hub.subscribe("a")
+        hub.unsubscribe(subscription)
+
+        assert hub.subscriber_count("a") == 0
+        assert hub.publish("a", "hello") == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_is_closed_on_overflow(self):
+        hub = FanoutHub(max_queue=2)
+        subscription = hub.subscribe("a")
+        for i in range(3):
+            hub.publish("a", str(i))
+
+        assert subscription.overflowed is True
+        assert await subscription.get() is None
+
+    @pytest.mark.asyncio
+    async def test_publish_from_another_thread(self):
+        hub = FanoutHub()
+        subscription = hub.subscribe("a")
+        thread = threading.Thread(target=hub.publish, args=("a", "from thread"))
+        thread.start()
+        thread.join()
+
+        assert await asyncio.wait_for(subscription.get(), timeout=1) == "from thread"
+
+    @pytest.mark.asyncio
+    async def test_publish_many_routes_each_payload_to_its_topic(self):
+        hub = FanoutHub()
+        first, second = hub.subscribe("a"), hub.subscribe("b")
+
+        assert hub.publish_many([("a", "1"), ("b", "2"), ("a", "3"), ("c", "4")]) == 3
+        assert [await first.get(), await first.get()] == ["1", "3"]
+        assert await second.get() == "2"
+
+
+class TestNextPayload:
+    """Test waiting on a subscription for long polling."""
+
+    @pytest.mark.asyncio
+    async def test_skips_payloads_not_accepted(self):
+        hub = FanoutHub()
+        subscription = hub.subscribe("a")
+        hub.publish("a", "read")
+        hub.publish("a", "message")
+
+        assert (
+            await next_payload(subscription, 1, lambda payload: payload == "message")
+            == "message"
+        )
+
+    @pytest.mark.asyncio
+    async def test_returns_none_on_timeout(self):
+        hub = FanoutHub()
+        subscription = hub.subscribe("a")
+        hub.publish("a", "read")
+
+        assert (
+            await next_payload(subscription, 0.05, lambda payload: payload == "message")
+            is None
+        )
+
+
+class TestEventStream:
+    """Test the replayable SSE event stream."""
+
+    def test_replay_returns_events_after_last_id(self):
+        stream = EventStream(size=10)
+        events = [stream.publish("status_changed", {"n": i}, "{}") for i in range(3)]
+
+        assert stream.replay(None) == []
+        assert stream.replay(events[0].id) == events[1:]
+        assert stream.replay(events[-1].id) == []
+        assert (
+            events[0].frame
+            == f"id: {events[0].id}\nevent: status_changed\ndata: {{}}\n\n"
+        )
+
+    def test_replay_rejects_ids_it_cannot_resume(self):
+        stream = EventStream(size=2)
+        events = [stream.publish("assigned", {}, "{}") for _ in range(4)]
+
+        assert stream.replay(events[0].id) is None  # Evicted from the buffer
+        assert stream.replay(events[1].id) == events[2:]
+        assert stream.replay("otherepoch-3") is None
+        assert stream.replay(f"{stream.epoch}-99") is None
+
+    @pytest.mark.asyncio
+    async def test_frames_resume_then_stream_visible_events(self):
+        stream = EventStream(size=10)
+        first = stream.publish("application_created", {"visible": True}, "{}")
+        stream.publish("application_created", {"visible": False}, "{}")
+        missed = stream.publish("application_created", {"visible": True}, "{}")
+
+        frames = sse_frames(
+            stream, first.id, lambda event: event.data["visible"], heartbeat=0.05
+        )
+        assert (await frames.__anext__()).startswith("retry:")
+        assert await frames.__anext__() == missed.frame
+        live = stream.publish("status_changed", {"visible": True}, "{}")
+        assert await frames.__anext__() == live.frame
+        assert await frames.__anext__() == ": keep-alive\n\n"
+        await frames.aclose()
+
+        assert stream.hub.subscriber_count(stream._topic) == 0
+
+    @pytest.mark.asyncio
+    async def test_frames_send_reset_when_resume_is_impossible(self):
+        stream = EventStream(size=10)
+        frames = sse_frames(stream, "stale-1", lambda event: True)
+
+        await frames.__anext__()
+        assert await frames.__anext__() == "event: reset\ndata: {}\n\n"
+        await frames.aclose()
@@ -0,0 +1,257 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler import (
+    AdvisoryLeaderLock,
+    CronSchedule,
+    FileLeaderLock,
+    ScheduledJob,
+    Scheduler,
+    leader_lock,
+)
+
+
+def at(*fields):
+    return datetime(*fields, tzinfo=timezone.utc)
+
+
+class FakeLock:
+    def __init__(self, leader):
+        self.leader = leader
+
+    def acquire(self):
+        return self.leader
+
+    def release(self):
+        pass
+
+
+class TestCronSchedule:
+    """Test parsing cron expressions and finding the next run."""
+
+    def test_next_run(self):
+        assert CronSchedule("*/15 * * * *").next_after(at(2026, 3, 1, 10, 7)) == at(
+            2026, 3, 1, 10, 15
+        )
+        assert CronSchedule("10 0 * * *").next_after(at(2026, 3, 1, 0, 10)) == at(
+            2026, 3, 2, 0, 10
+        )
+        assert CronSchedule("@monthly").next_after(at(2026, 12, 15)) == at(2027, 1, 1)
+        assert CronSchedule("0 9 * * 1-5").next_after(at(2026, 10, 16, 9)) == at(
+            2026, 10, 19, 9
+        )
+
+    def test_day_fields_match_either_when_both_set(self):
+        # The 13th, or any Friday
+        schedule = CronSchedule("0 0 13 * 5")
+
+        assert schedule.next_after(at(2026, 10, 1)) == at(2026, 10, 2)
+        assert schedule.next_after(at(2026, 10, 9, 1)) == at(2026, 10, 13)
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "*/0 * * * *", "a * * * *"):
+            with pytest.raises(ValueError):
+                CronSchedule(expression)
+        with pytest.raises(ValueError):
+            CronSchedule("0 0 31 2 *").next_after(at(2026, 1, 1))
+
+
+class TestScheduler:
+    """Test running due jobs only on the elected leader."""
+
+    def make(self, leader):
+        runs = []
+        job = ScheduledJob("rollup", CronSchedule("0 * * * *"), runs.append)
+        return Scheduler(FakeLock(leader), [job]), runs
+
+    def test_leader_runs_due_jobs_once(self):
+        scheduler, runs = self.make(leader=True)
+
+        assert scheduler.tick(at(2026, 3, 1, 9, 30)) == []
+        assert scheduler.tick(at(2026, 3, 1, 10, 0, 20)) == ["rollup"]
+        assert scheduler.tick(at(2026, 3, 1, 10, 0, 50)) == []
+        assert len(runs) == 1
+
+    def test_follower_skips_but_keeps_schedule(self):
+        scheduler, runs = self.make(leader=False)
+        scheduler.tick(at(2026, 3, 1, 9, 30))
+
+        assert scheduler.tick(at(2026, 3, 1, 10, 0)) == []
+        scheduler.lock.leader = True
+        assert scheduler.tick(at(2026, 3, 1, 10, 30)) == []
+        assert scheduler.tick(at(2026, 3, 1, 11, 0)) == ["rollup"]
+
+    def test_failing_job_is_recorded(self):
+        def broken(deadline):
+            raise RuntimeError("database unavailable")
+
+        job = ScheduledJob("broken", CronSchedule("@hourly"), broken)
+        scheduler = Scheduler(FakeLock(True), [job])
+        scheduler.tick(at(2026, 3, 1, 9, 30))
+
+        assert scheduler.tick(at(2026, 3, 1, 10, 0)) == ["broken"]
+        assert "database unavailable" in job.last_error
+
+
+class TestFileLeaderLock:
+    """Test SQLite leader election through a lock file."""
+
+    def test_only_one_holder(self, tmp_path):
+        first = FileLeaderLock(str(tmp_path / "caelo.db.scheduler.lock"))
+        second = FileLeaderLock(str(tmp_path / "caelo.db.scheduler.lock"))
+
+        assert first.acquire()
+        assert first.acquire()
+        assert not second.acquire()
+        first.release()
+        assert second.acquire()
+        second.release()
+
+
+class TestLeaderLock:
+    """Test choosing the leader lock for a database."""
+
+    def test_advisory_lock_stays_out_of_the_request_pool(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+
+        engine = create_engine("postgresql://caelo:secret@db/caelo", pool_size=2)
+
+        lock = leader_lock(engine)
+
+        assert isinstance(lock, AdvisoryLeaderLock)
+        assert lock.engine is not engine
+        assert isinstance(lock.engine.pool, NullPool)
+        assert lock.engine.url == engine.url
+
+
+class TestAnomalyBaselineSweep:
+    """Test that the baseline sweep resumes from its stored cursor."""
+
+    @pytest.fixture
+    def sweep(self, enhanced_sessions, make_user, monkeypatch):
+        from decimal import Decimal
+
+        import maintenance
+        from models_new import LoanApplication, Transaction, TransactionType
+
+        borrower, _ = make_user("borrower")
+        db = enhanced_sessions()
+        for _ in range(3):
+            application = LoanApplication(
+                business_name="Acme Bakery",
+                business_type="Retail",
+                loan_amount=Decimal("25000"),
+                loan_purpose="Equipment",
+                borrower_id=borrower.id,
+            )
+            db.add(application)
+            db.flush()
+            db.add(
+                Transaction(
+                    application_id=application.id,
+                    transaction_date=datetime.now(timezone.utc),
+                    type=TransactionType.inflow,
+                    category="Sales",
+                    description="Sale",
+                    amount=Decimal("100"),
+                )
+            )
+        db.commit()
+        db.close()
+
+        clock = {"now": 0.0, "budget": None}
+        scored = []
+
+        def score(db, application_id):
+            scored.append(application_id)
+            if len(scored) == clock["budget"]:
+                clock["now"] = 100.0
+
+        monkeypatch.setattr(maintenance, "SessionLocal", enhanced_sessions)
+        monkeypatch.setattr(maintenance, "SCHEDULER_BATCH_SIZE", 2)
+        monkeypatch.setattr(maintenance, "score_transaction_anomalies", score)
+        monkeypatch.setattr(
+            maintenance, "time", SimpleNamespace(monotonic=lambda: clock["now"])
+        )
+
+        def run(budget=None):
+            clock.update(now=0.0, budget=budget)
+            scored.clear()
+            maintenance.recompute_anomaly_baselines(deadline=10.0)
+            return list(scored)
+
+        return run
+
+    def test_sweep_cut_short_resumes_on_next_run(self, sweep):
+        first = sweep(budget=2)
+        assert len(first) == 2
+
+        second = sweep()
+        assert len(second) == 1
+        assert sorted(first + second) == first + second
+
+        # A finished sweep starts over
+        assert sweep() == first + second
+
+
+class TestUploadExpiry:
+    """Test that abandoned uploads are deleted with their partial files."""
+
+    def test_only_old_unfinished_uploads_expire(
+        self, enhanced_sessions, make_user, tmp_path, monkeypatch
+    ):
+        from datetime import timedelta
+        from decimal import Decimal
+
+        import maintenance
+        from models_new import DocumentType, DocumentUpload, LoanApplication
+        from uploads import partial_path
+
+        monkeypatch.setattr("uploads.UPLOAD_FOLDER", tmp_path)
+        monkeypatch.setattr(maintenance, "SessionLocal", enhanced_sessions)
+        monkeypatch.setattr(maintenance, "SCHEDULER_BATCH_SIZE", 1)
+        borrower, _ = make_user("borrower")
+        db = enhanced_sessions()
+        application = LoanApplication(
+            business_name="Acme Bakery",
+            business_type="Retail",
+            loan_amount=Decimal("25000"),
+            loan_purpose="Equipment",
+            borrower_id=borrower.id,
+        )
+        db.add(application)
+        db.flush()
+        now = datetime.now(timezone.utc)
+        ages = {"abandoned": 100, "also_abandoned": 80, "recent": 1, "completed": 100}
+        uploads = {}
+        for label, hours in ages.items():
+            upload = DocumentUpload(
+                application_id=application.id,
+                uploader_id=borrower.id,
+                name=f"{label}.pdf",
+                type=DocumentType.other,
+                size=10,
+                created_at=now - timedelta(hours=hours),
+                completed_at=now if label == "completed" else None,
+            )
+            db.add(upload)
+            db.flush()
+            uploads[label] = upload.id
+            path = partial_path(upload.id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"part")
+        db.commit()
+
+        maintenance.expire_abandoned_uploads(deadline=float("inf"))
+
+        remaining = {row.id for row in db.query(DocumentUpload.id)}
+        assert remaining == {uploads["recent"], uploads["completed"]}
+        assert {
+            label
+            for label, upload_id in uploads.items()
+            if partial_path(upload_id).exists()
+        } == {"recent", "completed"}
+        db.close()
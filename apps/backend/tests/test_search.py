@@ -0,0 +1,131 @@
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.sql import column, table
+
+from search import fts5_match_query, install_search_index, search_clauses
+
+
+def make_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE team_notes "
+                "(id INTEGER PRIMARY KEY, content TEXT NOT NULL)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO team_notes (content) VALUES ('Written before the index')")
+        )
+    return engine
+
+
+def search_notes(engine, query):
+    clauses = search_clauses("sqlite", "team_notes", query)
+    notes = table("team_notes", column("id"))
+    statement = (
+        select(notes.c.id, clauses.snippet)
+        .select_from(notes.join(clauses.join_target, clauses.onclause))
+        .where(clauses.where)
+        .order_by(clauses.rank.desc())
+    )
+    with engine.connect() as conn:
+        return conn.execute(statement).all()
+
+
+class TestFts5MatchQuery:
+    """Test conversion of free text into FTS5 queries."""
+
+    def test_terms_are_quoted_with_prefix_on_last(self):
+        assert fts5_match_query("cash flow") == '"cash" AND ("flow" OR "flow"*)'
+
+    def test_operators_and_punctuation_are_neutralised(self):
+        assert (
+            fts5_match_query('bakery" OR (NEAR')
+            == '"bakery" AND "OR" AND ("NEAR" OR "NEAR"*)'
+        )
+
+    def test_empty_query(self):
+        assert fts5_match_query(" -- ") is None
+        assert search_clauses("sqlite", "team_notes", "!!") is None
+
+
+class TestSqliteSearchIndex:
+    """Test the FTS5 index and its write triggers."""
+
+    def test_existing_rows_are_indexed(self):
+        engine = make_engine()
+
+        assert install_search_index(engine) is True
+        assert install_search_index(engine) is True
+        assert [row.id for row in search_notes(engine, "index")] == [1]
+
+    def test_index_follows_writes(self):
+        engine = make_engine()
+        install_search_index(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO team_notes (content) VALUES ('Bakers need ovens')")
+            )
+            conn.execute(
+                text("UPDATE team_notes SET content = 'Rewritten' WHERE id = 1")
+            )
+
+        assert search_notes(engine, "written") == []
+        assert [row.id for row in search_notes(engine, "baker")] == [2]
+        assert [row.id for row in search_notes(engine, "need oven")] == [2]
+        assert search_notes(engine, "ovens")[0][1] == "Bakers need **ovens**"
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM team_notes WHERE id = 2"))
+
+        assert search_notes(engine, "ovens") == []
+
+
+class TestSearchRecords:
+    """Test merging ranked hits across kinds."""
+
+    def test_kinds_are_merged_on_their_own_scale(self, enhanced_sessions, make_user):
+        from decimal import Decimal
+
+        from crud_operations import search_records
+        from models_new import LoanApplication, TeamNote
+
+        admin, _ = make_user("admin")
+        db = enhanced_sessions()
+        applications = []
+        for name in ("Oven Bakery", "Oven Works"):
+            application = LoanApplication(
+                business_name=name,
+                business_type="Retail",
+                loan_amount=Decimal("25000"),
+                loan_purpose="Equipment",
+                borrower_id=admin.id,
+            )
+            db.add(application)
+            applications.append(application)
+        db.flush()
+        # "oven" is in every application but rare among notes, so raw note
+        # ranks dwarf application ranks
+        contents = ["Replace the oven", "Checked the oven and the rest of the kitchen"]
+        contents += [f"Unrelated note {number}" for number in range(6)]
+        for content in contents:
+            db.add(
+                TeamNote(
+                    application_id=applications[0].id,
+                    author_id=admin.id,
+                    content=content,
+                )
+            )
+        db.commit()
+
+        hits = search_records(db, "oven", admin)
+        db.close()
+
+        assert [(hit["kind"].value, hit["rank"]) for hit in hits[:3]] == [
+            ("application", 1.0),
+            ("application", 1.0),
+            ("note", 1.0),
+        ]
+        assert hits[3]["kind"].value == "note"
+        assert 0 < hits[3]["rank"] < 1
+        assert len(hits) == 4
@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from serialization import dump_json, get_adapter, json_response
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    owner: Optional["Owner"] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Owner(BaseModel):
+    email: str
+
+    class Config:
+        from_attributes = True
+
+
+Item.model_rebuild()
+
+
+class TestJsonResponse:
+    """Test single-pass JSON serialization of ORM-like objects."""
+
+    def test_serializes_objects_from_attributes(self):
+        rows = [
+            SimpleNamespace(id=1, name="a", owner=SimpleNamespace(email="x@y.z")),
+            SimpleNamespace(id=2, name="b", owner=None),
+        ]
+
+        data = json.loads(dump_json(List[Item], rows))
+
+        assert data == [
+            {"id": 1, "name": "a", "owner": {"email": "x@y.z"}},
+            {"id": 2, "name": "b", "owner": None},
+        ]
+
+    def test_json_response(self):
+        response = json_response(Item, SimpleNamespace(id=1, name="a", owner=None))
+
+        assert response.status_code == 200
+        assert response.media_type == "application/json"
+        assert json.loads(response.body)["name"] == "a"
+
+    def test_adapters_are_cached(self):
+        assert get_adapter(List[Item]) is get_adapter(List[Item])
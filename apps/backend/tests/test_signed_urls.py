@@ -0,0 +1,54 @@
+import pytest
+
+from signed_urls import InvalidDocumentToken, sign_document_token, verify_document_token
+
+
+def sign(now=1000.0, **overrides):
+    fields = dict(
+        variant="download",
+        document_id="d1",
+        key="blobs/ab/cd/abcd",
+        name="statement.csv",
+        mime_type="text/csv",
+        sha256="abcd",
+        ttl=300,
+        now=now,
+    )
+    fields.update(overrides)
+    return sign_document_token(**fields)
+
+
+class TestSignedDocumentTokens:
+    """Test issuing and verifying signed document URLs."""
+
+    def test_round_trip(self):
+        token, expires = sign()
+
+        grant = verify_document_token(token, now=1000.0)
+
+        assert grant.key == "blobs/ab/cd/abcd"
+        assert grant.name == "statement.csv"
+        assert grant.expires == expires
+
+    def test_tampered_payload_is_rejected(self):
+        token, _ = sign()
+        other, _ = sign(key="blobs/ff/ff/ffff")
+        forged = other.split(".")[0] + "." + token.split(".")[1]
+
+        with pytest.raises(InvalidDocumentToken):
+            verify_document_token(forged, now=1000.0)
+
+    def test_expired_token_is_rejected(self):
+        token, expires = sign()
+
+        with pytest.raises(InvalidDocumentToken):
+            verify_document_token(token, now=expires)
+
+    def test_links_are_stable_within_a_window(self):
+        assert sign(now=1000.0) == sign(now=1150.0)
+        assert sign(now=1000.0) != sign(now=1250.0)
+
+    def test_garbage_is_rejected(self):
+        for token in ("", "abc", "a.b", "é.é"):
+            with pytest.raises(InvalidDocumentToken):
+                verify_document_token(token)
@@ -0,0 +1,171 @@
+import uuid
+
+import pytest
+
+
+APPLICATION = {
+    "business_name": "Acme Bakery",
+    "business_type": "Retail",
+    "loan_amount": 25000,
+    "loan_purpose": "Equipment",
+}
+
+
+@pytest.fixture
+def people(make_user):
+    return {"admin": make_user("admin")[1], "borrower": make_user("borrower")[1]}
+
+
+def create_application(client, headers):
+    response = client.post("/applications", json=APPLICATION, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def history(sessions, application_id):
+    from models_new import ApplicationStatusHistory
+
+    db = sessions()
+    try:
+        return [
+            (row.old_status and row.old_status.value, row.new_status.value, row.reason)
+            for row in db.query(ApplicationStatusHistory)
+            .filter(
+                ApplicationStatusHistory.application_id == uuid.UUID(application_id)
+            )
+            .order_by(ApplicationStatusHistory.created_at)
+        ]
+    finally:
+        db.close()
+
+
+class TestSingleStatusUpdate:
+    """Test that single updates follow the status transition table."""
+
+    def test_disallowed_transition_is_rejected(self, enhanced_client, people):
+        application_id = create_application(enhanced_client, people["borrower"])
+
+        response = enhanced_client.put(
+            f"/applications/{application_id}",
+            json={"status": "disbursed"},
+            headers=people["admin"],
+        )
+
+        assert response.status_code == 409
+        assert response.json()["error"] == "Cannot move from pending to disbursed"
+        detail = enhanced_client.get(
+            f"/applications/{application_id}", headers=people["admin"]
+        )
+        assert detail.json()["status"] == "pending"
+
+    def test_allowed_transition_is_recorded(
+        self, enhanced_client, enhanced_sessions, people
+    ):
+        application_id = create_application(enhanced_client, people["borrower"])
+
+        response = enhanced_client.put(
+            f"/applications/{application_id}",
+            json={"status": "under_review"},
+            headers=people["admin"],
+        )
+
+        assert response.status_code == 200
+        assert history(enhanced_sessions, application_id)[-1][:2] == (
+            "pending",
+            "under_review",
+        )
+
+
+class TestBulkStatusTransitions:
+    """Test applying many status transitions in one request."""
+
+    def test_mixed_outcomes(self, enhanced_client, enhanced_sessions, people):
+        approve, bad, same = (
+            create_application(enhanced_client, people["borrower"]) for _ in range(3)
+        )
+        missing = str(uuid.uuid4())
+
+        response = enhanced_client.post(
+            "/applications/bulk/status",
+            json={
+                "reason": "Committee decision",
+                "transitions": [
+                    {
+                        "application_id": approve,
+                        "status": "approved",
+                        "reason": "Strong cash flow",
+                    },
+                    {"application_id": bad, "status": "disbursed"},
+                    {"application_id": same, "status": "pending"},
+                    {"application_id": missing, "status": "approved"},
+                ],
+            },
+            headers=people["admin"],
+        )
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["updated"] == 1
+        assert [result["outcome"] for result in body["results"]] == [
+            "updated",
+            "invalid_transition",
+            "unchanged",
+            "not_found",
+        ]
+        assert body["results"][1]["detail"] == "Cannot move from pending to disbursed"
+        detail = enhanced_client.get(
+            f"/applications/{approve}", headers=people["admin"]
+        ).json()
+        assert detail["status"] == "approved"
+        assert detail["decision_date"] is not None
+
+    def test_history_rows_are_written(self, enhanced_client, enhanced_sessions, people):
+        first, second = (
+            create_application(enhanced_client, people["borrower"]) for _ in range(2)
+        )
+
+        enhanced_client.post(
+            "/applications/bulk/status",
+            json={
+                "reason": "Committee decision",
+                "transitions": [
+                    {"application_id": first, "status": "under_review"},
+                    {
+                        "application_id": second,
+                        "status": "rejected",
+                        "reason": "Incomplete",
+                    },
+                ],
+            },
+            headers=people["admin"],
+        )
+
+        assert history(enhanced_sessions, first)[-1] == (
+            "pending",
+            "under_review",
+            "Committee decision",
+        )
+        assert history(enhanced_sessions, second)[-1] == (
+            "pending",
+            "rejected",
+            "Incomplete",
+        )
+
+    def test_staff_only(self, enhanced_client, people):
+        application_id = create_application(enhanced_client, people["borrower"])
+
+        response = enhanced_client.post(
+            "/applications/bulk/status",
+            json={
+                "transitions": [
+                    {"application_id": application_id, "status": "approved"}
+                ]
+            },
+            headers=people["borrower"],
+        )
+
+        assert response.status_code == 403
+        detail = enhanced_client.get(
+            f"/applications/{application_id}", headers=people["borrower"]
+        )
+        assert detail.json()["status"] == "pending"
@@ -0,0 +1,329 @@
+import hashlib
+
+import pytest
+
+from uploads import (
+    UploadBusy,
+    UploadTooLarge,
+    append_stream,
+    blob_key,
+    forget,
+    received_bytes,
+    size_limit,
+    upload_digest,
+    upload_writer,
+)
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class TestAppendStream:
+    """Test resumable, hashed appends to a partial upload."""
+
+    @pytest.mark.asyncio
+    async def test_resumed_upload_hashes_whole_file(self, tmp_path):
+        path = tmp_path / "partial"
+        offset = await append_stream(
+            "u1", path, 0, chunks(b"hello ", b"wor"), max_size=11
+        )
+        assert offset == 9
+
+        offset = await append_stream("u1", path, offset, chunks(b"ld"), max_size=11)
+        digest = await upload_digest("u1", path, size=offset)
+
+        assert digest == hashlib.sha256(b"hello world").hexdigest()
+        assert path.read_bytes() == b"hello world"
+
+    @pytest.mark.asyncio
+    async def test_hash_is_rebuilt_from_disk_when_not_tracked(self, tmp_path):
+        path = tmp_path / "partial"
+        await append_stream("u2", path, 0, chunks(b"abc"), max_size=6)
+        forget("u2")
+
+        await append_stream("u2", path, 3, chunks(b"def"), max_size=6)
+        digest = await upload_digest("u2", path, size=6)
+
+        assert digest == hashlib.sha256(b"abcdef").hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_resuming_earlier_drops_bytes_past_offset(self, tmp_path):
+        path = tmp_path / "partial"
+        await append_stream("u3", path, 0, chunks(b"abcXX"), max_size=6)
+
+        await append_stream("u3", path, 3, chunks(b"def"), max_size=6)
+
+        assert path.read_bytes() == b"abcdef"
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_keeps_bytes_before_limit(self, tmp_path):
+        path = tmp_path / "partial"
+        with pytest.raises(UploadTooLarge):
+            await append_stream("u4", path, 0, chunks(b"abc", b"defg"), max_size=5)
+
+        assert await received_bytes(path) == 3
+
+
+class TestUploadWriter:
+    """Test the per-upload append lock shared by all workers."""
+
+    def test_second_writer_is_refused_until_the_first_exits(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr("uploads.UPLOAD_FOLDER", tmp_path)
+
+        with upload_writer("u5"):
+            # flock conflicts between separate opens, as between processes
+            with pytest.raises(UploadBusy):
+                with upload_writer("u5"):
+                    pass
+            with upload_writer("u6"):
+                pass
+
+        with upload_writer("u5"):
+            pass
+
+
+class TestAppendEndpoint:
+    """Test the request checks made before any bytes are written."""
+
+    @pytest.fixture
+    def upload_id(
+        self, enhanced_client, enhanced_sessions, make_user, tmp_path, monkeypatch
+    ):
+        from decimal import Decimal
+
+        from models_new import LoanApplication
+
+        monkeypatch.setattr("uploads.UPLOAD_FOLDER", tmp_path)
+        borrower, headers = make_user("borrower")
+        db = enhanced_sessions()
+        application = LoanApplication(
+            business_name="Acme Bakery",
+            business_type="Retail",
+            loan_amount=Decimal("25000"),
+            loan_purpose="Equipment",
+            borrower_id=borrower.id,
+        )
+        db.add(application)
+        db.commit()
+        response = enhanced_client.post(
+            f"/applications/{application.id}/uploads",
+            json={"name": "plan.txt", "type": "business_plan", "size": 5},
+            headers=headers,
+        )
+        db.close()
+        assert response.status_code == 201, response.text
+        return response.json()["id"], headers
+
+    def put(self, client, upload_id, headers, body, **extra):
+        return client.put(
+            f"/uploads/{upload_id}",
+            content=body,
+            headers={**headers, "Upload-Offset": "0", **extra},
+        )
+
+    def test_malformed_content_length_is_a_bad_request(
+        self, enhanced_client, upload_id
+    ):
+        upload_id, headers = upload_id
+
+        response = self.put(
+            enhanced_client, upload_id, headers, b"hello", **{"Content-Length": "5x"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid Content-Length header"
+
+    def test_append_while_another_is_running_conflicts(
+        self, enhanced_client, upload_id
+    ):
+        upload_id, headers = upload_id
+
+        with upload_writer(upload_id):
+            response = self.put(enhanced_client, upload_id, headers, b"hello")
+        assert response.status_code == 409
+
+        response = self.put(enhanced_client, upload_id, headers, b"hello")
+        assert response.status_code == 200, response.text
+        assert response.json()["completed"]
+
+
+class TestStorageLayout:
+    """Test per-type limits and content-addressed keys."""
+
+    def test_statements_allow_more_than_default(self):
+        assert size_limit("bank_statement") > size_limit("other")
+
+    def test_blob_key_fans_out_by_digest_prefix(self):
+        digest = hashlib.sha256(b"x").hexdigest()
+
+        assert blob_key(digest) == f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class TestBlobReferences:
+    """Test deduplicated uploads and blob removal against the database."""
+
+    CONTENT = b"%PDF-1.4 statement"
+    SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+    @pytest.fixture
+    def stored(self, enhanced_sessions, make_user, tmp_path, monkeypatch):
+        """A borrower's application with one document whose blob is on disk."""
+        from decimal import Decimal
+
+        from models_new import Document, DocumentType, LoanApplication, StoredBlob
+
+        monkeypatch.setattr("uploads.UPLOAD_FOLDER", tmp_path)
+        borrower, _ = make_user("borrower")
+        db = enhanced_sessions()
+        application = LoanApplication(
+            business_name="Acme Bakery",
+            business_type="Retail",
+            loan_amount=Decimal("25000"),
+            loan_purpose="Equipment",
+            borrower_id=borrower.id,
+        )
+        db.add(application)
+        db.flush()
+        document = Document(
+            application_id=application.id,
+            name="statement.pdf",
+            type=DocumentType.bank_statement,
+            file_path=blob_key(self.SHA256),
+            file_size=len(self.CONTENT),
+            sha256=self.SHA256,
+        )
+        db.add(document)
+        db.add(StoredBlob(sha256=self.SHA256, size=len(self.CONTENT), ref_count=1))
+        db.commit()
+        path = tmp_path / blob_key(self.SHA256)
+        path.parent.mkdir(parents=True)
+        path.write_bytes(self.CONTENT)
+        stored = {
+            "db": db,
+            "borrower": borrower,
+            "application_id": application.id,
+            "document_id": document.id,
+            "path": path,
+        }
+        yield stored
+        db.close()
+
+    def start_upload(self, stored):
+        from crud_operations import create_document_upload
+        from schemas_new import DocumentUploadCreate
+
+        return create_document_upload(
+            stored["db"],
+            stored["application_id"],
+            DocumentUploadCreate(
+                name="again.pdf",
+                type="bank_statement",
+                size=len(self.CONTENT),
+                sha256=self.SHA256,
+            ),
+            stored["borrower"],
+        )
+
+    def blob_refs(self, stored):
+        from models_new import StoredBlob
+
+        blob = stored["db"].get(StoredBlob, self.SHA256, populate_existing=True)
+        return blob.ref_count if blob else None
+
+    def test_known_content_completes_without_bytes(self, stored):
+        upload = self.start_upload(stored)
+
+        assert upload.document_id is not None
+        assert upload.completed_at is not None
+        assert self.blob_refs(stored) == 2
+
+    def test_blob_deleted_after_lookup_falls_back_to_upload(self, stored, monkeypatch):
+        from models_new import StoredBlob
+
+        db = stored["db"]
+        begin_nested = db.begin_nested
+        deleted = []
+
+        def deleted_since_lookup():
+            # Stands in for the last reference being deleted concurrently
+            if not deleted:
+                db.query(StoredBlob).filter(StoredBlob.sha256 == self.SHA256).delete()
+                deleted.append(True)
+            return begin_nested()
+
+        monkeypatch.setattr(db, "begin_nested", deleted_since_lookup)
+
+        upload = self.start_upload(stored)
+
+        assert deleted
+        assert upload.document_id is None
+        assert upload.completed_at is None
+        # No blob row was left behind without a file
+        assert self.blob_refs(stored) is None
+
+    def test_last_reference_removes_file_after_commit(self, stored, monkeypatch):
+        import crud_operations
+        from crud_operations import delete_document
+
+        db = stored["db"]
+        committed = []
+        monkeypatch.setattr(
+            crud_operations,
+            "remove_file",
+            lambda path: committed.append((path, self.blob_refs(stored))),
+        )
+
+        assert delete_document(db, stored["document_id"], stored["borrower"])
+        # Removed while the committed, zero-reference row was still locked
+        assert committed == [(stored["path"], 0)]
+        assert self.blob_refs(stored) is None
+
+    def test_upload_revives_a_blob_before_its_purge(self, stored, monkeypatch):
+        import crud_operations
+        from crud_operations import (
+            _add_blob_reference,
+            delete_document,
+            purge_unreferenced_blob,
+        )
+
+        db = stored["db"]
+        monkeypatch.setattr(
+            crud_operations, "purge_unreferenced_blob", lambda db, sha256: False
+        )
+        assert delete_document(db, stored["document_id"], stored["borrower"])
+        assert self.blob_refs(stored) == 0
+
+        # Same content stored again before the delete got to purge it
+        assert _add_blob_reference(db, self.SHA256, len(self.CONTENT))
+        db.commit()
+
+        assert not purge_unreferenced_blob(db, self.SHA256)
+        assert self.blob_refs(stored) == 1
+        assert stored["path"].exists()
+
+    def test_shared_blob_keeps_its_file(self, stored):
+        from crud_operations import delete_document
+
+        self.start_upload(stored)
+
+        assert delete_document(stored["db"], stored["document_id"], stored["borrower"])
+        assert self.blob_refs(stored) == 1
+        assert stored["path"].exists()
+
+    def test_failed_commit_keeps_the_file(self, stored, monkeypatch):
+        from crud_operations import delete_document
+
+        db = stored["db"]
+
+        def fail():
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(db, "commit", fail)
+
+        with pytest.raises(RuntimeError):
+            delete_document(db, stored["document_id"], stored["borrower"])
+        assert stored["path"].exists()
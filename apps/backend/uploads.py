@@ -0,0 +1,229 @@
+"""
+Streaming Uploads for Caelo Backend.
+
+Documents are uploaded as raw request bodies appended to a partial file at
+a client-supplied offset, so an interrupted upload resumes where the bytes
+on disk end. Chunks are written with ``aiofiles`` as they arrive through a
+small write buffer and fed to a running SHA-256, keeping worker memory flat
+whatever the file size. Running hashes are kept per upload in a bounded
+map; after a restart (or on another worker) the hash is rebuilt by
+re-reading the partial file once.
+
+Finished files are content-addressed: stored once under their SHA-256 as a
+blob that any number of documents reference (see ``StoredBlob``).
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Tuple
+
+import aiofiles
+import aiofiles.os
+
+
+# Configuration
+UPLOAD_FOLDER = Path(os.getenv("UPLOAD_FOLDER", "./uploads"))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_WRITE_BUFFER = int(os.getenv("UPLOAD_WRITE_BUFFER", str(1024 * 1024)))
+UPLOAD_MAX_TRACKED_HASHES = int(os.getenv("UPLOAD_MAX_TRACKED_HASHES", "1000"))
+
+_MB = 1024 * 1024
+
+# Largest accepted file per document type, overridable with
+# MAX_UPLOAD_SIZE_<TYPE> (bytes); anything else gets MAX_UPLOAD_SIZE
+UPLOAD_SIZE_LIMITS: Dict[str, int] = {
+    document_type: int(
+        os.getenv(f"MAX_UPLOAD_SIZE_{document_type.upper()}", str(default))
+    )
+    for document_type, default in (
+        ("bank_statement", 512 * _MB),
+        ("tax_return", 512 * _MB),
+        ("financial_statement", 256 * _MB),
+        ("business_plan", 64 * _MB),
+    )
+}
+
+
+class UploadBusy(Exception):
+    """Another request is already appending to the upload."""
+
+
+class UploadTooLarge(Exception):
+    """The upload would exceed its declared size or type limit."""
+
+
+def size_limit(document_type: str) -> int:
+    """Largest accepted size in bytes for a document type."""
+    return UPLOAD_SIZE_LIMITS.get(document_type, MAX_UPLOAD_SIZE)
+
+
+def partial_path(upload_id) -> Path:
+    return UPLOAD_FOLDER / "partial" / str(upload_id)
+
+
+def blob_key(sha256: str) -> str:
+    """Where content with this digest is stored, relative to UPLOAD_FOLDER."""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def storage_path(key: str) -> Path:
+    return UPLOAD_FOLDER / key
+
+
+async def create_partial(upload_id) -> Path:
+    """Create the empty file an upload appends to."""
+    path = partial_path(upload_id)
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    async with aiofiles.open(path, "wb"):
+        pass
+    return path
+
+
+async def received_bytes(path: Path) -> int:
+    """Bytes of an upload on disk; this is the offset to resume from."""
+    try:
+        return (await aiofiles.os.stat(path)).st_size
+    except FileNotFoundError:
+        return 0
+
+
+@contextmanager
+def upload_writer(upload_id):
+    """Hold the only right to append to an upload, or raise UploadBusy.
+
+    An exclusive ``flock`` on the partial file, so appends are serialized
+    across every worker process sharing UPLOAD_FOLDER's disk, not just
+    within one. Released when the block exits (or the process dies).
+    """
+    import fcntl
+
+    path = partial_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDONLY | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy()
+        yield
+    finally:
+        os.close(fd)
+
+
+# ===== RUNNING HASHES =====
+
+# upload id -> (offset, sha256 of the first ``offset`` bytes)
+_hashes: "OrderedDict[str, Tuple[int, hashlib._Hash]]" = OrderedDict()
+
+
+def _remember(upload_id, offset: int, sha256):
+    key = str(upload_id)
+    _hashes[key] = (offset, sha256)
+    _hashes.move_to_end(key)
+    while len(_hashes) > UPLOAD_MAX_TRACKED_HASHES:
+        _hashes.popitem(last=False)
+
+
+async def _running_hash(upload_id, path: Path, offset: int):
+    """SHA-256 state of the first ``offset`` bytes, rehashing from disk if needed."""
+    cached = _hashes.pop(str(upload_id), None)
+    if cached is not None and cached[0] == offset:
+        return cached[1]
+    sha256 = hashlib.sha256()
+    if not offset:
+        return sha256
+    remaining = offset
+    async with aiofiles.open(path, "rb") as f:
+        while remaining:
+            block = await f.read(min(UPLOAD_WRITE_BUFFER, remaining))
+            if not block:
+                break
+            sha256.update(block)
+            remaining -= len(block)
+    return sha256
+
+
+def forget(upload_id):
+    _hashes.pop(str(upload_id), None)
+
+
+# ===== STREAMING =====
+
+
+async def append_stream(
+    upload_id, path: Path, offset: int, chunks: AsyncIterator[bytes], max_size: int
+) -> int:
+    """Append ``chunks`` to an upload at ``offset``; returns the new offset.
+
+    Stops with UploadTooLarge, before writing the offending chunk, once the
+    upload would pass ``max_size``. Whatever arrived before an error or a
+    client disconnect stays on disk and in the running hash, so the client
+    resumes from there.
+    """
+    sha256 = await _running_hash(upload_id, path, offset)
+    buffer = bytearray()
+    written = offset
+    try:
+        # "wb" also recreates a missing partial file when starting over
+        async with aiofiles.open(path, "r+b" if offset else "wb") as f:
+            await f.seek(offset)
+            await f.truncate()  # Drop any bytes past the offset the client resumes from
+            try:
+                async for chunk in chunks:
+                    if written + len(buffer) + len(chunk) > max_size:
+                        raise UploadTooLarge()
+                    buffer += chunk
+                    if len(buffer) >= UPLOAD_WRITE_BUFFER:
+                        await f.write(buffer)
+                        sha256.update(buffer)
+                        written += len(buffer)
+                        buffer.clear()
+            finally:
+                if buffer:
+                    await f.write(buffer)
+                    sha256.update(buffer)
+                    written += len(buffer)
+    finally:
+        _remember(upload_id, written, sha256)
+    return written
+
+
+async def upload_digest(upload_id, path: Path, size: int) -> str:
+    """SHA-256 hex digest of a complete upload."""
+    digest = (await _running_hash(upload_id, path, size)).hexdigest()
+    forget(upload_id)
+    return digest
+
+
+# ===== BLOBS =====
+# Synchronous file operations: a blob's file is placed or removed only
+# while its row is locked
+
+
+def place_blob(path: Path, key: str):
+    """Move a finished upload into the blob store, atomically.
+
+    A file already at ``key`` has the same content, so replacing it is safe.
+    """
+    destination = storage_path(key)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(path, destination)
+
+
+def remove_file(path: Path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def discard(upload_id, path: Path):
+    """Delete an abandoned upload's partial file."""
+    forget(upload_id)
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass